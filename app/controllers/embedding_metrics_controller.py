@@ -0,0 +1,17 @@
+from fastapi import APIRouter
+from app.services.core.embedding_batcher import embedding_batch_stats
+from app.services.core.embedding_cache import embedding_cache_stats
+
+# Kept apart from metrics_controller so the search service mounts it without the database and notification metrics.
+router = APIRouter(prefix="/metrics", tags=["Metrics"])
+
+@router.get("/embeddings")
+async def get_embedding_metrics():
+    # Query embeddings of this process: cache hit rate, then batch sizes, queue waits and forward-pass times of the misses.
+    return {"success": True, "cache": embedding_cache_stats.snapshot(), "batching": embedding_batch_stats.snapshot()}
+
+@router.delete("/embeddings")
+async def reset_embedding_metrics():
+    embedding_batch_stats.reset()
+    embedding_cache_stats.reset()
+    return {"success": True}
@@ -1,86 +1,185 @@
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, HTTPException, Depends, Query, UploadFile, File
+from fastapi.responses import StreamingResponse
 from app.services.features.food_service import FoodService
-from app.schema.be_models import DishRequest, IngredientRequest, UpdateIngredientRequest
+from app.services.features.catalog_import_service import CatalogImportService
+from app.repositories.catalog_import_repository import CatalogImportRepository
+from app.repositories.provider import get_food_repository
+from app.schema.be_models import DishRequest, IngredientRequest, UpdateIngredientRequest, RecipeNutritionRequest
+from app.helpers.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 from typing import Optional
+import io
 
 router = APIRouter(prefix="/food", tags=["Food & Dish"])
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+MAX_BATCH_DISHES = 100
+MAX_AUTOCOMPLETE = 50
+
 def get_food_service():
-    return FoodService()
+    return FoodService(get_food_repository())
+
+def get_catalog_import_service():
+    # COPY needs psycopg2's copy_expert, so the import always runs on the sync repository.
+    return CatalogImportService(CatalogImportRepository(), get_food_repository())
+
+@router.get("/autocomplete")
+async def autocomplete(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(10, ge=1, le=MAX_AUTOCOMPLETE),
+    type: str = Query("all", pattern="^(all|dish|ingredient)$"),
+    service: FoodService = Depends(get_food_service)
+):
+    # Names only, accent-insensitive prefix match on any word, most popular first.
+    result = await service.autocomplete(q, limit, type)
+    if not result["success"]:
+        raise HTTPException(status_code=400, detail=result["error"])
+    return result
 
 @router.get("/ingredient/search")
-async def search_food(keyword: str = Query("", alias="keyWord"), service: FoodService = Depends(get_food_service)):
-    result = service.find_food(keyword)
+async def search_food(
+    keyword: str = Query("", alias="keyWord"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None),
+    stream: bool = Query(False),
+    service: FoodService = Depends(get_food_service)
+):
+    # Without a keyword the whole catalog matches: page it with limit/cursor, or stream it as NDJSON.
+    if not keyword:
+        if stream:
+            return StreamingResponse(service.stream_food(), media_type=NDJSON_MEDIA_TYPE)
+        if limit or cursor:
+            result = await service.find_food_page(limit or DEFAULT_PAGE_SIZE, cursor)
+            if not result["success"]:
+                raise HTTPException(status_code=400, detail=result["error"])
+            return result
+
+    result = await service.find_food(keyword)
     if not result["success"]:
         raise HTTPException(status_code=404, detail=result["error"])
     return result
 
 @router.get("/ingredient/similar")
 async def similar_food(keyword: str = Query(..., alias="keyWord"), service: FoodService = Depends(get_food_service)):
-    result = service.similar_food(keyword)
+    result = await service.similar_food(keyword)
     if not result["success"]:
         raise HTTPException(status_code=404, detail=result["error"])
     return result
 
 @router.get("/dish/search")
-async def search_dish(keyword: str = Query("", alias="keyWord"), service: FoodService = Depends(get_food_service)):
-    result = service.find_dish(keyword)
+async def search_dish(
+    keyword: str = Query("", alias="keyWord"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None),
+    stream: bool = Query(False),
+    service: FoodService = Depends(get_food_service)
+):
+    if not keyword:
+        if stream:
+            return StreamingResponse(service.stream_dishes(), media_type=NDJSON_MEDIA_TYPE)
+        if limit or cursor:
+            result = await service.find_dish_page(limit or DEFAULT_PAGE_SIZE, cursor)
+            if not result["success"]:
+                raise HTTPException(status_code=400, detail=result["error"])
+            return result
+
+    result = await service.find_dish(keyword)
     if not result["success"]:
         raise HTTPException(status_code=404, detail=result["error"])
     return result
 
 @router.get("/dish/similar")
 async def similar_dish(keyword: str = Query(..., alias="keyWord"), service: FoodService = Depends(get_food_service)):
-    result = service.similar_dish(keyword)
+    result = await service.similar_dish(keyword)
     if not result["success"]:
         raise HTTPException(status_code=404, detail=result["error"])
     return result
 
 @router.post("/dish/add")
 async def add_dish(data: DishRequest, service: FoodService = Depends(get_food_service)):
-    result = service.insert_dish_to_db(data)
+    result = await service.insert_dish_to_db(data)
     if not result["success"]:
         raise HTTPException(status_code=400, detail=result["error"])
     return result
 
 @router.put("/dish/update/{id}")
 async def update_dish(id: int, data: DishRequest, service: FoodService = Depends(get_food_service)):
-    result = service.update_dish_in_db(id, data)
+    result = await service.update_dish_in_db(id, data)
     if not result["success"]:
         raise HTTPException(status_code=400, detail=result["error"])
     return result
 
+@router.get("/dish/batch")
+async def get_dishes(ids: str = Query(..., description="Comma separated dish ids, e.g. 1,2,3"), service: FoodService = Depends(get_food_service)):
+    try:
+        dish_ids = [int(i) for i in ids.split(",") if i.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be a comma separated list of integers")
+    if not dish_ids or len(dish_ids) > MAX_BATCH_DISHES:
+        raise HTTPException(status_code=400, detail=f"Between 1 and {MAX_BATCH_DISHES} ids are required")
+
+    result = await service.get_dishes_by_ids(dish_ids)
+    if not result["success"]:
+        raise HTTPException(status_code=404, detail=result["error"])
+    return result
+
 @router.get("/dish/{id}")
 async def get_dish(id: int, service: FoodService = Depends(get_food_service)):
-    result = service.get_dish_by_id(id)
+    result = await service.get_dish_by_id(id)
     if not result["success"]:
         raise HTTPException(status_code=404, detail=result["error"])
     return result
 
 @router.get("/dish/name/{name}")
 async def get_dish_by_name(name: str, service: FoodService = Depends(get_food_service)):
-    result = service.get_dish_by_name(name)
+    result = await service.get_dish_by_name(name)
     if not result["success"]:
         raise HTTPException(status_code=404, detail=result["error"])
     return result
 
 @router.post("/ingredient/add")
 async def add_ingredient(data: IngredientRequest, service: FoodService = Depends(get_food_service)):
-    result = service.insert_ingredient_to_db(data)
+    result = await service.insert_ingredient_to_db(data)
     if not result["success"]:
         raise HTTPException(status_code=400, detail=result["error"])
     return result
 
 @router.put("/ingredient/update")
 async def update_ingredient(data: UpdateIngredientRequest, service: FoodService = Depends(get_food_service)):
-    result = service.update_ingredient_in_db(data)
+    result = await service.update_ingredient_in_db(data)
+    if not result["success"]:
+        raise HTTPException(status_code=400, detail=result["error"])
+    return result
+
+@router.post("/recipe/nutrition")
+async def recipe_nutrition(data: RecipeNutritionRequest, service: FoodService = Depends(get_food_service)):
+    result = await service.calculate_recipe_nutrition(data)
     if not result["success"]:
         raise HTTPException(status_code=400, detail=result["error"])
     return result
 
 @router.get("/ingredient/{id}")
 async def get_ingredient(id: int, service: FoodService = Depends(get_food_service)):
-    result = service.get_ingredient_by_id(id)
+    result = await service.get_ingredient_by_id(id)
     if not result["success"]:
         raise HTTPException(status_code=404, detail=result["error"])
     return result
+
+@router.post("/import")
+async def import_catalog(
+    ingredients: Optional[UploadFile] = File(None),
+    dishes: Optional[UploadFile] = File(None),
+    links: Optional[UploadFile] = File(None),
+    fmt: str = Query("csv", alias="format", pattern="^(csv|jsonl)$"),
+    service: CatalogImportService = Depends(get_catalog_import_service)
+):
+    """Bulk import of ingredients, dishes and dish links (dishName, ingredientName, weight) from CSV or JSONL."""
+    if not (ingredients or dishes or links):
+        raise HTTPException(status_code=400, detail="At least one of ingredients, dishes or links is required")
+
+    def text(upload: Optional[UploadFile]):
+        return io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline="") if upload else None
+
+    result = await service.import_catalog(text(ingredients), text(dishes), text(links), fmt)
+    if not result["success"]:
+        raise HTTPException(status_code=400, detail=result["error"])
+    return result
@@ -0,0 +1,37 @@
+from fastapi import APIRouter, Query
+from app.core.database import get_pool_stats, get_async_pool_stats, get_replica_stats
+from app.core.query_stats import query_stats, BUCKETS_MS
+from app.services.core.notification_dispatcher import notification_dispatcher
+from app.services.core.notification_hub import notification_hub
+
+router = APIRouter(prefix="/metrics", tags=["Metrics"])
+
+@router.get("/queries")
+async def get_query_metrics(limit: int = Query(50, ge=1, le=1000)):
+    # Per-fingerprint latency, slowest total first.
+    queries = query_stats.snapshot()
+    return {
+        "success": True,
+        "slowQueryMs": query_stats.slow_ms,
+        "bucketsMs": BUCKETS_MS,
+        "total": len(queries),
+        "queries": queries[:limit],
+    }
+
+@router.delete("/queries")
+async def reset_query_metrics():
+    query_stats.reset()
+    return {"success": True}
+
+@router.get("/db")
+async def get_db_metrics():
+    return {
+        "success": True,
+        "pool": get_pool_stats(),
+        "asyncPool": get_async_pool_stats(),
+        "replicas": get_replica_stats(),
+    }
+
+@router.get("/notifications")
+async def get_notification_metrics():
+    return {"success": True, "dispatcher": notification_dispatcher.stats(), "stream": notification_hub.stats()}
@@ -1,29 +1,88 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request, Query
+from fastapi.responses import StreamingResponse
 from app.services.features.notification_service import NotificationService
-from app.schema.be_models import AddNotificationRequest
+from app.repositories.provider import get_notification_repository
+from app.schema.be_models import AddNotificationRequest, BroadcastNotificationRequest, MarkNotificationsReadRequest
+from app.helpers.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from typing import Optional
 
 router = APIRouter(prefix="/notification", tags=["Notification"])
 
 def get_notification_service():
-    return NotificationService()
+    return NotificationService(get_notification_repository())
 
 @router.post("/send")
 async def send_notification(notification: AddNotificationRequest, service: NotificationService = Depends(get_notification_service)):
-    result = service.insert_notification_to_db(notification)
+    result = await service.insert_notification_to_db(notification)
+    if not result["success"]:
+        raise HTTPException(status_code=400, detail=result["error"])
+    return result
+
+@router.post("/broadcast")
+async def broadcast_notification(request: BroadcastNotificationRequest, service: NotificationService = Depends(get_notification_service)):
+    # Returns once the notifications are stored; follow the push progress with GET /notification/broadcast/{id}.
+    result = await service.broadcast(request)
+    if not result["success"]:
+        raise HTTPException(status_code=400, detail=result["error"])
+    return result
+
+@router.get("/broadcast/{broadcast_id}")
+async def get_broadcast(broadcast_id: int, service: NotificationService = Depends(get_notification_service)):
+    result = await service.get_broadcast(broadcast_id)
+    if not result["success"]:
+        raise HTTPException(status_code=404, detail=result["error"])
+    return result
+
+@router.get("/stream/{receiver_id}")
+async def stream_notifications(receiver_id: int, request: Request, service: NotificationService = Depends(get_notification_service)):
+    # Server-sent events; EventSource sends Last-Event-ID on reconnect to replay what it missed.
+    last_event_id = request.headers.get("Last-Event-ID", "")
+    return StreamingResponse(
+        service.stream_notifications(receiver_id, int(last_event_id) if last_event_id.isdigit() else None, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.get("/delivery/{notification_id}")
+async def get_delivery_status(notification_id: int, service: NotificationService = Depends(get_notification_service)):
+    # Push status from the outbox: PENDING, SENDING, SENT or FAILED.
+    result = await service.get_delivery_status(notification_id)
+    if not result["success"]:
+        raise HTTPException(status_code=404, detail=result["error"])
+    return result
+
+@router.get("/{receiver_id}/unread-count")
+async def get_unread_count(receiver_id: int, service: NotificationService = Depends(get_notification_service)):
+    result = await service.count_unread(receiver_id)
     if not result["success"]:
         raise HTTPException(status_code=400, detail=result["error"])
     return result
 
 @router.get("/{receiver_id}")
-async def get_notifications(receiver_id: int, service: NotificationService = Depends(get_notification_service)):
-    result = service.get_notifications_by_receiver_id(receiver_id)
+async def get_notifications(
+    receiver_id: int,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None),
+    unreadOnly: bool = Query(False),
+    service: NotificationService = Depends(get_notification_service),
+):
+    # Newest first; pass nextCursor back as cursor for the following page.
+    result = await service.get_notifications_by_receiver_id(receiver_id, limit, cursor, unreadOnly)
     if not result["success"]:
         raise HTTPException(status_code=404, detail=result["error"])
     return result
 
+@router.put("/read")
+async def read_notifications(request: MarkNotificationsReadRequest, service: NotificationService = Depends(get_notification_service)):
+    # Bulk mark-as-read in one statement: the listed ids, or every unread notification of the receiver.
+    result = await service.mark_notifications_read(request)
+    if not result["success"]:
+        raise HTTPException(status_code=400, detail=result["error"])
+    return result
+
 @router.put("/read/{id}")
 async def read_notification(id: int, service: NotificationService = Depends(get_notification_service)):
-    result = service.mark_notification_read(id)
+    result = await service.mark_notification_read(id)
     if not result["success"]:
         raise HTTPException(status_code=400, detail=result["error"])
     return result
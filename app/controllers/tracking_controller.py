@@ -1,24 +1,58 @@
 from fastapi import APIRouter, HTTPException, Depends, Query
 from app.services.features.tracking_service import TrackingService
+from app.repositories.provider import get_tracking_repository
 from app.schema.be_models import AddMealRequest, AddDrinkRequest, AddExerciseRequest
 from datetime import date as DateType
 
 router = APIRouter(tags=["Tracking (Meal, Drink, Exercise)"])
 
+MAX_BATCH_SIZE = 500
+
 def get_tracking_service():
-    return TrackingService()
+    return TrackingService(get_tracking_repository())
+
+# --- DAY ---
+@router.get("/tracking/day")
+async def get_day_summary(date: DateType, userId: int, service: TrackingService = Depends(get_tracking_service)):
+    """Meals by meal type, nutrient totals, drinks, water, exercises and kcal burned for one day."""
+    result = await service.day_summary(date, userId)
+    if not result["success"]:
+        raise HTTPException(status_code=400, detail=result["error"])
+    return result
+
+@router.get("/tracking/range")
+async def get_range_summary(
+    userId: int,
+    start: DateType = Query(..., alias="from"),
+    end: DateType = Query(..., alias="to"),
+    service: TrackingService = Depends(get_tracking_service)
+):
+    """Per-day nutrients, water and kcal burned between from and to (inclusive), for charts."""
+    result = await service.range_summary(userId, start, end)
+    if not result["success"]:
+        raise HTTPException(status_code=400, detail=result["error"])
+    return result
 
 # --- MEAL ---
 @router.post("/meal/add")
 async def add_meal(data: AddMealRequest, service: TrackingService = Depends(get_tracking_service)):
-    result = service.insert_meal_to_db(data)
+    result = await service.insert_meal_to_db(data)
+    if not result["success"]:
+        raise HTTPException(status_code=400, detail=result["error"])
+    return result
+
+@router.post("/meal/add-batch")
+async def add_meals(data: list[AddMealRequest], service: TrackingService = Depends(get_tracking_service)):
+    if not data or len(data) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"Between 1 and {MAX_BATCH_SIZE} items are required")
+    result = await service.insert_meals_to_db(data)
     if not result["success"]:
         raise HTTPException(status_code=400, detail=result["error"])
     return result
 
 @router.get("/meal/stat")
 async def get_stat_meal(date: DateType, userId: int, mealType: str, service: TrackingService = Depends(get_tracking_service)):
-    result = service.stat_meal_in_day(date, userId, mealType)
+    result = await service.stat_meal_in_day(date, userId, mealType)
     if not result["success"]:
         # "Not found" returns success=False in logic.py, but usually empty list is better.
         # But to keep compatibility we follow logic.py
@@ -29,14 +63,14 @@ async def get_stat_meal(date: DateType, userId: int, mealType: str, service: Tra
 
 @router.get("/meal/total-nutri")
 async def get_total_nutri_meal(date: DateType, userId: int, service: TrackingService = Depends(get_tracking_service)):
-    result = service.total_nutri_meal(date, userId)
+    result = await service.total_nutri_meal(date, userId)
     if not result["success"]:
         raise HTTPException(status_code=400, detail=result["error"])
     return result
 
 @router.delete("/meal/delete/{id}")
 async def delete_meal(id: int, service: TrackingService = Depends(get_tracking_service)):
-    result = service.delete_meal_of_user(id)
+    result = await service.delete_meal_of_user(id)
     if not result["success"]:
         raise HTTPException(status_code=404, detail=result["error"])
     return result
@@ -44,14 +78,23 @@ async def delete_meal(id: int, service: TrackingService = Depends(get_tracking_s
 # --- DRINK ---
 @router.post("/drink/add")
 async def add_drink(data: AddDrinkRequest, service: TrackingService = Depends(get_tracking_service)):
-    result = service.insert_drink_to_db(data)
+    result = await service.insert_drink_to_db(data)
+    if not result["success"]:
+        raise HTTPException(status_code=400, detail=result["error"])
+    return result
+
+@router.post("/drink/add-batch")
+async def add_drinks(data: list[AddDrinkRequest], service: TrackingService = Depends(get_tracking_service)):
+    if not data or len(data) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"Between 1 and {MAX_BATCH_SIZE} items are required")
+    result = await service.insert_drinks_to_db(data)
     if not result["success"]:
         raise HTTPException(status_code=400, detail=result["error"])
     return result
 
 @router.get("/drink/stat")
 async def get_stat_drink(date: DateType, userId: int, service: TrackingService = Depends(get_tracking_service)):
-    result = service.stat_drink_in_day(date, userId)
+    result = await service.stat_drink_in_day(date, userId)
     if not result["success"]:
          if result["error"] == "Not found":
             return {"success": True, "statDrinks": []}
@@ -60,14 +103,14 @@ async def get_stat_drink(date: DateType, userId: int, service: TrackingService =
 
 @router.get("/drink/total-water")
 async def get_total_water(date: DateType, userId: int, service: TrackingService = Depends(get_tracking_service)):
-    result = service.get_total_water(date, userId)
+    result = await service.get_total_water(date, userId)
     if not result["success"]:
         raise HTTPException(status_code=400, detail=result["error"])
     return result
 
 @router.delete("/drink/delete/{id}")
 async def delete_drink(id: int, service: TrackingService = Depends(get_tracking_service)):
-    result = service.delete_drink_of_user(id)
+    result = await service.delete_drink_of_user(id)
     if not result["success"]:
         raise HTTPException(status_code=404, detail=result["error"])
     return result
@@ -75,21 +118,30 @@ async def delete_drink(id: int, service: TrackingService = Depends(get_tracking_
 # --- EXERCISE ---
 @router.post("/exercise/add")
 async def add_exercise(data: AddExerciseRequest, service: TrackingService = Depends(get_tracking_service)):
-    result = service.insert_exercise_to_db(data)
+    result = await service.insert_exercise_to_db(data)
+    if not result["success"]:
+        raise HTTPException(status_code=400, detail=result["error"])
+    return result
+
+@router.post("/exercise/add-batch")
+async def add_exercises(data: list[AddExerciseRequest], service: TrackingService = Depends(get_tracking_service)):
+    if not data or len(data) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"Between 1 and {MAX_BATCH_SIZE} items are required")
+    result = await service.insert_exercises_to_db(data)
     if not result["success"]:
         raise HTTPException(status_code=400, detail=result["error"])
     return result
 
 @router.get("/exercise/list")
 async def get_exercises(service: TrackingService = Depends(get_tracking_service)):
-    result = service.find_exercise()
+    result = await service.find_exercise()
     if not result["success"]:
          raise HTTPException(status_code=404, detail=result["error"])
     return result
 
 @router.get("/exercise/stat")
 async def get_stat_exercise(date: DateType, userId: int, service: TrackingService = Depends(get_tracking_service)):
-    result = service.stat_exercise_in_day(date, userId)
+    result = await service.stat_exercise_in_day(date, userId)
     if not result["success"]:
          if result["error"] == "Not found":
             return {"success": True, "statExercises": []}
@@ -98,14 +150,14 @@ async def get_stat_exercise(date: DateType, userId: int, service: TrackingServic
 
 @router.get("/exercise/total-kcal")
 async def get_total_kcal_exercise(date: DateType, userId: int, service: TrackingService = Depends(get_tracking_service)):
-    result = service.total_kcal_exercise(date, userId)
+    result = await service.total_kcal_exercise(date, userId)
     if not result["success"]:
         raise HTTPException(status_code=400, detail=result["error"])
     return result
 
 @router.delete("/exercise/delete/{id}")
 async def delete_exercise(id: int, service: TrackingService = Depends(get_tracking_service)):
-    result = service.delete_exercise_of_user(id)
+    result = await service.delete_exercise_of_user(id)
     if not result["success"]:
         raise HTTPException(status_code=404, detail=result["error"])
     return result
@@ -1,51 +1,71 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Header, Response
 from app.services.features.user_service import UserService
+from app.repositories.provider import get_user_repository
 from app.schema.be_models import RegisterRequest, LoginRequest, UserInfoRequest
-from app.core.container import Container
 
 router = APIRouter(prefix="/user", tags=["User"])
+# Routes called by the chatbot and search services at {API_BASE_URL}/..., outside the /user prefix.
+profile_router = APIRouter(tags=["User"])
 
 def get_user_service():
-    return UserService()
+    return UserService(get_user_repository())
 
 @router.post("/register")
 async def register(data: RegisterRequest, service: UserService = Depends(get_user_service)):
-    result = service.register_account(data.userName, data.passWord)
+    result = await service.register_account(data.userName, data.passWord)
     if not result["success"]:
         raise HTTPException(status_code=400, detail=result["error"])
     return result
 
 @router.post("/login")
 async def login(data: LoginRequest, service: UserService = Depends(get_user_service)):
-    result = service.login_account(data.userName, data.passWord)
+    result = await service.login_account(data.userName, data.passWord)
     if not result["success"]:
         raise HTTPException(status_code=400, detail=result["error"])
     return result
 
 @router.post("/info/create")
 async def create_user_info(data: UserInfoRequest, service: UserService = Depends(get_user_service)):
-    result = service.insert_userinfo_to_db(data)
+    result = await service.insert_userinfo_to_db(data)
     if not result["success"]:
         raise HTTPException(status_code=400, detail=result["error"])
     return result
 
 @router.put("/info/update/{id}")
 async def update_user_info(id: int, data: UserInfoRequest, service: UserService = Depends(get_user_service)):
-    result = service.update_userinfo_in_db(id, data)
+    result = await service.update_userinfo_in_db(id, data)
     if not result["success"]:
         raise HTTPException(status_code=400, detail=result["error"])
     return result
 
 @router.get("/info/{id}")
 async def get_user_info(id: int, service: UserService = Depends(get_user_service)):
-    result = service.get_user_info_by_id(id)
+    result = await service.get_user_info_by_id(id)
     if not result["success"]:
         raise HTTPException(status_code=404, detail=result["error"])
     return result
 
 @router.get("/required-index/{id}")
 async def get_required_index(id: int, service: UserService = Depends(get_user_service)):
-    result = service.get_required_index_by_id(id)
+    result = await service.get_required_index_by_id(id)
     if not result["success"]:
         raise HTTPException(status_code=404, detail=result["error"])
     return result
+
+@profile_router.get("/get_all_info")
+async def get_all_info(
+    id: int,
+    response: Response,
+    if_none_match: str = Header(None),
+    service: UserService = Depends(get_user_service)
+):
+    result = await service.get_profile(id, if_none_match)
+    if not result["success"]:
+        raise HTTPException(status_code=404, detail=result["error"])
+
+    # no-cache: clients may keep the profile but must revalidate it with If-None-Match.
+    headers = {"ETag": result["etag"], "Cache-Control": "private, no-cache"}
+    if result.get("notModified"):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return result
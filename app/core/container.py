@@ -9,20 +9,22 @@ from app.services.features.user_service import UserService
 from app.services.features.food_service import FoodService
 from app.services.features.tracking_service import TrackingService
 from app.services.features.notification_service import NotificationService
-from app.repositories.user_repository import UserRepository
-from app.repositories.food_repository import FoodRepository
-from app.repositories.notification_repository import NotificationRepository
-from app.repositories.tracking_repository import TrackingRepository
+from app.repositories.provider import (
+    get_user_repository,
+    get_food_repository,
+    get_tracking_repository,
+    get_notification_repository,
+)
 
 class Container:
     _instance = None
 
     def __init__(self):
         # Repositories
-        self.user_repository = UserRepository()
-        self.food_repository = FoodRepository()
-        self.tracking_repository = TrackingRepository()
-        self.notification_repository = NotificationRepository()
+        self.user_repository = get_user_repository()
+        self.food_repository = get_food_repository()
+        self.tracking_repository = get_tracking_repository()
+        self.notification_repository = get_notification_repository()
 
         self.llm_service = LLMService()
         self.retrieval_service = RetrievalService(self.llm_service)
@@ -1,11 +1,19 @@
 import psycopg2
+from psycopg2 import extensions
 from psycopg2.extras import RealDictCursor
 from app.core.config import settings
+from app.core.query_stats import query_stats
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from functools import lru_cache, partial
+import itertools
+import threading
+import time
 import logging
 
 logger = logging.getLogger(__name__)
 
-def get_connection():
+def _connect():
     try:
         conn = psycopg2.connect(
             host=settings.DB_HOST,
@@ -18,3 +26,674 @@ def get_connection():
     except Exception as e:
         logger.error(f"❌ Database connection failed: {e}")
         raise e
+
+def _connect_replica(dsn: str):
+    return psycopg2.connect(dsn, connect_timeout=max(1, int(settings.DB_REPLICA_TIMEOUT)))
+
+class _Scan:
+    """
+    Statement of a server-side cursor: its DECLARE and every fetch add up here, and the total goes to
+    query_stats as one call when the cursor closes, since the scan itself runs while rows are fetched.
+    """
+    __slots__ = ("query", "params", "elapsed", "rows", "error")
+
+    def __init__(self, query, params):
+        self.query = query
+        self.params = params
+        self.elapsed = 0.0
+        self.rows = 0
+        self.error = None
+
+    def add(self, started: float, result=None, error: Exception = None):
+        self.elapsed += time.perf_counter() - started
+        if isinstance(result, list):
+            self.rows += len(result)
+        elif result is not None:
+            self.rows += 1
+        if error is not None:
+            self.error = error
+
+    def record(self):
+        query_stats.record(self.query, self.elapsed, self.rows, self.params, self.error)
+
+class TimedCursor(extensions.cursor):
+    """
+    psycopg2 cursor that records the wall time and row count of every statement in query_stats. On a named
+    (server-side) cursor the statement is recorded when the cursor closes, with the time spent fetching.
+    """
+    _scan = None
+
+    def execute(self, query, vars=None):
+        if self.name is not None:
+            self._close_scan()
+            self._scan = _Scan(query, vars)
+            return self._scan_call(super().execute, query, vars)
+        started = time.perf_counter()
+        error = None
+        try:
+            return super().execute(query, vars)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            query_stats.record(query, time.perf_counter() - started, self.rowcount, vars, error)
+
+    def executemany(self, query, vars_list):
+        started = time.perf_counter()
+        error = None
+        try:
+            return super().executemany(query, vars_list)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            query_stats.record(query, time.perf_counter() - started, self.rowcount, None, error)
+
+    def copy_expert(self, sql, file, size=8192):
+        started = time.perf_counter()
+        error = None
+        try:
+            return super().copy_expert(sql, file, size)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            query_stats.record(sql, time.perf_counter() - started, self.rowcount, None, error)
+
+    def fetchone(self):
+        return self._scan_call(super().fetchone)
+
+    def fetchmany(self, *args, **kwargs):
+        return self._scan_call(super().fetchmany, *args, **kwargs)
+
+    def fetchall(self):
+        return self._scan_call(super().fetchall)
+
+    def __iter__(self):
+        if self._scan is None:
+            return super().__iter__()
+        return self._iter_scan()
+
+    def close(self):
+        try:
+            super().close()
+        finally:
+            self._close_scan()
+
+    def _iter_scan(self):
+        rows = super().__iter__()
+        while True:
+            row = self._scan_call(next, rows, None)
+            if row is None:
+                return
+            yield row
+
+    def _scan_call(self, call, *args, **kwargs):
+        scan = self._scan
+        if scan is None:
+            return call(*args, **kwargs)
+        started = time.perf_counter()
+        try:
+            result = call(*args, **kwargs)
+        except Exception as e:
+            scan.add(started, error=e)
+            raise
+        scan.add(started, result)
+        return result
+
+    def _close_scan(self):
+        scan, self._scan = self._scan, None
+        if scan is not None:
+            scan.record()
+
+# Cursor class used by the repositories: conn.cursor(cursor_factory=CURSOR_FACTORY).
+CURSOR_FACTORY = TimedCursor if settings.DB_QUERY_STATS else None
+
+class PoolTimeout(Exception):
+    pass
+
+class ConnectionPool:
+    """
+    Process-wide pool of psycopg2 connections.
+    Connections are validated on checkout and recycled once they have been idle too long.
+    """
+
+    def __init__(self, connect, min_size: int, max_size: int, timeout: float,
+                 max_idle: float, health_check_after: float):
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max(max_size, 1)
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.health_check_after = health_check_after
+
+        self._cond = threading.Condition()
+        self._idle = []  # list of (conn, released_at)
+        self._in_use = set()
+        self._opening = 0
+
+        self._stats = {
+            "checkouts": 0,
+            "waits": 0,
+            "wait_time_total": 0.0,
+            "wait_time_max": 0.0,
+            "timeouts": 0,
+            "connections_opened": 0,
+            "connections_closed": 0,
+            "health_check_failures": 0,
+        }
+
+    def open(self):
+        for _ in range(self.min_size):
+            conn = self._connect()
+            with self._cond:
+                self._stats["connections_opened"] += 1
+                self._idle.append((conn, time.monotonic()))
+
+    def getconn(self):
+        started = time.monotonic()
+        deadline = started + self.timeout
+        waited = False
+
+        while True:
+            conn = None
+            released_at = None
+            with self._cond:
+                while True:
+                    if self._idle:
+                        conn, released_at = self._idle.pop()
+                        break
+                    if len(self._in_use) + self._opening < self.max_size:
+                        self._opening += 1
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats["timeouts"] += 1
+                        raise PoolTimeout(
+                            f"Timed out after {self.timeout}s waiting for a database connection"
+                        )
+                    waited = True
+                    self._cond.wait(remaining)
+
+            if conn is None:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._cond:
+                        self._opening -= 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self._opening -= 1
+                    self._stats["connections_opened"] += 1
+            elif not self._is_usable(conn, released_at):
+                self._discard(conn)
+                continue
+
+            with self._cond:
+                self._in_use.add(conn)
+                wait_time = time.monotonic() - started
+                self._stats["checkouts"] += 1
+                if waited:
+                    self._stats["waits"] += 1
+                self._stats["wait_time_total"] += wait_time
+                self._stats["wait_time_max"] = max(self._stats["wait_time_max"], wait_time)
+            return conn
+
+    def putconn(self, conn):
+        with self._cond:
+            self._in_use.discard(conn)
+
+        if conn.closed:
+            self._discard(conn)
+            return
+
+        try:
+            if conn.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+        except Exception:
+            self._discard(conn)
+            return
+
+        with self._cond:
+            self._idle.append((conn, time.monotonic()))
+            self._trim_idle()
+            self._cond.notify()
+
+    def _is_usable(self, conn, released_at: float) -> bool:
+        if conn.closed:
+            return False
+
+        idle_for = time.monotonic() - released_at
+        if self.max_idle and idle_for > self.max_idle:
+            return False
+
+        if idle_for > self.health_check_after:
+            try:
+                with conn.cursor() as cur:
+                    cur.execute("SELECT 1;")
+                conn.rollback()
+            except Exception as e:
+                logger.warning(f"Discarding broken pooled connection: {e}")
+                with self._cond:
+                    self._stats["health_check_failures"] += 1
+                return False
+        return True
+
+    def _trim_idle(self):
+        # Called with the lock held: recycle connections idle past max_idle, keeping min_size warm.
+        if not self.max_idle:
+            return
+        now = time.monotonic()
+        keep = []
+        expired = []
+        for conn, released_at in self._idle:
+            if now - released_at > self.max_idle and len(keep) + len(self._in_use) >= self.min_size:
+                expired.append(conn)
+            else:
+                keep.append((conn, released_at))
+        self._idle = keep
+        for conn in expired:
+            self._close(conn)
+
+    def _discard(self, conn):
+        with self._cond:
+            self._close(conn)
+            self._cond.notify()
+
+    def _close(self, conn):
+        self._stats["connections_closed"] += 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def close(self):
+        with self._cond:
+            for conn, _ in self._idle:
+                self._close(conn)
+            self._idle = []
+
+    def stats(self) -> dict:
+        with self._cond:
+            checkouts = self._stats["checkouts"]
+            return {
+                **self._stats,
+                "wait_time_avg": self._stats["wait_time_total"] / checkouts if checkouts else 0.0,
+                "in_use": len(self._in_use),
+                "idle": len(self._idle),
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+            }
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool() -> ConnectionPool:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                pool = ConnectionPool(
+                    _connect,
+                    min_size=settings.DB_POOL_MIN_SIZE,
+                    max_size=settings.DB_POOL_MAX_SIZE,
+                    timeout=settings.DB_POOL_TIMEOUT,
+                    max_idle=settings.DB_POOL_MAX_IDLE,
+                    health_check_after=settings.DB_POOL_HEALTH_CHECK_AFTER,
+                )
+                pool.open()
+                _pool = pool
+    return _pool
+
+def get_connection():
+    """Check a connection out of the process-wide pool. Return it with release_connection()."""
+    return get_pool().getconn()
+
+def release_connection(conn):
+    get_pool().putconn(conn)
+
+def get_pool_stats() -> dict:
+    if _pool is None:
+        return {}
+    return _pool.stats()
+
+class ReplicaSet:
+    """
+    Round-robin order over the configured read replicas. A replica that fails is skipped
+    for retry_after seconds, then tried again; shared by the sync and async pools.
+    """
+
+    def __init__(self, size: int, retry_after: float):
+        self.size = size
+        self.retry_after = retry_after
+        self._next = itertools.count()
+        self._down_until = [0.0] * size
+        self._failures = [0] * size
+
+    def candidates(self) -> list[int]:
+        start = next(self._next)
+        now = time.monotonic()
+        order = [(start + i) % self.size for i in range(self.size)]
+        return [i for i in order if self._down_until[i] <= now]
+
+    def mark_down(self, index: int, error: Exception):
+        logger.warning(f"Read replica #{index} unavailable for {self.retry_after}s: {error}")
+        self._down_until[index] = time.monotonic() + self.retry_after
+        self._failures[index] += 1
+
+    def stats(self) -> list[dict]:
+        now = time.monotonic()
+        return [
+            {"replica": i, "up": self._down_until[i] <= now, "failures": self._failures[i]}
+            for i in range(self.size)
+        ]
+
+_replicas = ReplicaSet(len(settings.DB_REPLICA_DSNS), settings.DB_REPLICA_RETRY_AFTER)
+
+# Read-your-writes: a per-request scope object, mutated in place so that writes made in
+# worker threads (asyncio.to_thread copies the context) are seen by the request's later reads.
+class _ReadScope:
+    __slots__ = ("pinned",)
+
+    def __init__(self, pinned: bool = False):
+        self.pinned = pinned
+
+_read_scope: ContextVar = ContextVar("db_read_scope", default=None)
+
+@contextmanager
+def read_your_writes(pinned: bool = False):
+    """Inside this scope, reads go to the primary once a write happened (or from the start when pinned)."""
+    token = _read_scope.set(_ReadScope(pinned))
+    try:
+        yield
+    finally:
+        _read_scope.reset(token)
+
+def mark_primary_write():
+    scope = _read_scope.get()
+    if scope is not None:
+        scope.pinned = True
+
+def reads_pinned_to_primary() -> bool:
+    scope = _read_scope.get()
+    return scope is not None and scope.pinned
+
+_replica_pools = None
+
+def get_replica_pools() -> list[ConnectionPool]:
+    """One lazily connecting pool per replica: a replica that is down at startup doesn't block the app."""
+    global _replica_pools
+    if _replica_pools is None:
+        with _pool_lock:
+            if _replica_pools is None:
+                _replica_pools = [
+                    ConnectionPool(
+                        partial(_connect_replica, dsn),
+                        min_size=settings.DB_POOL_MIN_SIZE,
+                        max_size=settings.DB_POOL_MAX_SIZE,
+                        timeout=settings.DB_REPLICA_TIMEOUT,
+                        max_idle=settings.DB_POOL_MAX_IDLE,
+                        health_check_after=settings.DB_POOL_HEALTH_CHECK_AFTER,
+                    )
+                    for dsn in settings.DB_REPLICA_DSNS
+                ]
+    return _replica_pools
+
+@contextmanager
+def read_connection():
+    """
+    Connection for read-only work: the next healthy replica in round-robin order, or the
+    primary when no replica is configured or usable, or when the request already wrote.
+    """
+    pool, index, conn = None, None, None
+    if _replicas.size and not reads_pinned_to_primary():
+        pools = get_replica_pools()
+        for i in _replicas.candidates():
+            try:
+                conn = pools[i].getconn()
+            except PoolTimeout:
+                continue  # saturated, not broken
+            except Exception as e:
+                _replicas.mark_down(i, e)
+                continue
+            pool, index = pools[i], i
+            break
+
+    if conn is None:
+        pool = get_pool()
+        conn = pool.getconn()
+    try:
+        yield conn
+    except psycopg2.OperationalError as e:
+        if index is not None:
+            _replicas.mark_down(index, e)
+        raise
+    finally:
+        pool.putconn(conn)
+
+def get_replica_stats() -> list[dict]:
+    stats = _replicas.stats()
+    if _replica_pools is not None:
+        for entry, pool in zip(stats, _replica_pools):
+            entry["pool"] = pool.stats()
+    return stats
+
+_async_pool = None
+_async_pool_lock = None
+
+@lru_cache(maxsize=None)
+def _timed_async_cursors():
+    """
+    psycopg 3 client and server-side cursor classes that record every statement in query_stats; server-side
+    statements are recorded on close, with the time spent fetching.
+    """
+    from psycopg import AsyncCursor, AsyncServerCursor
+
+    def timed(base):
+        class Timed(base):
+            async def execute(self, query, params=None, **kwargs):
+                started = time.perf_counter()
+                error = None
+                try:
+                    return await super().execute(query, params, **kwargs)
+                except Exception as e:
+                    error = e
+                    raise
+                finally:
+                    query_stats.record(query, time.perf_counter() - started, self.rowcount, params, error)
+
+        Timed.__name__ = f"Timed{base.__name__}"
+        return Timed
+
+    class TimedAsyncServerCursor(AsyncServerCursor):
+        """Records its statement when it closes, with the time spent fetching (see _Scan)."""
+        _scan = None
+
+        async def execute(self, query, params=None, **kwargs):
+            self._close_scan()
+            self._scan = _Scan(query, params)
+            return await self._scan_call(super().execute(query, params, **kwargs))
+
+        async def fetchone(self):
+            return await self._scan_call(super().fetchone())
+
+        async def fetchmany(self, *args, **kwargs):
+            return await self._scan_call(super().fetchmany(*args, **kwargs))
+
+        async def fetchall(self):
+            return await self._scan_call(super().fetchall())
+
+        async def __aiter__(self):
+            rows = super().__aiter__()
+            while True:
+                row = await self._scan_call(anext(rows, None))
+                if row is None:
+                    return
+                yield row
+
+        async def close(self):
+            try:
+                await super().close()
+            finally:
+                self._close_scan()
+
+        async def _scan_call(self, awaitable):
+            scan = self._scan
+            if scan is None:
+                return await awaitable
+            started = time.perf_counter()
+            try:
+                result = await awaitable
+            except Exception as e:
+                scan.add(started, error=e)
+                raise
+            scan.add(started, result)
+            return result
+
+        def _close_scan(self):
+            scan, self._scan = self._scan, None
+            if scan is not None:
+                scan.record()
+
+    return timed(AsyncCursor), TimedAsyncServerCursor
+
+async def _configure_async_connection(conn):
+    if settings.DB_QUERY_STATS:
+        conn.cursor_factory, conn.server_cursor_factory = _timed_async_cursors()
+
+def _async_conninfo() -> str:
+    return (
+        f"host={settings.DB_HOST} dbname={settings.DB_NAME} user={settings.DB_USER} "
+        f"password={settings.DB_PASS} port={settings.DB_PORT}"
+    )
+
+async def get_async_pool():
+    """Process-wide psycopg 3 pool used by the async repositories, opened on first use."""
+    global _async_pool, _async_pool_lock
+    if _async_pool is not None:
+        return _async_pool
+
+    import asyncio
+    from psycopg_pool import AsyncConnectionPool
+
+    if _async_pool_lock is None:
+        _async_pool_lock = asyncio.Lock()
+    async with _async_pool_lock:
+        if _async_pool is None:
+            pool = AsyncConnectionPool(
+                _async_conninfo(),
+                min_size=settings.DB_POOL_MIN_SIZE,
+                max_size=settings.DB_POOL_MAX_SIZE,
+                timeout=settings.DB_POOL_TIMEOUT,
+                max_idle=settings.DB_POOL_MAX_IDLE,
+                check=AsyncConnectionPool.check_connection,
+                configure=_configure_async_connection,
+                open=False,
+            )
+            try:
+                await pool.open(wait=True, timeout=settings.DB_POOL_TIMEOUT)
+            except Exception as e:
+                logger.error(f"❌ Async database pool failed to open: {e}")
+                raise e
+            _async_pool = pool
+    return _async_pool
+
+async def connect_async_listener():
+    """
+    Dedicated autocommit connection to the primary for LISTEN: it stays idle waiting for notifications,
+    so it is kept out of the pool, and NOTIFY is only delivered by the primary.
+    """
+    import psycopg
+
+    return await psycopg.AsyncConnection.connect(
+        _async_conninfo(), autocommit=True, connect_timeout=max(1, int(settings.DB_POOL_TIMEOUT))
+    )
+
+_async_replica_pools = None
+_async_replica_lock = None
+
+async def get_async_replica_pools() -> list:
+    """psycopg 3 pools for the replicas; opened without waiting, so a replica that is down doesn't block."""
+    global _async_replica_pools, _async_replica_lock
+    if _async_replica_pools is not None:
+        return _async_replica_pools
+
+    import asyncio
+    from psycopg_pool import AsyncConnectionPool
+
+    if _async_replica_lock is None:
+        _async_replica_lock = asyncio.Lock()
+    async with _async_replica_lock:
+        if _async_replica_pools is None:
+            pools = []
+            for dsn in settings.DB_REPLICA_DSNS:
+                pool = AsyncConnectionPool(
+                    dsn,
+                    min_size=settings.DB_POOL_MIN_SIZE,
+                    max_size=settings.DB_POOL_MAX_SIZE,
+                    timeout=settings.DB_REPLICA_TIMEOUT,
+                    max_idle=settings.DB_POOL_MAX_IDLE,
+                    check=AsyncConnectionPool.check_connection,
+                    configure=_configure_async_connection,
+                    open=False,
+                )
+                await pool.open(wait=False)
+                pools.append(pool)
+            _async_replica_pools = pools
+    return _async_replica_pools
+
+@asynccontextmanager
+async def async_read_connection():
+    """Async counterpart of read_connection(); the transaction is committed on exit like pool.connection()."""
+    import psycopg
+    from psycopg_pool import PoolTimeout as AsyncPoolTimeout
+
+    pool, index, conn = None, None, None
+    if _replicas.size and not reads_pinned_to_primary():
+        pools = await get_async_replica_pools()
+        for i in _replicas.candidates():
+            try:
+                conn = await pools[i].getconn()
+            except AsyncPoolTimeout as e:
+                # The pool reconnects in the background: no connection at all means the replica is down.
+                if not pools[i].get_stats().get("pool_size"):
+                    _replicas.mark_down(i, e)
+                continue
+            except Exception as e:
+                _replicas.mark_down(i, e)
+                continue
+            pool, index = pools[i], i
+            break
+
+    if conn is None:
+        primary = await get_async_pool()
+        async with primary.connection() as conn:
+            yield conn
+        return
+
+    try:
+        # Not `async with conn`: leaving a psycopg 3 connection's own context closes it, and the pool would
+        # get back a dead connection. The transaction block commits (or rolls back) and keeps it open.
+        async with conn.transaction():
+            yield conn
+    except psycopg.OperationalError as e:
+        _replicas.mark_down(index, e)
+        raise
+    finally:
+        await pool.putconn(conn)
+
+async def close_async_pool():
+    global _async_pool, _async_replica_pools
+    if _async_pool is not None:
+        await _async_pool.close()
+        _async_pool = None
+    if _async_replica_pools is not None:
+        for pool in _async_replica_pools:
+            await pool.close()
+        _async_replica_pools = None
+
+def get_async_pool_stats() -> dict:
+    if _async_pool is None:
+        return {}
+    return _async_pool.get_stats()
@@ -1,13 +1,20 @@
 import firebase_admin
-from firebase_admin import credentials, messaging
+from firebase_admin import credentials, messaging, exceptions
+from collections import deque
 import logging
 import os
+import threading
+import time
+from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
 # Hardcoded admin token from logic.py
 ADMIN_TOKEN = "eUTg2c9UR5uoWyy6GgZt-P:APA91bHr1pCZmvtSm1Nahw6tHPm-2LA5foMGCuu-heYUrx8Dl4PpEE4GtmV60pN0GtHtbLCLcOr13Vpa5dVU9sPOEdI0zIUIU45k8nSniFTFoIFQNAc5QPc"
 
+# FCM accepts at most 500 tokens per multicast and 500 messages per send_each call.
+MULTICAST_LIMIT = 500
+
 try:
     # Attempt to initialize Firebase
     # Check if app is already initialized to avoid error
@@ -24,3 +31,90 @@ except Exception as e:
 
 def get_messaging():
     return messaging
+
+class PushResult:
+    """Outcome of one push: retryable failures are sent again later, the others are final."""
+    __slots__ = ("ok", "error", "retryable")
+
+    def __init__(self, ok: bool, error: str = None, retryable: bool = False):
+        self.ok = ok
+        self.error = error
+        self.retryable = retryable
+
+class FirebaseTransport:
+    """
+    Push transport backed by Firebase Cloud Messaging. Calls are blocking; the dispatcher runs them in a
+    worker thread. Both methods return one PushResult per token / message, in order.
+    """
+    name = "firebase"
+
+    # Rejections that a retry cannot fix: the token is gone, belongs to another project or is malformed.
+    PERMANENT_ERRORS = (messaging.UnregisteredError, messaging.SenderIdMismatchError, exceptions.InvalidArgumentError)
+
+    def send_multicast(self, tokens: list[str], title: str, body: str) -> list[PushResult]:
+        """Same title and body to many tokens."""
+        message = messaging.MulticastMessage(
+            notification=messaging.Notification(title=title, body=body),
+            tokens=tokens,
+        )
+        return self._results(messaging.send_each_for_multicast(message))
+
+    def send_each(self, messages: list[tuple[str, str, str]]) -> list[PushResult]:
+        """Distinct (token, title, body) messages in one batch."""
+        batch = [
+            messaging.Message(notification=messaging.Notification(title=title, body=body), token=token)
+            for token, title, body in messages
+        ]
+        return self._results(messaging.send_each(batch))
+
+    def _results(self, batch_response) -> list[PushResult]:
+        results = []
+        for response in batch_response.responses:
+            if response.success:
+                results.append(PushResult(True))
+            else:
+                error = response.exception
+                results.append(PushResult(False, str(error), not isinstance(error, self.PERMANENT_ERRORS)))
+        return results
+
+class FakeTransport:
+    """
+    In-process transport for tests and benchmarks: records what would have been sent instead of calling
+    Firebase. latency (seconds) is slept once per call; tokens in fail_tokens are rejected permanently,
+    those in retry_tokens with a retryable error.
+    """
+    name = "fake"
+
+    def __init__(self, latency: float = 0.0, fail_tokens=(), retry_tokens=(), keep: int = 10000):
+        self.latency = latency
+        self.fail_tokens = set(fail_tokens)
+        self.retry_tokens = set(retry_tokens)
+        self.sent = deque(maxlen=keep)  # (token, title, body) accepted, most recent last
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def send_multicast(self, tokens: list[str], title: str, body: str) -> list[PushResult]:
+        return self.send_each([(token, title, body) for token in tokens])
+
+    def send_each(self, messages: list[tuple[str, str, str]]) -> list[PushResult]:
+        if self.latency:
+            time.sleep(self.latency)
+        results = []
+        with self._lock:
+            self.calls += 1
+            for message in messages:
+                token = message[0]
+                if token in self.fail_tokens:
+                    results.append(PushResult(False, "Unregistered token", False))
+                elif token in self.retry_tokens:
+                    results.append(PushResult(False, "Service unavailable", True))
+                else:
+                    self.sent.append(message)
+                    results.append(PushResult(True))
+        return results
+
+def get_transport():
+    """Transport selected by NOTIFICATION_TRANSPORT ("firebase" or "fake")."""
+    if settings.NOTIFICATION_TRANSPORT == "fake":
+        return FakeTransport()
+    return FirebaseTransport()
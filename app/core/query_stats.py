@@ -0,0 +1,137 @@
+import bisect
+import logging
+import re
+import threading
+from functools import lru_cache
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+slow_query_logger = logging.getLogger("app.slow_query")
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended.
+BUCKETS_MS = [0.5, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+
+_COMMENT = re.compile(r"--[^\n]*|/\*.*?\*/", re.S)
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|\$\d+")
+_NUMBER = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?![\w.])")
+_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_ROWS = re.compile(r"\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+")
+_SPACE = re.compile(r"\s+")
+
+@lru_cache(maxsize=2048)
+def fingerprint(sql: str) -> str:
+    """
+    Normalized statement: comments and whitespace collapsed, literals and placeholders replaced
+    by ?, and lists such as IN (?, ?, ?) or multi-row VALUES folded, so one query shape gives one key.
+    """
+    text = _COMMENT.sub(" ", sql)
+    text = _STRING.sub("?", text)
+    text = _PLACEHOLDER.sub("?", text)
+    text = _NUMBER.sub("?", text)
+    text = _LIST.sub("(...)", text)
+    text = _ROWS.sub("(...)", text)
+    return _SPACE.sub(" ", text).strip().rstrip(";").strip()
+
+def param_shape(params) -> object:
+    """Types and sizes of the bound parameters, never their values (they may hold personal data)."""
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return {key: param_shape(value) for key, value in params.items()}
+    if isinstance(params, (list, tuple)):
+        if params and not isinstance(params[0], (list, tuple, dict)) and len(params) > 8:
+            return f"{type(params).__name__}[{type(params[0]).__name__}]({len(params)})"
+        return [param_shape(value) for value in params]
+    if isinstance(params, (str, bytes)):
+        return f"{type(params).__name__}({len(params)})"
+    return type(params).__name__
+
+class _Entry:
+    __slots__ = ("count", "errors", "rows", "total_ms", "max_ms", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.rows = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+
+class QueryStats:
+    """
+    Per-fingerprint call count, row count, latency total/max and histogram for every statement run
+    through a repository cursor. Statements slower than slow_ms are also written to the slow-query log.
+    """
+
+    def __init__(self, slow_ms: float):
+        self.slow_ms = slow_ms
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def record(self, sql, elapsed: float, rowcount: int, params=None, error: Exception = None):
+        key = fingerprint(sql if isinstance(sql, str) else str(sql))
+        elapsed_ms = elapsed * 1000
+        bucket = bisect.bisect_left(BUCKETS_MS, elapsed_ms)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = _Entry()
+            entry.count += 1
+            entry.total_ms += elapsed_ms
+            if elapsed_ms > entry.max_ms:
+                entry.max_ms = elapsed_ms
+            entry.buckets[bucket] += 1
+            if error is not None:
+                entry.errors += 1
+            elif rowcount and rowcount > 0:
+                entry.rows += rowcount
+
+        if elapsed_ms >= self.slow_ms:
+            slow_query_logger.warning(
+                f"Slow query {elapsed_ms:.1f}ms rows={rowcount} params={param_shape(params)} "
+                f"error={type(error).__name__ if error else None}: {key}"
+            )
+
+    def snapshot(self) -> list[dict]:
+        with self._lock:
+            items = [(key, entry, list(entry.buckets)) for key, entry in self._entries.items()]
+        result = []
+        for key, entry, buckets in items:
+            result.append({
+                "fingerprint": key,
+                "count": entry.count,
+                "errors": entry.errors,
+                "rows": entry.rows,
+                "totalMs": round(entry.total_ms, 3),
+                "avgMs": round(entry.total_ms / entry.count, 3) if entry.count else 0.0,
+                "maxMs": round(entry.max_ms, 3),
+                "p50Ms": _percentile(buckets, 0.50),
+                "p95Ms": _percentile(buckets, 0.95),
+                "p99Ms": _percentile(buckets, 0.99),
+                "histogram": {
+                    (f"le_{bound}" if i < len(BUCKETS_MS) else "inf"): n
+                    for i, (bound, n) in enumerate(zip(BUCKETS_MS + [None], buckets))
+                },
+            })
+        result.sort(key=lambda item: item["totalMs"], reverse=True)
+        return result
+
+    def reset(self):
+        with self._lock:
+            self._entries = {}
+
+def _percentile(buckets: list[int], q: float):
+    """Upper bound of the bucket holding the q-th quantile (None when it falls in the open-ended bucket)."""
+    total = sum(buckets)
+    if not total:
+        return None
+    threshold = q * total
+    seen = 0
+    for i, n in enumerate(buckets):
+        seen += n
+        if seen >= threshold:
+            return BUCKETS_MS[i] if i < len(BUCKETS_MS) else None
+    return None
+
+query_stats = QueryStats(settings.DB_SLOW_QUERY_MS)
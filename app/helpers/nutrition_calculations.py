@@ -1,198 +1,38 @@
 from datetime import date, datetime
 from app.schema.be_models import UserInfoRequest
-from app.core.database import get_connection
-
-def calculate_dish_hashtags(dish_id: int) -> list[int]:
-    conn = None
-    hashtags = []
-    try:
-        conn = get_connection()
-        cur = conn.cursor()
-
-        query = """
-            SELECT 
-                SUM(i.kcal * iid.weight / 100) / SUM(iid.weight) * 100 AS kcal,
-                SUM(i.carbs * iid.weight / 100) / SUM(iid.weight) * 100 AS carbs,
-                SUM(i.sugar * iid.weight / 100) / SUM(iid.weight) * 100 AS sugar,
-                SUM(i.fiber * iid.weight / 100) / SUM(iid.weight) * 100 AS fiber,
-                SUM(i.protein * iid.weight / 100) / SUM(iid.weight) * 100 AS protein,
-                SUM(i.saturatedFat * iid.weight / 100) / SUM(iid.weight) * 100 AS saturatedFat,
-                SUM(i.monounSaturatedFat * iid.weight / 100) / SUM(iid.weight) * 100 AS monounSaturatedFat,
-                SUM(i.polyunSaturatedFat * iid.weight / 100) / SUM(iid.weight) * 100 AS polyunSaturatedFat,
-                SUM(i.transFat * iid.weight / 100) / SUM(iid.weight) * 100 AS transFat,
-                SUM(i.cholesterol * iid.weight / 100) / SUM(iid.weight) * 100 AS cholesterol,
-                SUM(i.vitaminA * iid.weight / 100) / SUM(iid.weight) * 100 AS vitaminA,
-                SUM(i.vitaminC * iid.weight / 100) / SUM(iid.weight) * 100 AS vitaminC,
-                SUM(i.vitaminD * iid.weight / 100) / SUM(iid.weight) * 100 AS vitaminD,
-                SUM(i.vitaminB6 * iid.weight / 100) / SUM(iid.weight) * 100 AS vitaminB6,
-                SUM(i.vitaminB12 * iid.weight / 100) / SUM(iid.weight) * 100 AS vitaminB12,
-                SUM(i.vitaminE * iid.weight / 100) / SUM(iid.weight) * 100 AS vitaminE,
-                SUM(i.vitaminK * iid.weight / 100) / SUM(iid.weight) * 100 AS vitaminK,
-                SUM(i.choline * iid.weight / 100) / SUM(iid.weight) * 100 AS choline,
-                SUM(i.canxi * iid.weight / 100) / SUM(iid.weight) * 100 AS canxi,
-                SUM(i.fe * iid.weight / 100) / SUM(iid.weight) * 100 AS fe,
-                SUM(i.magie * iid.weight / 100) / SUM(iid.weight) * 100 AS magie,
-                SUM(i.photpho * iid.weight / 100) / SUM(iid.weight) * 100 AS photpho,
-                SUM(i.kali * iid.weight / 100) / SUM(iid.weight) * 100 AS kali,
-                SUM(i.natri * iid.weight / 100) / SUM(iid.weight) * 100 AS natri,
-                SUM(i.zn * iid.weight / 100) / SUM(iid.weight) * 100 AS zn,
-                SUM(i.caffeine * iid.weight / 100) / SUM(iid.weight) * 100 AS caffeine,
-                SUM(i.alcohol * iid.weight / 100) / SUM(iid.weight) * 100 AS alcohol
-            FROM Dish d
-            JOIN IngredientInDish iid ON d.id = iid.Dishid
-            JOIN Ingredient i ON iid.Ingredientid = i.id
-            WHERE d.id = %s
-            GROUP BY d.id;
-        """
-
-        cur.execute(query, (dish_id,))
-        result = cur.fetchone()
-
-        if result:
-            kcal, carbs, sugar, fiber, protein, saturatedFat, monounSaturatedFat, polyunSaturatedFat, \
-            transFat, cholesterol, vitaminA, vitaminC, vitaminD, vitaminB6, vitaminB12, \
-            vitaminE, vitaminK, choline, canxi, fe, magie, photpho, kali, natri, zn, caffeine, alcohol = result
-
-            if kcal >= 400:
-                hashtags.append(15)
-            elif kcal <= 100:
-                hashtags.append(16)
-                        
-            if carbs >= 14:
-                hashtags.append(19)
-            elif carbs <= 55:
-                hashtags.append(20)
-                         
-            if sugar >= 10:
-                hashtags.append(21)
-            elif sugar <= 2.5:
-                hashtags.append(22)
-            
-            if fiber >= 5.5:
-                hashtags.append(23)
-            elif fiber <= 1.5:
-                hashtags.append(24)  
-
-            if protein >= 10:
-                hashtags.append(17)
-            elif protein <= 2.5:
-                hashtags.append(18) 
-
-            if saturatedFat >= 5:
-                hashtags.append(25)
-            elif saturatedFat <= 1:
-                hashtags.append(26)   
-
-            if monounSaturatedFat >= 10:
-                hashtags.append(27)
-            elif monounSaturatedFat <= 4:
-                hashtags.append(28)      
-
-            if polyunSaturatedFat >= 10:
-                hashtags.append(29)
-            elif polyunSaturatedFat <= 3:
-                hashtags.append(30)  
-
-            if transFat >= 1:
-                hashtags.append(31)
-            elif transFat <= 0.5:
-                hashtags.append(32)      
-
-            if cholesterol >= 10:
-                hashtags.append(33)
-            elif cholesterol <= 2.5:
-                hashtags.append(34) 
-
-            if vitaminA >= 60:
-                hashtags.append(35)
-            elif vitaminA <= 15:
-                hashtags.append(36) 
-
-            if vitaminC >= 18:
-                hashtags.append(39)
-            elif vitaminC <= 4.5:
-                hashtags.append(40)         
-
-            if vitaminD >= 4:
-                hashtags.append(37)
-            elif vitaminD <= 1:
-                hashtags.append(38)  
-
-            if vitaminB6 >= 0.34:
-                hashtags.append(41)
-            elif vitaminB6 <= 0.085:
-                hashtags.append(42)
-
-            if vitaminB12 >= 0.5:
-                hashtags.append(43)
-            elif vitaminB12 <= 0.12:
-                hashtags.append(44)   
-
-            if vitaminE >= 3:
-                hashtags.append(45)
-            elif vitaminE <= 0.75:
-                hashtags.append(46)
-
-            if vitaminK >= 24:
-                hashtags.append(47)
-            elif vitaminK <= 6:
-                hashtags.append(48)
-
-            if choline >= 110:
-                hashtags.append(49)
-            elif choline <= 27:
-                hashtags.append(50)
-
-            if canxi >= 260:
-                hashtags.append(51)
-            elif canxi <= 65:
-                hashtags.append(52)
-
-            if fe >= 3.6:
-                hashtags.append(53)
-            elif fe <= 0.9:
-                hashtags.append(54)
-
-            if magie >= 84:
-                hashtags.append(55)
-            elif magie <= 21:
-                hashtags.append(56)
-
-            if photpho >= 250:
-                hashtags.append(57)
-            elif photpho <= 62:
-                hashtags.append(58)
-            
-            if kali >= 940:
-                hashtags.append(59)
-            elif kali <= 235:
-                hashtags.append(60)
-
-            if natri >= 460:
-                hashtags.append(61)
-            elif natri <= 115:
-                hashtags.append(62)
-
-            if zn >= 2.2:
-                hashtags.append(63)
-            elif zn <= 0.55:
-                hashtags.append(64)
-            
-            if caffeine >= 100:
-                hashtags.append(65)
-            elif caffeine <= 20:
-                hashtags.append(66)
-
-            if alcohol >= 2:
-                hashtags.append(67)
-            elif alcohol <= 0.1:
-                hashtags.append(68)
-            
-        return hashtags
-
-    finally:
-        if conn:
-            conn.close()
+
+# Nutrient columns shared by ingredient and dish_nutrition, with the keys used in API responses.
+NUTRIENTS = [
+    ("kcal", "kcal"),
+    ("carbs", "carbs"),
+    ("sugar", "sugar"),
+    ("fiber", "fiber"),
+    ("protein", "protein"),
+    ("saturatedfat", "saturatedFat"),
+    ("monounsaturatedfat", "monounSaturatedFat"),
+    ("polyunsaturatedfat", "polyunSaturatedFat"),
+    ("transfat", "transFat"),
+    ("cholesterol", "cholesterol"),
+    ("vitamina", "vitaminA"),
+    ("vitaminc", "vitaminC"),
+    ("vitamind", "vitaminD"),
+    ("vitaminb6", "vitaminB6"),
+    ("vitaminb12", "vitaminB12"),
+    ("vitamine", "vitaminE"),
+    ("vitamink", "vitaminK"),
+    ("choline", "choline"),
+    ("canxi", "canxi"),
+    ("fe", "fe"),
+    ("magie", "magie"),
+    ("photpho", "photpho"),
+    ("kali", "kali"),
+    ("natri", "natri"),
+    ("zn", "zn"),
+    ("water", "water"),
+    ("caffeine", "caffeine"),
+    ("alcohol", "alcohol"),
+]
+NUTRIENT_COLUMNS = [column for column, _ in NUTRIENTS]
 
 def calculate_bmr(user: UserInfoRequest) -> float:
     if user.gender == "male":
@@ -0,0 +1,26 @@
+import re
+import unicodedata
+
+# Same whitespace class as the name_search columns (migration 011), so folded keywords and names agree.
+_SPACE = re.compile(r"[\t\n\v\f\r \u00a0]+")
+
+def fold(text: str) -> str:
+    """
+    Lower-cased, diacritic-free form of Vietnamese text, so "Phở bò" and "pho bo" compare equal.
+    Tone and vowel marks are dropped after NFD decomposition; đ has no decomposition and is mapped to d.
+    """
+    if not text:
+        return ""
+    decomposed = unicodedata.normalize("NFD", text.lower().replace("đ", "d").replace("Đ", "d"))
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return _SPACE.sub(" ", stripped).strip()
+
+def trigrams(text: str) -> set[str]:
+    """pg_trgm-style trigrams of folded text: each word padded with two leading spaces and one trailing space."""
+    grams = set()
+    for word in re.split(r"[^0-9a-z]+", fold(text)):
+        if not word:
+            continue
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
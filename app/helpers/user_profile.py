@@ -1,26 +1,51 @@
 import logging
+import threading
 import requests
+from collections import OrderedDict
 from app.core.config import settings
 
 # --- Cấu hình logging ---
 logger = logging.getLogger(__name__)
 
+# --- Profile cache: user_id -> (ETag, profile), revalidated with If-None-Match on every fetch ---
+PROFILE_CACHE_SIZE = 1024
+_profile_cache = OrderedDict()
+_profile_cache_lock = threading.Lock()
+
+def fetch_user_profile(user_id: int, timeout: float = 3) -> dict:
+    """
+    userInfo merged with requiredIndex from the core service's GET /get_all_info.
+    A cached profile is revalidated with its ETag, so an unchanged profile costs a 304 with no body.
+    Raises on network or HTTP errors.
+    """
+    with _profile_cache_lock:
+        cached = _profile_cache.get(user_id)
+    headers = {"If-None-Match": cached[0]} if cached else {}
+
+    response = requests.get(f"{settings.API_BASE_URL}/get_all_info", params={"id": user_id}, headers=headers, timeout=timeout)
+    if response.status_code == 304 and cached:
+        return dict(cached[1])
+    response.raise_for_status()
+
+    result = response.json()
+    profile = {**(result.get('userInfo') or {}), **(result.get('requiredIndex') or {})}
+    etag = response.headers.get("ETag")
+    if etag:
+        with _profile_cache_lock:
+            _profile_cache[user_id] = (etag, profile)
+            _profile_cache.move_to_end(user_id)
+            if len(_profile_cache) > PROFILE_CACHE_SIZE:
+                _profile_cache.popitem(last=False)
+    return dict(profile)
+
 # --- User profile ---
 def get_user_by_id(user_id: int):
-    url = f"{settings.API_BASE_URL}/get_all_info?id={user_id}"
-
     user_profile = {'id': 1, 'fullname': 'Default User', 'age': 25, 'height': 170, 'weight': 60, 'activityLevel': 'Vừa phải', 'limitFood': 'Không có','healthStatus': 'Không có', 'diet': 'Cân bằng', 'bmr': 1500, 'tdee': 2000, 'gender': 'male',
         'userinfoid': 1, 'targetcalories': 2000, 
     }
 
     try:
-        response = requests.get(url, timeout=3)
-        response.raise_for_status()
-
-        result = response.json()
-        userInfo = result.get('userInfo', {})
-        requiredIndex = result.get('requiredIndex', {})
-        user_profile = {**userInfo, **requiredIndex}
+        user_profile = fetch_user_profile(user_id)
         
         logger.info(f"Lấy profile cho user_id={user_id} tên {user_profile.get('fullname', 'Unknown')}")
         
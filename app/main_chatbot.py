@@ -3,6 +3,7 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from app.controllers.meal_controller import router as meal_router
 from app.controllers.chatbot_controller import router as chatbot_router
+from app.controllers.embedding_metrics_controller import router as embedding_metrics_router
 from app.core.config import settings
 
 app = FastAPI(
@@ -22,6 +23,7 @@ app.add_middleware(
 # Include AI Agent Routers
 app.include_router(meal_router)
 app.include_router(chatbot_router)
+app.include_router(embedding_metrics_router)
 
 @app.get("/")
 def root():
@@ -1,11 +1,20 @@
-from fastapi import FastAPI
+import logging
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.controllers.user_controller import router as user_router
+from app.controllers.user_controller import router as user_router, profile_router
 from app.controllers.food_controller import router as food_router
 from app.controllers.tracking_controller import router as tracking_router
 from app.controllers.notification_controller import router as notification_router
+from app.controllers.metrics_controller import router as metrics_router
 from app.core.config import settings
+from app.core.database import close_async_pool, read_your_writes
+from app.repositories.provider import get_food_repository
+from app.services.features.food_service import FoodService
+from app.services.core.notification_dispatcher import notification_dispatcher
+from app.services.core.notification_hub import notification_hub
+
+logger = logging.getLogger(__name__)
 
 app = FastAPI(
     title="Meal Recommendation - Core API",
@@ -23,9 +32,41 @@ app.add_middleware(
 
 # Include Core Routers
 app.include_router(user_router)
+app.include_router(profile_router)
 app.include_router(food_router)
 app.include_router(tracking_router)
 app.include_router(notification_router)
+app.include_router(metrics_router)
+
+@app.middleware("http")
+async def read_your_writes_scope(request: Request, call_next):
+    # Reads after a write in the same request go to the primary; clients can also ask for it up front.
+    if not settings.DB_READ_YOUR_WRITES:
+        return await call_next(request)
+    with read_your_writes(pinned=request.headers.get("X-Read-Consistency") == "primary"):
+        return await call_next(request)
+
+@app.on_event("startup")
+async def startup():
+    food_service = FoodService(get_food_repository())
+    try:
+        await food_service.load_ingredient_matrix()
+    except Exception as e:
+        # Loaded lazily by the first /food/recipe/nutrition call instead.
+        logger.warning(f"Ingredient matrix not loaded at startup: {e}")
+    try:
+        await food_service.load_name_indexes()
+    except Exception as e:
+        # /food/*/similar falls back to the trigram queries in PostgreSQL.
+        logger.warning(f"Name indexes not loaded at startup: {e}")
+    if settings.NOTIFICATION_DISPATCHER:
+        notification_dispatcher.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    await notification_dispatcher.stop()
+    await notification_hub.stop()
+    await close_async_pool()
 
 @app.get("/")
 def root():
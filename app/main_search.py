@@ -3,6 +3,7 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from app.controllers.food_management_controller import router as food_management_router
 from app.controllers.food_similarity_controller import router as food_similarity_router
+from app.controllers.embedding_metrics_controller import router as embedding_metrics_router
 from app.core.config import settings
 
 app = FastAPI(
@@ -22,6 +23,7 @@ app.add_middleware(
 # Include Search/Vector Routers
 app.include_router(food_similarity_router)
 app.include_router(food_management_router)
+app.include_router(embedding_metrics_router)
 
 @app.get("/")
 def root():
@@ -0,0 +1,90 @@
+import asyncio
+import inspect
+import logging
+from contextlib import asynccontextmanager
+from app.core.database import get_async_pool, async_read_connection, mark_primary_write
+
+logger = logging.getLogger(__name__)
+
+class AsyncBaseRepository:
+    def __init__(self):
+        pass
+
+    @asynccontextmanager
+    async def get_write_cursor(self):
+        """Cursor on the primary: writes, and reads that must see them. Pins the request's later reads to the primary."""
+        mark_primary_write()
+        pool = await get_async_pool()
+        try:
+            async with pool.connection() as conn:
+                async with conn.cursor() as cur:
+                    yield cur
+        except Exception as e:
+            logger.error(f"Database error: {e}")
+            raise e
+
+    get_cursor = get_write_cursor
+
+    @asynccontextmanager
+    async def get_read_cursor(self):
+        """Cursor for read-only queries: served by a read replica when configured, else by the primary."""
+        try:
+            async with async_read_connection() as conn:
+                async with conn.cursor() as cur:
+                    yield cur
+        except Exception as e:
+            logger.error(f"Database error: {e}")
+            raise e
+
+    @asynccontextmanager
+    async def get_named_cursor(self, name: str):
+        """Server-side cursor for read-only scans: rows stay in PostgreSQL and are fetched in batches with fetchmany()"""
+        try:
+            async with async_read_connection() as conn:
+                async with conn.cursor(name=name) as cur:
+                    yield cur
+        except Exception as e:
+            logger.error(f"Database error: {e}")
+            raise e
+
+    @asynccontextmanager
+    async def get_connection(self):
+        """Use this if you need full control over the connection (e.g. manual commit/rollback)"""
+        mark_primary_write()
+        pool = await get_async_pool()
+        try:
+            async with pool.connection() as conn:
+                yield conn
+        except Exception as e:
+            logger.error(f"Connection error: {e}")
+            raise e
+
+async def run_repository(method, *args, **kwargs):
+    """
+    Call a repository method from async code.
+    Async repositories are awaited directly; sync ones run in a worker thread so they don't block the event loop.
+    """
+    if inspect.iscoroutinefunction(method):
+        return await method(*args, **kwargs)
+    return await asyncio.to_thread(method, *args, **kwargs)
+
+async def iterate_repository(method, *args, **kwargs):
+    """
+    Iterate a repository generator from async code.
+    Async generators are consumed directly; sync ones are advanced in a worker thread, one item at a time.
+    """
+    if inspect.isasyncgenfunction(method):
+        async for item in method(*args, **kwargs):
+            yield item
+        return
+
+    done = object()
+    gen = method(*args, **kwargs)
+    try:
+        while True:
+            item = await asyncio.to_thread(next, gen, done)
+            if item is done:
+                break
+            yield item
+    finally:
+        await asyncio.to_thread(gen.close)
@@ -0,0 +1,219 @@
+from app.repositories.async_base_repository import AsyncBaseRepository
+from app.schema.be_models import DishRequest, IngredientRequest, UpdateIngredientRequest
+from app.repositories.food_repository import (
+    REFRESH_DISH_NUTRITION_BY_DISH_SQL, REFRESH_DISH_NUTRITION_BY_INGREDIENT_SQL,
+    REFRESH_DISH_HASHTAGS_BY_DISH_SQL, REFRESH_DISH_HASHTAGS_BY_INGREDIENT_SQL, REFRESH_ALL_DISH_HASHTAGS_SQL,
+    DISH_DETAIL_BY_ID_SQL, DISH_DETAIL_BY_IDS_SQL, DISH_DETAIL_BY_NAME_SQL, dish_detail_from_row,
+    INGREDIENTS_SQL, INGREDIENTS_PAGE_SQL, SEARCH_INGREDIENTS_SQL, SIMILAR_INGREDIENT_NAMES_SQL, ingredient_summary_from_row,
+    DISHES_SQL, DISHES_PAGE_SQL, SEARCH_DISHES_SQL, SIMILAR_DISH_NAMES_SQL, dish_summary_from_row, name_search_params,
+    INSERT_DISH_SQL, UPDATE_DISH_SQL, dish_values, INSERT_DISH_INGREDIENT_SQL, DELETE_DISH_INGREDIENTS_SQL,
+    dish_ingredient_rows, INSERT_DISH_HASHTAG_SQL, DELETE_DISH_HASHTAGS_SQL, dish_hashtag_rows,
+    DISH_NAMES_SQL, INGREDIENT_NAMES_SQL, DISH_POPULARITY_SQL, INGREDIENT_POPULARITY_SQL,
+    DISH_AUTOCOMPLETE_SQL, INGREDIENT_AUTOCOMPLETE_SQL, autocomplete_params,
+    INGREDIENT_BY_ID_SQL, ingredient_from_row, INSERT_INGREDIENT_SQL, UPDATE_INGREDIENT_SQL, ingredient_values,
+    ingredient_nutrients_query,
+)
+from app.repositories.tracking_repository import REFRESH_DAILY_MEAL_NUTRITION_BY_DISH_SQL, REFRESH_DAILY_MEAL_NUTRITION_BY_INGREDIENT_SQL
+from app.helpers.text_folding import fold
+import logging
+
+logger = logging.getLogger(__name__)
+
+class AsyncFoodRepository(AsyncBaseRepository):
+    async def refresh_dish_hashtags(self, dish_ids: list[int] = None, cur=None) -> int:
+        """
+        Recompute auto-hashtags for dish_ids, or for the whole catalog when dish_ids is None.
+        Runs on the caller's cursor when given, so it sees dishes written in the same transaction.
+        """
+        if cur is None:
+            async with self.get_cursor() as own_cur:
+                return await self.refresh_dish_hashtags(dish_ids, own_cur)
+
+        if dish_ids is None:
+            await cur.execute(REFRESH_ALL_DISH_HASHTAGS_SQL)
+        else:
+            await cur.execute(REFRESH_DISH_HASHTAGS_BY_DISH_SQL, (list(dish_ids),))
+        return cur.rowcount
+
+    async def find_similar_ingredients_names(self, keyword: str, limit: int = 10):
+        async with self.get_read_cursor() as cur:
+            await cur.execute(SIMILAR_INGREDIENT_NAMES_SQL, name_search_params(keyword, limit=limit))
+            return [r[0] for r in await cur.fetchall()]
+
+    async def search_ingredients(self, keyword: str = None):
+        async with self.get_read_cursor() as cur:
+            if not keyword:
+                await cur.execute(INGREDIENTS_SQL)
+            else:
+                await cur.execute(SEARCH_INGREDIENTS_SQL, name_search_params(keyword))
+            return [ingredient_summary_from_row(r) for r in await cur.fetchall()]
+
+    async def search_ingredients_page(self, limit: int, after_id: int = None):
+        """Keyset page of the catalog ordered by id: rows with id > after_id."""
+        async with self.get_read_cursor() as cur:
+            await cur.execute(INGREDIENTS_PAGE_SQL, (after_id or 0, limit))
+            return [ingredient_summary_from_row(r) for r in await cur.fetchall()]
+
+    async def iter_ingredients(self, batch_size: int = 500):
+        """Yield the whole catalog as lists of at most batch_size rows, read through a server-side cursor."""
+        async with self.get_named_cursor("ingredient_catalog") as cur:
+            await cur.execute(INGREDIENTS_SQL)
+            while True:
+                rows = await cur.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield [ingredient_summary_from_row(r) for r in rows]
+
+    async def find_similar_dishes_names(self, keyword: str, limit: int = 10):
+        async with self.get_read_cursor() as cur:
+            await cur.execute(SIMILAR_DISH_NAMES_SQL, name_search_params(keyword, limit=limit))
+            return [r[0] for r in await cur.fetchall()]
+
+    async def search_dishes(self, keyword: str = None):
+        async with self.get_read_cursor() as cur:
+            if not keyword:
+                await cur.execute(DISHES_SQL)
+            else:
+                await cur.execute(SEARCH_DISHES_SQL, name_search_params(keyword))
+            return [dish_summary_from_row(r) for r in await cur.fetchall()]
+
+    async def search_dishes_page(self, limit: int, after_id: int = None):
+        """Keyset page of the catalog ordered by id: rows with id > after_id."""
+        async with self.get_read_cursor() as cur:
+            await cur.execute(DISHES_PAGE_SQL, (after_id or 0, limit))
+            return [dish_summary_from_row(r) for r in await cur.fetchall()]
+
+    async def iter_dishes(self, batch_size: int = 500):
+        """Yield the whole catalog as lists of at most batch_size rows, read through a server-side cursor."""
+        async with self.get_named_cursor("dish_catalog") as cur:
+            await cur.execute(DISHES_SQL)
+            while True:
+                rows = await cur.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield [dish_summary_from_row(r) for r in rows]
+
+    async def insert_dish(self, dish: DishRequest) -> int:
+        async with self.get_cursor() as cur:
+            await cur.execute(INSERT_DISH_SQL, dish_values(dish))
+            new_dish_id = (await cur.fetchone())[0]
+
+            if dish.ingredients:
+                await cur.executemany(INSERT_DISH_INGREDIENT_SQL, dish_ingredient_rows(new_dish_id, dish))
+
+            await cur.execute(REFRESH_DISH_NUTRITION_BY_DISH_SQL, ([new_dish_id],))
+
+            await self.refresh_dish_hashtags([new_dish_id], cur)
+
+            if dish.hashtagId:
+                await cur.executemany(INSERT_DISH_HASHTAG_SQL, dish_hashtag_rows(new_dish_id, dish))
+            
+            return new_dish_id
+
+    async def get_dish_by_id(self, id: int):
+        async with self.get_read_cursor() as cur:
+            await cur.execute(DISH_DETAIL_BY_ID_SQL, (id,))
+            r = await cur.fetchone()
+            return dish_detail_from_row(r) if r else None
+
+    async def get_dishes_by_ids(self, ids: list[int]):
+        async with self.get_read_cursor() as cur:
+            await cur.execute(DISH_DETAIL_BY_IDS_SQL, (list(ids),))
+            rows = await cur.fetchall()
+            dishes = {r[0]: dish_detail_from_row(r) for r in rows}
+            return [dishes[i] for i in dict.fromkeys(ids) if i in dishes]
+
+    async def get_dish_by_name(self, name: str):
+        async with self.get_read_cursor() as cur:
+            folded = fold(name)
+            await cur.execute(DISH_DETAIL_BY_NAME_SQL, (f"%{folded}%", folded))
+            r = await cur.fetchone()
+            return dish_detail_from_row(r) if r else None
+
+    async def get_dish_names(self):
+        """(id, name) of every dish, for the in-memory name index."""
+        async with self.get_read_cursor() as cur:
+            await cur.execute(DISH_NAMES_SQL)
+            return await cur.fetchall()
+
+    async def get_dish_popularity(self):
+        """(id, name, times logged as a meal) of every dish, for autocomplete ordering."""
+        async with self.get_read_cursor() as cur:
+            await cur.execute(DISH_POPULARITY_SQL)
+            return await cur.fetchall()
+
+    async def autocomplete_dishes(self, prefix: str, limit: int = 10):
+        """(score, id, name) of the best dishes for a type-ahead prefix, for when the autocomplete index isn't loaded."""
+        if not fold(prefix):
+            return []
+        async with self.get_read_cursor() as cur:
+            await cur.execute(DISH_AUTOCOMPLETE_SQL, autocomplete_params(prefix, limit))
+            return await cur.fetchall()
+
+    async def update_dish(self, id: int, dish: DishRequest) -> bool:
+        async with self.get_cursor() as cur:
+            await cur.execute(UPDATE_DISH_SQL, (*dish_values(dish), id))
+
+            if cur.rowcount == 0:
+                return False
+
+            await cur.execute(DELETE_DISH_INGREDIENTS_SQL, (id,))
+
+            if dish.ingredients:
+                await cur.executemany(INSERT_DISH_INGREDIENT_SQL, dish_ingredient_rows(id, dish))
+
+            await cur.execute(REFRESH_DISH_NUTRITION_BY_DISH_SQL, ([id],))
+            await cur.execute(REFRESH_DAILY_MEAL_NUTRITION_BY_DISH_SQL, ([id],))
+
+            await cur.execute(DELETE_DISH_HASHTAGS_SQL, (id,))
+
+            await self.refresh_dish_hashtags([id], cur)
+
+            if dish.hashtagId:
+                await cur.executemany(INSERT_DISH_HASHTAG_SQL, dish_hashtag_rows(id, dish))
+            
+            return True
+
+    async def get_ingredient_by_id(self, id: int):
+        async with self.get_read_cursor() as cur:
+            await cur.execute(INGREDIENT_BY_ID_SQL, (id,))
+            row = await cur.fetchone()
+            return ingredient_from_row(row) if row else None
+
+    async def get_ingredient_nutrients(self, ids: list[int] = None):
+        """Rows of (id, gramPerUnit, *NUTRIENT_COLUMNS) for the in-memory ingredient matrix; all ingredients when ids is None."""
+        async with self.get_read_cursor() as cur:
+            await cur.execute(*ingredient_nutrients_query(ids))
+            return await cur.fetchall()
+
+    async def get_ingredient_names(self):
+        """(id, name) of every ingredient, for the in-memory name index."""
+        async with self.get_read_cursor() as cur:
+            await cur.execute(INGREDIENT_NAMES_SQL)
+            return await cur.fetchall()
+
+    async def get_ingredient_popularity(self):
+        """(id, name, number of dishes using it) of every ingredient, for autocomplete ordering."""
+        async with self.get_read_cursor() as cur:
+            await cur.execute(INGREDIENT_POPULARITY_SQL)
+            return await cur.fetchall()
+
+    async def autocomplete_ingredients(self, prefix: str, limit: int = 10):
+        """(score, id, name) of the best ingredients for a type-ahead prefix, for when the autocomplete index isn't loaded."""
+        if not fold(prefix):
+            return []
+        async with self.get_read_cursor() as cur:
+            await cur.execute(INGREDIENT_AUTOCOMPLETE_SQL, autocomplete_params(prefix, limit))
+            return await cur.fetchall()
+
+    async def insert_ingredient(self, ingredient: IngredientRequest) -> int:
+        async with self.get_cursor() as cur:
+            await cur.execute(INSERT_INGREDIENT_SQL, ingredient_values(ingredient))
+            return (await cur.fetchone())[0]
+
+    async def update_ingredient(self, ingredient: UpdateIngredientRequest):
+        async with self.get_cursor() as cur:
+            await cur.execute(UPDATE_INGREDIENT_SQL, (*ingredient_values(ingredient), ingredient.id))
+            await cur.execute(REFRESH_DISH_NUTRITION_BY_INGREDIENT_SQL, (ingredient.id,))
+            await cur.execute(REFRESH_DAILY_MEAL_NUTRITION_BY_INGREDIENT_SQL, (ingredient.id,))
+            await cur.execute(REFRESH_DISH_HASHTAGS_BY_INGREDIENT_SQL, (ingredient.id,))
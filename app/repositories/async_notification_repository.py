@@ -0,0 +1,148 @@
+from app.repositories.async_base_repository import AsyncBaseRepository
+from app.repositories.notification_repository import (
+    USER_TOKEN_SQL, CREATE_NOTIFICATION_SQL, notification_values, MARK_READ_SQL,
+    CREATE_NOTIFICATION_WITH_PUSH_SQL, CLAIM_OUTBOX_SQL, MARK_OUTBOX_SENT_SQL, MARK_OUTBOX_RETRY_SQL,
+    MARK_OUTBOX_FAILED_SQL, DELIVERY_STATUS_SQL, delivery_from_row, CREATE_BROADCAST_SQL,
+    INSERT_BROADCAST_NOTIFICATIONS_SQL, SET_BROADCAST_RECIPIENTS_SQL, CLAIM_BROADCASTS_SQL, BROADCAST_TOKENS_SQL,
+    QUEUE_OUTBOX_SQL, BROADCAST_PROGRESS_SQL, FINISH_BROADCAST_SQL, BROADCAST_SQL, broadcast_params,
+    broadcast_from_row, outbox_rows, NOTIFICATIONS_BY_IDS_SQL, BROADCAST_NOTIFICATIONS_FOR_SQL,
+    NOTIFICATIONS_AFTER_SQL, notification_event_from_row, COUNT_UNREAD_SQL, MARK_ALL_READ_SQL,
+    MARK_READ_BY_IDS_SQL, inbox_page_query, inbox_item_from_row,
+)
+from app.schema.be_models import AddNotificationRequest, BroadcastNotificationRequest
+import logging
+
+logger = logging.getLogger(__name__)
+
+class AsyncNotificationRepository(AsyncBaseRepository):
+    async def get_user_token(self, user_id: int):
+        async with self.get_cursor() as cur:
+            await cur.execute(USER_TOKEN_SQL, (user_id,))
+            row = await cur.fetchone()
+            return row[0] if row else None
+
+    async def create_notification(self, notification: AddNotificationRequest) -> int:
+        async with self.get_cursor() as cur:
+            await cur.execute(CREATE_NOTIFICATION_SQL, notification_values(notification))
+            return (await cur.fetchone())[0]
+
+    async def create_notification_with_push(self, notification: AddNotificationRequest, token: str, title: str) -> int:
+        """Insert the notification and queue its push in the outbox. Returns the notification id."""
+        async with self.get_cursor() as cur:
+            await cur.execute(CREATE_NOTIFICATION_WITH_PUSH_SQL, (*notification_values(notification), token, title, notification.content))
+            return (await cur.fetchone())[0]
+
+    async def claim_outbox(self, limit: int, lease: float) -> list[tuple]:
+        """Lease up to limit due pushes: (id, token, title, body, attempts)."""
+        async with self.get_cursor() as cur:
+            await cur.execute(CLAIM_OUTBOX_SQL, (lease, limit))
+            return await cur.fetchall()
+
+    async def complete_outbox(self, sent: list[int], retries: list[tuple], failures: list[tuple]):
+        """Record a batch outcome: sent ids, (id, delay seconds, error) to retry and (id, error) that failed for good."""
+        async with self.get_cursor() as cur:
+            if sent:
+                await cur.execute(MARK_OUTBOX_SENT_SQL, (sent,))
+            if retries:
+                ids, delays, errors = zip(*retries)
+                await cur.execute(MARK_OUTBOX_RETRY_SQL, (list(ids), list(delays), list(errors)))
+            if failures:
+                ids, errors = zip(*failures)
+                await cur.execute(MARK_OUTBOX_FAILED_SQL, (list(ids), list(errors)))
+
+    async def create_broadcast(self, request: BroadcastNotificationRequest, title: str) -> dict:
+        """Insert the broadcast and one notification per user of its segment, in one transaction."""
+        params = broadcast_params(request, title)
+        async with self.get_cursor() as cur:
+            await cur.execute(CREATE_BROADCAST_SQL, params)
+            params["broadcast"] = (await cur.fetchone())[0]
+            await cur.execute(INSERT_BROADCAST_NOTIFICATIONS_SQL, params)
+            recipients = cur.rowcount
+            await cur.execute(SET_BROADCAST_RECIPIENTS_SQL, (recipients, params["broadcast"]))
+            return {"id": params["broadcast"], "recipients": recipients}
+
+    async def claim_broadcasts(self, lease: float) -> list[tuple]:
+        """Lease the broadcasts left to send: (id, title, body, last notification id already pushed)."""
+        async with self.get_cursor() as cur:
+            await cur.execute(CLAIM_BROADCASTS_SQL, (lease,))
+            return await cur.fetchall()
+
+    async def iter_broadcast_tokens(self, broadcast_id: int, after_id: int = 0, batch_size: int = 500):
+        """Yield lists of at most batch_size (notification id, token), read through a server-side cursor."""
+        async with self.get_named_cursor("broadcast_tokens") as cur:
+            await cur.execute(BROADCAST_TOKENS_SQL, (broadcast_id, after_id))
+            while True:
+                rows = await cur.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield rows
+
+    async def record_broadcast_progress(self, broadcast_id: int, title: str, body: str, pushed: int,
+                                        retries: list[tuple], failures: list[tuple], last_id: int, lease: float):
+        """
+        Count a sent window and extend the lease. Pushes are (notification id, token, delay, error) rows:
+        retryable ones move to the outbox, permanent failures are kept there as FAILED so their delivery
+        status is visible.
+        """
+        async with self.get_cursor() as cur:
+            if retries:
+                await cur.execute(QUEUE_OUTBOX_SQL, (title, body, "PENDING", *outbox_rows(retries)))
+            if failures:
+                await cur.execute(QUEUE_OUTBOX_SQL, (title, body, "FAILED", *outbox_rows(failures)))
+            await cur.execute(BROADCAST_PROGRESS_SQL, (pushed, len(retries), len(failures), last_id, lease, broadcast_id))
+
+    async def finish_broadcast(self, broadcast_id: int):
+        async with self.get_cursor() as cur:
+            await cur.execute(FINISH_BROADCAST_SQL, (broadcast_id,))
+
+    async def get_broadcast(self, broadcast_id: int):
+        async with self.get_read_cursor() as cur:
+            await cur.execute(BROADCAST_SQL, (broadcast_id,))
+            row = await cur.fetchone()
+            return broadcast_from_row(row) if row else None
+
+    async def get_notifications_by_ids(self, ids: list[int]) -> list[dict]:
+        async with self.get_cursor() as cur:
+            await cur.execute(NOTIFICATIONS_BY_IDS_SQL, (ids,))
+            return [notification_event_from_row(row) for row in await cur.fetchall()]
+
+    async def get_broadcast_notifications_for(self, broadcast_id: int, receiver_ids: list[int]) -> list[dict]:
+        """Notifications of a broadcast addressed to the given receivers."""
+        async with self.get_cursor() as cur:
+            await cur.execute(BROADCAST_NOTIFICATIONS_FOR_SQL, (broadcast_id, receiver_ids))
+            return [notification_event_from_row(row) for row in await cur.fetchall()]
+
+    async def get_notifications_after(self, receiver_id: int, after_id: int, limit: int = 100) -> list[dict]:
+        async with self.get_cursor() as cur:
+            await cur.execute(NOTIFICATIONS_AFTER_SQL, (receiver_id, after_id, limit))
+            return [notification_event_from_row(row) for row in await cur.fetchall()]
+
+    async def get_delivery_status(self, notification_id: int):
+        async with self.get_read_cursor() as cur:
+            await cur.execute(DELIVERY_STATUS_SQL, (notification_id,))
+            row = await cur.fetchone()
+            return delivery_from_row(row) if row else None
+
+    async def get_notifications_by_receiver(self, receiver_id: int, limit: int, after: tuple = None, unread_only: bool = False):
+        """Newest first, at most limit rows older than the (createdat, id) keyset position after."""
+        async with self.get_read_cursor() as cur:
+            await cur.execute(*inbox_page_query(receiver_id, limit, after, unread_only))
+            return [inbox_item_from_row(row) for row in await cur.fetchall()]
+
+    async def count_unread(self, receiver_id: int) -> int:
+        async with self.get_read_cursor() as cur:
+            await cur.execute(COUNT_UNREAD_SQL, (receiver_id,))
+            return (await cur.fetchone())[0]
+
+    async def mark_read(self, id: int):
+        async with self.get_cursor() as cur:
+            await cur.execute(MARK_READ_SQL, (id,))
+
+    async def mark_read_bulk(self, receiver_id: int, ids: list[int] = None) -> int:
+        """Mark the given notifications of a receiver, or all its unread ones, as read. Returns the number changed."""
+        async with self.get_cursor() as cur:
+            if ids is None:
+                await cur.execute(MARK_ALL_READ_SQL, (receiver_id,))
+            else:
+                await cur.execute(MARK_READ_BY_IDS_SQL, (receiver_id, ids))
+            return cur.rowcount
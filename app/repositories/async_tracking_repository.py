@@ -0,0 +1,139 @@
+from app.repositories.async_base_repository import AsyncBaseRepository
+from app.repositories.base_repository import day_range
+from app.repositories.tracking_repository import (
+    DAY_SUMMARY_SQL, day_summary_from_row, DAILY_NUTRITION_RANGE_SQL, daily_nutrition_from_row,
+    ROLLUP_MEAL_SQL, ROLLUP_DRINK_SQL, ROLLUP_EXERCISE_SQL,
+    INSERT_MEAL_SQL, meal_values, insert_meals_query, TOTAL_NUTRI_MEAL_SQL, nutri_meal_from_row,
+    MEALS_IN_DAY_SQL, meal_from_row, DELETE_MEAL_SQL,
+    INSERT_DRINK_SQL, drink_values, insert_drinks_query, DRINKS_IN_DAY_SQL, drink_from_row, DELETE_DRINK_SQL,
+    TOTAL_WATER_SQL, EXERCISES_SQL, exercise_catalog_from_row,
+    INSERT_EXERCISE_SQL, exercise_values, insert_exercises_query, TOTAL_KCAL_BURNED_SQL,
+    EXERCISES_IN_DAY_SQL, exercise_from_row, DELETE_EXERCISE_SQL,
+)
+from app.schema.be_models import AddMealRequest, AddDrinkRequest, AddExerciseRequest
+from datetime import date
+import logging
+
+logger = logging.getLogger(__name__)
+
+class AsyncTrackingRepository(AsyncBaseRepository):
+    # Day view
+    async def get_day_summary(self, date: date, userId: int):
+        async with self.get_read_cursor() as cur:
+            start, end = day_range(date)
+            await cur.execute(DAY_SUMMARY_SQL, {"userId": userId, "start": start, "end": end})
+            return day_summary_from_row(await cur.fetchone())
+
+    # Daily rollups
+    async def get_daily_nutrition(self, userId: int, start: date, end: date):
+        """Per-day rows of daily_user_nutrition between start and end (inclusive); days without activity are absent."""
+        async with self.get_read_cursor() as cur:
+            await cur.execute(DAILY_NUTRITION_RANGE_SQL, (userId, start, end))
+            rows = await cur.fetchall()
+            return [daily_nutrition_from_row(r) for r in rows]
+
+    # Meal
+    async def insert_meal(self, meal: AddMealRequest) -> int:
+        async with self.get_cursor() as cur:
+            await cur.execute(INSERT_MEAL_SQL, meal_values(meal))
+            new_id = (await cur.fetchone())[0]
+            await cur.execute(ROLLUP_MEAL_SQL, {"ids": [new_id], "sign": 1})
+            return new_id
+
+    async def insert_meals(self, meals: list[AddMealRequest]) -> list[int]:
+        async with self.get_cursor() as cur:
+            await cur.execute(*insert_meals_query(meals))
+            # Ids come from a sequence, so ascending order is insertion (= request) order.
+            new_ids = sorted(r[0] for r in await cur.fetchall())
+            await cur.execute(ROLLUP_MEAL_SQL, {"ids": new_ids, "sign": 1})
+            return new_ids
+
+    async def get_total_nutri_meal(self, date: date, userId: int):
+        async with self.get_read_cursor() as cur:
+            await cur.execute(TOTAL_NUTRI_MEAL_SQL, (userId, *day_range(date)))
+            r = await cur.fetchone()
+            return nutri_meal_from_row(r) if r else {}
+
+    async def get_meals_in_day(self, date: date, userId: int, mealType: str):
+        async with self.get_read_cursor() as cur:
+            await cur.execute(MEALS_IN_DAY_SQL, (userId, mealType, *day_range(date)))
+            rows = await cur.fetchall()
+            return [meal_from_row(r) for r in rows]
+
+    async def delete_meal(self, id: int) -> bool:
+        async with self.get_cursor() as cur:
+            await cur.execute(ROLLUP_MEAL_SQL, {"ids": [id], "sign": -1})
+            await cur.execute(DELETE_MEAL_SQL, (id,))
+            return await cur.fetchone() is not None
+
+    # Drink
+    async def insert_drink(self, drink: AddDrinkRequest) -> int:
+        async with self.get_cursor() as cur:
+            await cur.execute(INSERT_DRINK_SQL, drink_values(drink))
+            new_id = (await cur.fetchone())[0]
+            await cur.execute(ROLLUP_DRINK_SQL, {"ids": [new_id], "sign": 1})
+            return new_id
+
+    async def insert_drinks(self, drinks: list[AddDrinkRequest]) -> list[int]:
+        async with self.get_cursor() as cur:
+            await cur.execute(*insert_drinks_query(drinks))
+            new_ids = sorted(r[0] for r in await cur.fetchall())
+            await cur.execute(ROLLUP_DRINK_SQL, {"ids": new_ids, "sign": 1})
+            return new_ids
+
+    async def get_drinks_in_day(self, date: date, userId: int):
+        async with self.get_read_cursor() as cur:
+            await cur.execute(DRINKS_IN_DAY_SQL, (userId, *day_range(date)))
+            rows = await cur.fetchall()
+            return [drink_from_row(r) for r in rows]
+
+    async def delete_drink(self, id: int) -> bool:
+        async with self.get_cursor() as cur:
+            await cur.execute(ROLLUP_DRINK_SQL, {"ids": [id], "sign": -1})
+            await cur.execute(DELETE_DRINK_SQL, (id,))
+            return await cur.fetchone() is not None
+
+    async def get_total_water(self, date: date, userId: int) -> float:
+        async with self.get_read_cursor() as cur:
+            await cur.execute(TOTAL_WATER_SQL, (userId, *day_range(date)))
+            row = await cur.fetchone()
+            return row[0] if row else 0
+
+    # Exercise
+    async def get_all_exercises(self):
+        async with self.get_read_cursor() as cur:
+            await cur.execute(EXERCISES_SQL)
+            rows = await cur.fetchall()
+            return [exercise_catalog_from_row(r) for r in rows]
+
+    async def insert_exercise(self, exercise: AddExerciseRequest) -> int:
+        async with self.get_cursor() as cur:
+            await cur.execute(INSERT_EXERCISE_SQL, exercise_values(exercise))
+            new_id = (await cur.fetchone())[0]
+            await cur.execute(ROLLUP_EXERCISE_SQL, {"ids": [new_id], "sign": 1})
+            return new_id
+
+    async def insert_exercises(self, exercises: list[AddExerciseRequest]) -> list[int]:
+        async with self.get_cursor() as cur:
+            await cur.execute(*insert_exercises_query(exercises))
+            new_ids = sorted(r[0] for r in await cur.fetchall())
+            await cur.execute(ROLLUP_EXERCISE_SQL, {"ids": new_ids, "sign": 1})
+            return new_ids
+
+    async def get_total_kcal_burned(self, date: date, userId: int) -> float:
+        async with self.get_read_cursor() as cur:
+            await cur.execute(TOTAL_KCAL_BURNED_SQL, (userId, *day_range(date)))
+            row = await cur.fetchone()
+            return row[0] if row else 0
+
+    async def get_exercises_in_day(self, date: date, userId: int):
+        async with self.get_read_cursor() as cur:
+            await cur.execute(EXERCISES_IN_DAY_SQL, (userId, *day_range(date)))
+            rows = await cur.fetchall()
+            return [exercise_from_row(r) for r in rows]
+
+    async def delete_exercise(self, id: int) -> bool:
+        async with self.get_cursor() as cur:
+            await cur.execute(ROLLUP_EXERCISE_SQL, {"ids": [id], "sign": -1})
+            await cur.execute(DELETE_EXERCISE_SQL, (id,))
+            return await cur.fetchone() is not None
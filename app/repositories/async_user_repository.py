@@ -0,0 +1,118 @@
+from app.repositories.async_base_repository import AsyncBaseRepository
+from app.schema.be_models import UserInfoRequest
+from app.repositories.user_repository import (
+    INSERT_USER_INFO_SQL, user_info_values, UPDATE_USER_INFO_SQL, user_update_values, MARK_INFO_COLLECTED_SQL,
+    INSERT_LIMIT_FOOD_USER_SQL, DELETE_LIMIT_FOOD_USER_SQL, limit_food_rows,
+    INSERT_HEALTH_STATUS_USER_SQL, DELETE_HEALTH_STATUS_USER_SQL, health_status_rows,
+    INSERT_REQUIRED_INDEX_SQL, UPDATE_REQUIRED_INDEX_SQL, REQUIRED_INDEX_ID_SQL,
+    INSERT_IMPORTANT_HASHTAG_SQL, DELETE_IMPORTANT_HASHTAGS_SQL, important_hashtag_rows,
+    ACCOUNT_ID_BY_USERNAME_SQL, INSERT_ACCOUNT_SQL, ACCOUNT_BY_USERNAME_SQL, USER_INFO_ID_BY_ACCOUNT_SQL,
+    USER_INFO_DETAILS_SQL, REQUIRED_INDEX_BY_ID_SQL, USER_PROFILE_SQL, PROFILE_VERSION_SQL,
+)
+from app.helpers.nutrition_calculations import build_required_index_data
+import logging
+
+logger = logging.getLogger(__name__)
+
+class AsyncUserRepository(AsyncBaseRepository):
+    async def insert_user_info(self, user: UserInfoRequest):
+        async with self.get_cursor() as cur:
+            await cur.execute(INSERT_USER_INFO_SQL, user_info_values(user))
+            new_id = (await cur.fetchone())[0]
+
+            if user.LimitFoodid:
+                await cur.executemany(INSERT_LIMIT_FOOD_USER_SQL, limit_food_rows(new_id, user))
+            if user.HealthStatusid:
+                await cur.executemany(INSERT_HEALTH_STATUS_USER_SQL, health_status_rows(new_id, user))
+
+            await cur.execute(MARK_INFO_COLLECTED_SQL, (user.Accountid,))
+
+            index_data = build_required_index_data(user)
+            required_values = index_data["requiredIndex"]
+            required_values["UserInfoid"] = new_id
+
+            await cur.execute(INSERT_REQUIRED_INDEX_SQL, required_values)
+            required_id = (await cur.fetchone())[0]
+
+            hashtags = important_hashtag_rows(required_id, index_data)
+            if hashtags:
+                await cur.executemany(INSERT_IMPORTANT_HASHTAG_SQL, hashtags)
+
+            return new_id
+
+    async def update_user_info(self, id: int, user: UserInfoRequest):
+        async with self.get_cursor() as cur:
+            await cur.execute(UPDATE_USER_INFO_SQL, user_update_values(id, user))
+
+            await cur.execute(DELETE_LIMIT_FOOD_USER_SQL, (id,))
+            if user.LimitFoodid:
+                await cur.executemany(INSERT_LIMIT_FOOD_USER_SQL, limit_food_rows(id, user))
+
+            await cur.execute(DELETE_HEALTH_STATUS_USER_SQL, (id,))
+            if user.HealthStatusid:
+                await cur.executemany(INSERT_HEALTH_STATUS_USER_SQL, health_status_rows(id, user))
+
+            index_data = build_required_index_data(user)
+            required_values = index_data["requiredIndex"]
+
+            await cur.execute(REQUIRED_INDEX_ID_SQL, (id,))
+            row = await cur.fetchone()
+
+            if row:
+                required_id = row[0]
+                required_values["required_id"] = required_id
+                await cur.execute(UPDATE_REQUIRED_INDEX_SQL, required_values)
+            else:
+                required_values["UserInfoid"] = id
+                await cur.execute(INSERT_REQUIRED_INDEX_SQL, required_values)
+                required_id = (await cur.fetchone())[0]
+
+            await cur.execute(DELETE_IMPORTANT_HASHTAGS_SQL, (required_id,))
+            hashtags = important_hashtag_rows(required_id, index_data)
+            if hashtags:
+                await cur.executemany(INSERT_IMPORTANT_HASHTAG_SQL, hashtags)
+            
+            return id
+
+    async def check_username_exists(self, username: str) -> bool:
+        async with self.get_cursor() as cur:
+            await cur.execute(ACCOUNT_ID_BY_USERNAME_SQL, (username,))
+            return await cur.fetchone() is not None
+
+    async def create_account(self, username: str, password: str) -> int:
+        async with self.get_cursor() as cur:
+            await cur.execute(INSERT_ACCOUNT_SQL, (username, password, 0))
+            return (await cur.fetchone())[0]
+
+    async def get_account_by_username(self, username: str):
+        async with self.get_cursor() as cur:
+            await cur.execute(ACCOUNT_BY_USERNAME_SQL, (username,))
+            return await cur.fetchone()
+
+    async def get_user_info_id_by_account_id(self, account_id: int):
+        async with self.get_cursor() as cur:
+            await cur.execute(USER_INFO_ID_BY_ACCOUNT_SQL, (account_id,))
+            row = await cur.fetchone()
+            return row[0] if row else None
+
+    async def get_user_info_details(self, id: int):
+        async with self.get_read_cursor() as cur:
+            await cur.execute(USER_INFO_DETAILS_SQL, (id,))
+            return await cur.fetchone()
+
+    async def get_required_index(self, id: int):
+        async with self.get_read_cursor() as cur:
+            await cur.execute(REQUIRED_INDEX_BY_ID_SQL, (id,))
+            return await cur.fetchone()
+
+    async def get_profile(self, id: int):
+        """User details and latest required index in one row; see USER_PROFILE_SQL for the column layout."""
+        async with self.get_read_cursor() as cur:
+            await cur.execute(USER_PROFILE_SQL, (id,))
+            return await cur.fetchone()
+
+    async def get_profile_version(self, id: int):
+        async with self.get_read_cursor() as cur:
+            await cur.execute(PROFILE_VERSION_SQL, (id,))
+            row = await cur.fetchone()
+            return row[0] if row else None
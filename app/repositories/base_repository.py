@@ -1,20 +1,32 @@
 import logging
 from contextlib import contextmanager
-from app.core.database import get_connection
+from datetime import date, datetime, time, timedelta
+from app.core.database import get_connection, release_connection, mark_primary_write, read_connection, CURSOR_FACTORY
 
 logger = logging.getLogger(__name__)
 
+def day_range(day: date) -> tuple[datetime, datetime]:
+    """Half-open [start, end) bounds of a day, so `time >= %s AND time < %s` can use a (user, time) index."""
+    start = datetime.combine(day, time.min)
+    return start, start + timedelta(days=1)
+
+def values_placeholders(count: int, row: str) -> str:
+    """VALUES list for a multi-row statement, e.g. values_placeholders(2, "(%s, %s)") -> "(%s, %s), (%s, %s)"."""
+    return ", ".join([row] * count)
+
 class BaseRepository:
     def __init__(self):
         pass
 
     @contextmanager
-    def get_cursor(self):
+    def get_write_cursor(self):
+        """Cursor on the primary: writes, and reads that must see them. Pins the request's later reads to the primary."""
+        mark_primary_write()
         conn = None
         cur = None
         try:
             conn = get_connection()
-            cur = conn.cursor()
+            cur = conn.cursor(cursor_factory=CURSOR_FACTORY)
             yield cur
             conn.commit()
         except Exception as e:
@@ -26,11 +38,44 @@ class BaseRepository:
             if cur:
                 cur.close()
             if conn:
-                conn.close()
+                release_connection(conn)
+
+    get_cursor = get_write_cursor
+
+    @contextmanager
+    def get_read_cursor(self):
+        """Cursor for read-only queries: served by a read replica when configured, else by the primary."""
+        with read_connection() as conn:
+            cur = conn.cursor(cursor_factory=CURSOR_FACTORY)
+            try:
+                yield cur
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                logger.error(f"Database error: {e}")
+                raise e
+            finally:
+                cur.close()
+
+    @contextmanager
+    def get_named_cursor(self, name: str):
+        """Server-side cursor for read-only scans: rows stay in PostgreSQL and are fetched in batches with fetchmany()"""
+        with read_connection() as conn:
+            cur = conn.cursor(name=name, cursor_factory=CURSOR_FACTORY)
+            try:
+                yield cur
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                logger.error(f"Database error: {e}")
+                raise e
+            finally:
+                cur.close()
 
     @contextmanager
     def get_connection(self):
         """Use this if you need full control over the connection (e.g. manual commit/rollback)"""
+        mark_primary_write()
         conn = None
         try:
             conn = get_connection()
@@ -40,4 +85,4 @@ class BaseRepository:
             raise e
         finally:
             if conn:
-                conn.close()
+                release_connection(conn)
@@ -0,0 +1,161 @@
+from app.repositories.base_repository import BaseRepository
+from app.repositories.food_repository import REFRESH_DISH_NUTRITION_BY_DISH_SQL, REFRESH_DISH_HASHTAGS_BY_DISH_SQL
+from app.repositories.tracking_repository import REFRESH_DAILY_MEAL_NUTRITION_BY_DISH_SQL
+from app.helpers.nutrition_calculations import NUTRIENT_COLUMNS
+import csv
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Staging tables: one per import file. Columns are the lower-cased CSV headers / JSONL keys;
+# "ord" keeps file order so the last row wins when a name appears twice.
+INGREDIENT_COLUMNS = ["name", "thumbnail", "baseunit", "gramperunit", "isconfirm"] + NUTRIENT_COLUMNS
+DISH_COLUMNS = ["name", "thumbnail", "isconfirm", "description", "preparationsteps", "cookingsteps"]
+LINK_COLUMNS = ["dishname", "ingredientname", "weight"]
+
+STAGING_DDL = f"""
+    CREATE TEMP TABLE import_ingredient (
+        ord bigserial,
+        name text, thumbnail text, baseunit text, gramperunit real, isconfirm integer,
+        {", ".join(f"{c} real" for c in NUTRIENT_COLUMNS)}
+    ) ON COMMIT DROP;
+    CREATE TEMP TABLE import_dish (
+        ord bigserial,
+        name text, thumbnail text, isconfirm integer, description text, preparationsteps text, cookingsteps text
+    ) ON COMMIT DROP;
+    CREATE TEMP TABLE import_link (
+        ord bigserial,
+        dishname text, ingredientname text, weight real
+    ) ON COMMIT DROP;
+    CREATE TEMP TABLE import_raw (doc jsonb) ON COMMIT DROP;
+"""
+
+class _CopyTextLines:
+    """Read-only file view of JSONL lines, escaped for COPY ... FROM STDIN (FORMAT text)."""
+
+    def __init__(self, stream):
+        self._lines = (line for line in stream if line.strip())
+        self._buffer = ""
+
+    def read(self, size: int = -1) -> str:
+        while size < 0 or len(self._buffer) < size:
+            line = next(self._lines, None)
+            if line is None:
+                break
+            self._buffer += line.rstrip("\r\n").replace("\\", "\\\\").replace("\t", "\\t") + "\n"
+        if size < 0:
+            out, self._buffer = self._buffer, ""
+        else:
+            out, self._buffer = self._buffer[:size], self._buffer[size:]
+        return out
+
+class CatalogImportRepository(BaseRepository):
+    """
+    Bulk catalog import: files are COPYed into staging tables and merged into Ingredient, Dish and
+    IngredientInDish with set-based statements, all in one transaction. Rows are matched by name.
+    """
+
+    def import_catalog(self, ingredients=None, dishes=None, links=None, fmt: str = "csv") -> dict:
+        stats = {}
+        with self.get_cursor() as cur:
+            cur.execute("LOCK TABLE Ingredient, Dish IN SHARE ROW EXCLUSIVE MODE;")
+            cur.execute(STAGING_DDL)
+
+            changed_ingredient_ids = []
+            dish_ids = []
+            if ingredients is not None:
+                stats["ingredientsStaged"] = self._stage(cur, "import_ingredient", INGREDIENT_COLUMNS, ingredients, fmt)
+                changed_ingredient_ids = self._merge_by_name(cur, "Ingredient", "import_ingredient", INGREDIENT_COLUMNS, stats, "ingredients")
+            if dishes is not None:
+                stats["dishesStaged"] = self._stage(cur, "import_dish", DISH_COLUMNS, dishes, fmt)
+                dish_ids = self._merge_by_name(cur, "Dish", "import_dish", DISH_COLUMNS, stats, "dishes")
+            if links is not None:
+                stats["linksStaged"] = self._stage(cur, "import_link", LINK_COLUMNS, links, fmt)
+                dish_ids += self._replace_links(cur, stats)
+
+            # Dishes whose nutrition may have changed: imported or relinked ones, and users of updated ingredients.
+            cur.execute("""
+                SELECT DISTINCT Dishid FROM IngredientInDish WHERE Ingredientid = ANY(%s);
+            """, (changed_ingredient_ids,))
+            affected = sorted(set(dish_ids) | {r[0] for r in cur.fetchall()})
+
+            cur.execute(REFRESH_DISH_NUTRITION_BY_DISH_SQL, (affected,))
+            cur.execute(REFRESH_DAILY_MEAL_NUTRITION_BY_DISH_SQL, (affected,))
+            # Auto-hashtags of every affected dish in one set-based statement.
+            cur.execute(REFRESH_DISH_HASHTAGS_BY_DISH_SQL, (affected,))
+            stats["dishesRefreshed"] = len(affected)
+        return stats
+
+    def _stage(self, cur, table: str, allowed: list[str], stream, fmt: str) -> int:
+        if fmt == "jsonl":
+            cur.execute("TRUNCATE import_raw;")
+            cur.copy_expert("COPY import_raw (doc) FROM STDIN;", _CopyTextLines(stream))
+            # JSON keys are matched case-insensitively against the staging columns.
+            cur.execute(f"""
+                INSERT INTO {table} ({", ".join(allowed)})
+                SELECT {", ".join(f"r.{c}" for c in allowed)}
+                FROM import_raw raw,
+                LATERAL jsonb_populate_record(
+                    NULL::{table},
+                    (SELECT jsonb_object_agg(lower(e.key), e.value) FROM jsonb_each(raw.doc) e)
+                ) r;
+            """)
+        else:
+            header = next(csv.reader([stream.readline()]), [])
+            columns = [c.strip().lower() for c in header]
+            unknown = [c for c in columns if c not in allowed]
+            if unknown or not columns:
+                raise ValueError(f"Unknown columns for {table}: {unknown or header}")
+            cur.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv);", stream)
+
+        cur.execute(f"SELECT COUNT(*) FROM {table};")
+        return cur.fetchone()[0]
+
+    def _merge_by_name(self, cur, target: str, staging: str, columns: list[str], stats: dict, label: str) -> list[int]:
+        """Update rows whose name exists (keeping values the file leaves empty), insert the rest. Returns touched ids."""
+        latest = f"(SELECT DISTINCT ON (name) * FROM {staging} WHERE name IS NOT NULL ORDER BY name, ord DESC)"
+        updates = ", ".join(f"{c} = COALESCE(s.{c}, t.{c})" for c in columns if c != "name")
+        cur.execute(f"""
+            UPDATE {target} t SET {updates}
+            FROM {latest} s
+            WHERE t.name = s.name
+            RETURNING t.id;
+        """)
+        updated = [r[0] for r in cur.fetchall()]
+
+        cur.execute(f"""
+            INSERT INTO {target} ({", ".join(columns)})
+            SELECT {", ".join(f"s.{c}" for c in columns)}
+            FROM {latest} s
+            WHERE NOT EXISTS (SELECT 1 FROM {target} t WHERE t.name = s.name)
+            RETURNING id;
+        """)
+        inserted = [r[0] for r in cur.fetchall()]
+
+        stats[f"{label}Updated"] = len(updated)
+        stats[f"{label}Inserted"] = len(inserted)
+        return updated + inserted
+
+    def _replace_links(self, cur, stats: dict) -> list[int]:
+        """Dishes named in the links file get exactly the listed ingredients. Returns their ids."""
+        cur.execute("""
+            CREATE TEMP TABLE import_link_resolved ON COMMIT DROP AS
+            SELECT d.id AS dishid, i.id AS ingredientid, l.weight
+            FROM import_link l
+            JOIN (SELECT DISTINCT ON (name) id, name FROM Dish ORDER BY name, id) d ON d.name = l.dishname
+            JOIN (SELECT DISTINCT ON (name) id, name FROM Ingredient ORDER BY name, id) i ON i.name = l.ingredientname
+            WHERE l.weight IS NOT NULL;
+        """)
+        cur.execute("""
+            DELETE FROM IngredientInDish
+            WHERE Dishid IN (SELECT DISTINCT dishid FROM import_link_resolved);
+        """)
+        cur.execute("""
+            INSERT INTO IngredientInDish (Ingredientid, Dishid, weight)
+            SELECT ingredientid, dishid, weight FROM import_link_resolved;
+        """)
+        stats["links"] = cur.rowcount
+        stats["linksSkipped"] = stats["linksStaged"] - cur.rowcount
+
+        cur.execute("SELECT DISTINCT dishid FROM import_link_resolved;")
+        return [r[0] for r in cur.fetchall()]
@@ -1,515 +1,567 @@
 from app.repositories.base_repository import BaseRepository
+from app.repositories.tracking_repository import REFRESH_DAILY_MEAL_NUTRITION_BY_DISH_SQL, REFRESH_DAILY_MEAL_NUTRITION_BY_INGREDIENT_SQL
 from app.schema.be_models import DishRequest, IngredientRequest, UpdateIngredientRequest
-from app.helpers.nutrition_calculations import calculate_dish_hashtags
+from app.helpers.nutrition_calculations import NUTRIENT_COLUMNS
+from app.helpers.text_folding import fold
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Recomputes the dish_nutrition rows matched by {where} (see database/migrations/001_dish_nutrition.sql).
+REFRESH_DISH_NUTRITION_SQL = """
+    INSERT INTO dish_nutrition (
+        dishid, totalweight, totalgram, totalgramkcal,
+        kcal, carbs, sugar, fiber, protein, saturatedfat, monounsaturatedfat,
+        polyunsaturatedfat, transfat, cholesterol, vitamina, vitaminc, vitamind, vitaminb6,
+        vitaminb12, vitamine, vitamink, choline, canxi, fe, magie,
+        photpho, kali, natri, zn, water, caffeine, alcohol
+    )
+    SELECT d.id,
+           COALESCE(SUM(iid.weight), 0),
+           COALESCE(SUM(iid.weight * ing.gramperunit), 0),
+           COALESCE(SUM((iid.weight * ing.gramperunit / 100.0) * ing.kcal), 0),
+           COALESCE(SUM((ing.kcal / 100.0) * iid.weight), 0),
+           COALESCE(SUM((ing.carbs / 100.0) * iid.weight), 0),
+           COALESCE(SUM((ing.sugar / 100.0) * iid.weight), 0),
+           COALESCE(SUM((ing.fiber / 100.0) * iid.weight), 0),
+           COALESCE(SUM((ing.protein / 100.0) * iid.weight), 0),
+           COALESCE(SUM((ing.saturatedfat / 100.0) * iid.weight), 0),
+           COALESCE(SUM((ing.monounsaturatedfat / 100.0) * iid.weight), 0),
+           COALESCE(SUM((ing.polyunsaturatedfat / 100.0) * iid.weight), 0),
+           COALESCE(SUM((ing.transfat / 100.0) * iid.weight), 0),
+           COALESCE(SUM((ing.cholesterol / 100.0) * iid.weight), 0),
+           COALESCE(SUM((ing.vitamina / 100.0) * iid.weight), 0),
+           COALESCE(SUM((ing.vitaminc / 100.0) * iid.weight), 0),
+           COALESCE(SUM((ing.vitamind / 100.0) * iid.weight), 0),
+           COALESCE(SUM((ing.vitaminb6 / 100.0) * iid.weight), 0),
+           COALESCE(SUM((ing.vitaminb12 / 100.0) * iid.weight), 0),
+           COALESCE(SUM((ing.vitamine / 100.0) * iid.weight), 0),
+           COALESCE(SUM((ing.vitamink / 100.0) * iid.weight), 0),
+           COALESCE(SUM((ing.choline / 100.0) * iid.weight), 0),
+           COALESCE(SUM((ing.canxi / 100.0) * iid.weight), 0),
+           COALESCE(SUM((ing.fe / 100.0) * iid.weight), 0),
+           COALESCE(SUM((ing.magie / 100.0) * iid.weight), 0),
+           COALESCE(SUM((ing.photpho / 100.0) * iid.weight), 0),
+           COALESCE(SUM((ing.kali / 100.0) * iid.weight), 0),
+           COALESCE(SUM((ing.natri / 100.0) * iid.weight), 0),
+           COALESCE(SUM((ing.zn / 100.0) * iid.weight), 0),
+           COALESCE(SUM((ing.water / 100.0) * iid.weight), 0),
+           COALESCE(SUM((ing.caffeine / 100.0) * iid.weight), 0),
+           COALESCE(SUM((ing.alcohol / 100.0) * iid.weight), 0)
+    FROM Dish d
+    LEFT JOIN IngredientInDish iid ON d.id = iid.Dishid
+    LEFT JOIN Ingredient ing ON iid.Ingredientid = ing.id
+    WHERE {where}
+    GROUP BY d.id
+    ON CONFLICT (dishid) DO UPDATE SET
+        totalweight = EXCLUDED.totalweight,
+        totalgram = EXCLUDED.totalgram,
+        totalgramkcal = EXCLUDED.totalgramkcal,
+        kcal = EXCLUDED.kcal,
+        carbs = EXCLUDED.carbs,
+        sugar = EXCLUDED.sugar,
+        fiber = EXCLUDED.fiber,
+        protein = EXCLUDED.protein,
+        saturatedfat = EXCLUDED.saturatedfat,
+        monounsaturatedfat = EXCLUDED.monounsaturatedfat,
+        polyunsaturatedfat = EXCLUDED.polyunsaturatedfat,
+        transfat = EXCLUDED.transfat,
+        cholesterol = EXCLUDED.cholesterol,
+        vitamina = EXCLUDED.vitamina,
+        vitaminc = EXCLUDED.vitaminc,
+        vitamind = EXCLUDED.vitamind,
+        vitaminb6 = EXCLUDED.vitaminb6,
+        vitaminb12 = EXCLUDED.vitaminb12,
+        vitamine = EXCLUDED.vitamine,
+        vitamink = EXCLUDED.vitamink,
+        choline = EXCLUDED.choline,
+        canxi = EXCLUDED.canxi,
+        fe = EXCLUDED.fe,
+        magie = EXCLUDED.magie,
+        photpho = EXCLUDED.photpho,
+        kali = EXCLUDED.kali,
+        natri = EXCLUDED.natri,
+        zn = EXCLUDED.zn,
+        water = EXCLUDED.water,
+        caffeine = EXCLUDED.caffeine,
+        alcohol = EXCLUDED.alcohol,
+        updatedat = CURRENT_TIMESTAMP;
+"""
+
+REFRESH_DISH_NUTRITION_BY_DISH_SQL = REFRESH_DISH_NUTRITION_SQL.format(where="d.id = ANY(%s)")
+REFRESH_DISH_NUTRITION_BY_INGREDIENT_SQL = REFRESH_DISH_NUTRITION_SQL.format(
+    where="d.id IN (SELECT Dishid FROM IngredientInDish WHERE Ingredientid = %s)"
+)
+
+# Recomputes auto-hashtags for the dish_nutrition rows matched by {where}, from the thresholds in
+# hashtag_rule (database/migrations/004_hashtag_rule.sql). Hashtags a rule can assign are replaced;
+# hand-picked ones are left alone.
+REFRESH_DISH_HASHTAGS_SQL = f"""
+    WITH scope AS (
+        SELECT * FROM dish_nutrition WHERE {{where}}
+    ),
+    computed AS (
+        SELECT s.dishid,
+               CASE WHEN v.value >= r.highthreshold THEN r.highhashtagid
+                    WHEN v.value <= r.lowthreshold THEN r.lowhashtagid
+               END AS hashtagid
+        FROM scope s
+        CROSS JOIN LATERAL (VALUES
+            {", ".join(f"('{c}', s.{c} / NULLIF(s.totalweight, 0) * 100)" for c in NUTRIENT_COLUMNS)}
+        ) AS v(nutrient, value)
+        JOIN hashtag_rule r ON r.nutrient = v.nutrient
+    ),
+    cleared AS (
+        DELETE FROM HashtagOfDish hd
+        USING scope s
+        WHERE hd.Dishid = s.dishid
+        AND hd.Hashtagid IN (SELECT highhashtagid FROM hashtag_rule UNION SELECT lowhashtagid FROM hashtag_rule)
+    )
+    INSERT INTO HashtagOfDish (Hashtagid, Dishid)
+    SELECT hashtagid, dishid FROM computed WHERE hashtagid IS NOT NULL;
+"""
+
+REFRESH_DISH_HASHTAGS_BY_DISH_SQL = REFRESH_DISH_HASHTAGS_SQL.format(where="dishid = ANY(%s)")
+REFRESH_DISH_HASHTAGS_BY_INGREDIENT_SQL = REFRESH_DISH_HASHTAGS_SQL.format(
+    where="dishid IN (SELECT Dishid FROM IngredientInDish WHERE Ingredientid = %s)"
+)
+REFRESH_ALL_DISH_HASHTAGS_SQL = REFRESH_DISH_HASHTAGS_SQL.format(where="TRUE")
+
+# Dish detail with its ingredients and hashtags aggregated as JSON, so one query hydrates a dish.
+DISH_DETAIL_SQL = """
+    SELECT d.id, d.name, d.thumbnail, d.isConfirm, d.description, d.preparationSteps, d.cookingSteps,
+           COALESCE((
+               SELECT json_agg(json_build_object(
+                   'ingredientId', iid.IngredientId,
+                   'name', i.name,
+                   'weight', iid.weight,
+                   'unit', i.baseUnit,
+                   'thumbnail', i.thumbnail
+               ))
+               FROM IngredientInDish iid
+               JOIN Ingredient i ON iid.IngredientId = i.id
+               WHERE iid.DishId = d.id
+           ), '[]'::json) AS ingredients,
+           COALESCE((
+               SELECT json_agg(json_build_object('id', h.id, 'title', h.title))
+               FROM HashtagOfDish hd
+               JOIN Hashtag h ON hd.HashtagId = h.id
+               WHERE hd.DishId = d.id
+           ), '[]'::json) AS hashtags
+    FROM Dish d
+    {where};
+"""
+
+DISH_DETAIL_BY_ID_SQL = DISH_DETAIL_SQL.format(where="WHERE d.id = %s")
+DISH_DETAIL_BY_IDS_SQL = DISH_DETAIL_SQL.format(where="WHERE d.id = ANY(%s)")
+DISH_DETAIL_BY_NAME_SQL = DISH_DETAIL_SQL.format(
+    where="WHERE d.name_search LIKE %s ORDER BY similarity(d.name_search, %s) DESC, LENGTH(d.name) LIMIT 1"
+)
+
+def dish_detail_from_row(r) -> dict:
+    return {
+        "id": r[0],
+        "name": r[1],
+        "thumbnail": r[2],
+        "isConfirm": r[3],
+        "description": r[4],
+        "preparationSteps": r[5],
+        "cookingSteps": r[6],
+        "ingredients": r[7],
+        "hashtags": r[8],
+    }
+
+# Catalog list rows: (id, name, thumbnail, kcal, baseUnit, isConfirm) for ingredients and
+# (id, name, thumbnail, isConfirm, totalGram, totalKcal) for dishes. Name searches take the named
+# parameters of name_search_params.
+INGREDIENT_SUMMARY_SQL = """
+    SELECT id,name,thumbnail,kcal,baseUnit,isConfirm
+    FROM ingredient
+    {where}
+    ORDER BY {order}
+    {limit};
+"""
+
+INGREDIENTS_SQL = INGREDIENT_SUMMARY_SQL.format(where="", order="id ASC", limit="")
+INGREDIENTS_PAGE_SQL = INGREDIENT_SUMMARY_SQL.format(where="WHERE id > %s", order="id ASC", limit="LIMIT %s")
+SEARCH_INGREDIENTS_SQL = INGREDIENT_SUMMARY_SQL.format(
+    where="WHERE name_search LIKE %(pattern)s OR name_search %% %(folded)s",
+    order="similarity(name_search, %(folded)s) DESC",
+    limit="",
+)
+
+DISH_SUMMARY_SQL = """
+    SELECT d.id,
+           d.name,
+           d.thumbnail,
+           d.isconfirm,
+           COALESCE(dn.totalgram, 0) AS totalgram,
+           COALESCE(dn.totalgramkcal, 0) AS totalkcal
+    FROM dish d
+    LEFT JOIN dish_nutrition dn ON d.id = dn.dishid
+    {where}
+    ORDER BY {order}
+    {limit};
+"""
+
+DISHES_SQL = DISH_SUMMARY_SQL.format(where="", order="d.id ASC", limit="")
+DISHES_PAGE_SQL = DISH_SUMMARY_SQL.format(where="WHERE d.id > %s", order="d.id ASC", limit="LIMIT %s")
+SEARCH_DISHES_SQL = DISH_SUMMARY_SQL.format(
+    where="WHERE d.name_search LIKE %(pattern)s OR d.name_search %% %(folded)s",
+    order="similarity(d.name_search, %(folded)s) DESC",
+    limit="",
+)
+
+SIMILAR_NAMES_SQL = """
+    SELECT name, similarity(name_search, %(folded)s) AS sml
+    FROM {table}
+    WHERE name_search LIKE %(pattern)s OR name_search %% %(folded)s
+    ORDER BY sml DESC
+    LIMIT %(limit)s;
+"""
+
+SIMILAR_INGREDIENT_NAMES_SQL = SIMILAR_NAMES_SQL.format(table="ingredient")
+SIMILAR_DISH_NAMES_SQL = SIMILAR_NAMES_SQL.format(table="dish")
+
+def name_search_params(keyword: str, **params) -> dict:
+    """Folded keyword and its LIKE pattern, matched against the name_search columns."""
+    folded = fold(keyword)
+    return {"folded": folded, "pattern": f"%{folded}%", **params}
+
+def ingredient_summary_from_row(r) -> dict:
+    return {"id": r[0], "name": r[1], "thumbnail": r[2], "kcal": r[3],"baseUnit": r[4],"isConfirm": r[5]}
+
+def dish_summary_from_row(r) -> dict:
+    return {
+        "id": r[0],
+        "name": r[1],
+        "thumbnail": r[2],
+        "isConfirm": r[3],
+        "totalGram": float(r[4]),
+        "totalKcal": float(r[5]),
+    }
+
+INSERT_DISH_SQL = """
+    INSERT INTO Dish
+    (name, thumbnail, isConfirm, description, preparationSteps, cookingSteps)
+    VALUES (%s, %s, %s, %s, %s, %s)
+    RETURNING id;
+"""
+
+UPDATE_DISH_SQL = """
+    UPDATE Dish
+    SET name = %s,
+        thumbnail = %s,
+        isConfirm = %s,
+        description = %s,
+        preparationSteps = %s,
+        cookingSteps = %s
+    WHERE id = %s;
+"""
+
+INSERT_DISH_INGREDIENT_SQL = """
+    INSERT INTO IngredientInDish (Dishid, Ingredientid, weight)
+    VALUES (%s, %s, %s)
+"""
+DELETE_DISH_INGREDIENTS_SQL = "DELETE FROM IngredientInDish WHERE DishId = %s;"
+
+INSERT_DISH_HASHTAG_SQL = """
+    INSERT INTO HashtagOfDish (Hashtagid, Dishid)
+    VALUES (%s, %s)
+"""
+DELETE_DISH_HASHTAGS_SQL = "DELETE FROM HashtagOfDish WHERE DishId = %s;"
+
+def dish_values(dish: DishRequest) -> tuple:
+    return (
+        dish.name,
+        dish.thumbnail,
+        dish.isConfirm,
+        dish.description,
+        dish.preparationSteps,
+        dish.cookingSteps,
+    )
+
+def dish_ingredient_rows(dish_id: int, dish: DishRequest) -> list[tuple]:
+    return [(dish_id, ing.ingredientId, ing.weight) for ing in dish.ingredients or []]
+
+def dish_hashtag_rows(dish_id: int, dish: DishRequest) -> list[tuple]:
+    return [(hashtag_id, dish_id) for hashtag_id in dish.hashtagId or []]
+
+# For the in-memory name and autocomplete indexes.
+DISH_NAMES_SQL = "SELECT id, name FROM dish ORDER BY id;"
+INGREDIENT_NAMES_SQL = "SELECT id, name FROM ingredient ORDER BY id;"
+# dish_popularity is kept up to date by a trigger on MealOfUser (database/migrations/012_dish_popularity.sql).
+DISH_POPULARITY_SQL = """
+    SELECT d.id, d.name, COALESCE(p.logged, 0)
+    FROM dish d
+    LEFT JOIN dish_popularity p ON p.dishid = d.id
+    ORDER BY d.id;
+"""
+INGREDIENT_POPULARITY_SQL = """
+    SELECT i.id, i.name, COALESCE(u.used, 0)
+    FROM ingredient i
+    LEFT JOIN (SELECT ingredientid, COUNT(*) AS used FROM ingredientindish GROUP BY ingredientid) u ON u.ingredientid = i.id
+    ORDER BY i.id;
+"""
+
+# Prefix type-ahead straight from the database, scored like app.services.core.autocomplete_index.PrefixIndex:
+# log(1 + popularity), plus 1 when the name itself (not a later word) starts with the prefix.
+AUTOCOMPLETE_SQL = """
+    SELECT ln(1 + {popularity}) + CASE WHEN t.name_search LIKE %(prefix)s THEN 1 ELSE 0 END AS score, t.id, t.name
+    FROM {table} t
+    WHERE t.name_search LIKE %(prefix)s OR t.name_search LIKE %(word)s
+    ORDER BY score DESC, length(t.name)
+    LIMIT %(limit)s;
+"""
+
+DISH_AUTOCOMPLETE_SQL = AUTOCOMPLETE_SQL.format(
+    table="dish", popularity="COALESCE((SELECT p.logged FROM dish_popularity p WHERE p.dishid = t.id), 0)",
+)
+INGREDIENT_AUTOCOMPLETE_SQL = AUTOCOMPLETE_SQL.format(
+    table="ingredient", popularity="(SELECT COUNT(*) FROM ingredientindish u WHERE u.ingredientid = t.id)",
+)
+
+def autocomplete_params(prefix: str, limit: int) -> dict:
+    folded = fold(prefix)
+    return {"prefix": f"{folded}%", "word": f"% {folded}%", "limit": limit}
+
+# Ingredient columns written by insert/update, in IngredientRequest attribute names.
+INGREDIENT_FIELDS = (
+    "name", "thumbnail", "baseUnit", "gramPerUnit", "isConfirm", "kcal", "carbs", "sugar", "fiber", "protein",
+    "saturatedFat", "monounSaturatedFat", "polyunSaturatedFat", "transFat", "cholesterol",
+    "vitaminA", "vitaminD", "vitaminC", "vitaminB6", "vitaminB12", "vitaminE", "vitaminK",
+    "choline", "canxi", "fe", "magie", "photpho", "kali", "natri", "zn", "water", "caffeine", "alcohol",
+)
+
+INGREDIENT_BY_ID_SQL = f"""
+    SELECT id, {", ".join(INGREDIENT_FIELDS)}
+    FROM public.ingredient
+    WHERE id = %s;
+"""
+
+INSERT_INGREDIENT_SQL = f"""
+    INSERT INTO Ingredient ({", ".join(INGREDIENT_FIELDS)})
+    VALUES ({", ".join("%s" for _ in INGREDIENT_FIELDS)})
+    RETURNING id;
+"""
+
+UPDATE_INGREDIENT_SQL = f"""
+    UPDATE Ingredient
+    SET {", ".join(f"{field} = %s" for field in INGREDIENT_FIELDS)}
+    WHERE id = %s;
+"""
+
+def ingredient_values(ingredient: IngredientRequest | UpdateIngredientRequest) -> tuple:
+    return tuple(getattr(ingredient, field) for field in INGREDIENT_FIELDS)
+
+def ingredient_from_row(r) -> dict:
+    return {"id": r[0], **dict(zip(INGREDIENT_FIELDS, r[1:]))}
+
+def ingredient_nutrients_query(ids: list[int] = None) -> tuple:
+    """(sql, params) for rows of (id, gramPerUnit, *NUTRIENT_COLUMNS); all ingredients when ids is None."""
+    sql = f"""
+        SELECT id, gramperunit, {", ".join(NUTRIENT_COLUMNS)}
+        FROM ingredient
+        {"WHERE id = ANY(%s)" if ids is not None else ""}
+        ORDER BY id;
+    """
+    return sql, (list(ids),) if ids is not None else None
+
 class FoodRepository(BaseRepository):
+    def refresh_dish_hashtags(self, dish_ids: list[int] = None, cur=None) -> int:
+        """
+        Recompute auto-hashtags for dish_ids, or for the whole catalog when dish_ids is None.
+        Runs on the caller's cursor when given, so it sees dishes written in the same transaction.
+        """
+        if cur is None:
+            with self.get_cursor() as own_cur:
+                return self.refresh_dish_hashtags(dish_ids, own_cur)
+
+        if dish_ids is None:
+            cur.execute(REFRESH_ALL_DISH_HASHTAGS_SQL)
+        else:
+            cur.execute(REFRESH_DISH_HASHTAGS_BY_DISH_SQL, (list(dish_ids),))
+        return cur.rowcount
+
     def find_similar_ingredients_names(self, keyword: str, limit: int = 10):
-        with self.get_cursor() as cur:
-            sql = """
-                SELECT name, similarity(name, %s) AS sml
-                FROM ingredient
-                WHERE name ILIKE %s OR name %% %s
-                ORDER BY sml DESC
-                LIMIT %s;
-            """
-            cur.execute(sql, (keyword, f"%{keyword}%", keyword, limit))
-            rows = cur.fetchall()
-            return [r[0] for r in rows]
+        with self.get_read_cursor() as cur:
+            cur.execute(SIMILAR_INGREDIENT_NAMES_SQL, name_search_params(keyword, limit=limit))
+            return [r[0] for r in cur.fetchall()]
 
     def search_ingredients(self, keyword: str = None):
-        with self.get_cursor() as cur:
+        with self.get_read_cursor() as cur:
             if not keyword:
-                sql = """
-                SELECT id,name,thumbnail,kcal,baseUnit,isConfirm
-                FROM ingredient
-                ORDER BY id ASC;
-                """
-                cur.execute(sql)
+                cur.execute(INGREDIENTS_SQL)
             else:
-                sql = """
-                SELECT id,name,thumbnail,kcal,baseUnit,isConfirm
-                FROM ingredient
-                WHERE name ILIKE %s OR name %% %s
-                ORDER BY similarity(name, %s) DESC;
-                """
-                cur.execute(sql, (f"%{keyword}%", keyword, keyword))
-            rows = cur.fetchall()
-            return [
-                {"id": r[0], "name": r[1], "thumbnail": r[2], "kcal": r[3],"baseUnit": r[4],"isConfirm": r[5]}
-                for r in rows
-            ]
+                cur.execute(SEARCH_INGREDIENTS_SQL, name_search_params(keyword))
+            return [ingredient_summary_from_row(r) for r in cur.fetchall()]
+
+    def search_ingredients_page(self, limit: int, after_id: int = None):
+        """Keyset page of the catalog ordered by id: rows with id > after_id."""
+        with self.get_read_cursor() as cur:
+            cur.execute(INGREDIENTS_PAGE_SQL, (after_id or 0, limit))
+            return [ingredient_summary_from_row(r) for r in cur.fetchall()]
+
+    def iter_ingredients(self, batch_size: int = 500):
+        """Yield the whole catalog as lists of at most batch_size rows, read through a server-side cursor."""
+        with self.get_named_cursor("ingredient_catalog") as cur:
+            cur.execute(INGREDIENTS_SQL)
+            while True:
+                rows = cur.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield [ingredient_summary_from_row(r) for r in rows]
 
     def find_similar_dishes_names(self, keyword: str, limit: int = 10):
-        with self.get_cursor() as cur:
-            sql = """
-                SELECT name, similarity(name, %s) AS sml
-                FROM dish
-                WHERE name ILIKE %s OR name %% %s
-                ORDER BY sml DESC
-                LIMIT %s;
-            """
-            cur.execute(sql, (keyword, f"%{keyword}%", keyword, limit))
-            rows = cur.fetchall()
-            return [r[0] for r in rows]
+        with self.get_read_cursor() as cur:
+            cur.execute(SIMILAR_DISH_NAMES_SQL, name_search_params(keyword, limit=limit))
+            return [r[0] for r in cur.fetchall()]
 
     def search_dishes(self, keyword: str = None):
-        with self.get_cursor() as cur:
+        with self.get_read_cursor() as cur:
             if not keyword:
-                sql = """
-                SELECT d.id,
-                       d.name,
-                       d.thumbnail,
-                       d.isconfirm,
-                       COALESCE(SUM(iid.weight * ing.gramperunit), 0) AS totalgram,
-                       COALESCE(SUM((iid.weight * ing.gramperunit / 100.0) * ing.kcal), 0) AS totalkcal
-                FROM dish d
-                LEFT JOIN ingredientindish iid ON d.id = iid.dishid
-                LEFT JOIN ingredient ing ON iid.ingredientid = ing.id
-                GROUP BY d.id, d.name, d.thumbnail, d.isconfirm
-                ORDER BY d.id ASC;
-                """
-                cur.execute(sql)
+                cur.execute(DISHES_SQL)
             else:
-                sql = """
-                SELECT d.id,
-                       d.name,
-                       d.thumbnail,
-                       d.isconfirm,
-                       COALESCE(SUM(iid.weight * ing.gramperunit), 0) AS totalgram,
-                       COALESCE(SUM((iid.weight * ing.gramperunit / 100.0) * ing.kcal), 0) AS totalkcal
-                FROM dish d
-                LEFT JOIN ingredientindish iid ON d.id = iid.dishid
-                LEFT JOIN ingredient ing ON iid.ingredientid = ing.id
-                WHERE d.name ILIKE %s OR d.name %% %s
-                GROUP BY d.id, d.name, d.thumbnail, d.isconfirm
-                ORDER BY similarity(d.name, %s) DESC;
-                """
-                cur.execute(sql, (f"%{keyword}%", keyword, keyword))
-            
-            rows = cur.fetchall()
-            return [
-                {
-                    "id": r[0],
-                    "name": r[1],
-                    "thumbnail": r[2],
-                    "isConfirm": r[3],
-                    "totalGram": float(r[4]),
-                    "totalKcal": float(r[5]),
-                }
-                for r in rows
-            ]
+                cur.execute(SEARCH_DISHES_SQL, name_search_params(keyword))
+            return [dish_summary_from_row(r) for r in cur.fetchall()]
+
+    def search_dishes_page(self, limit: int, after_id: int = None):
+        """Keyset page of the catalog ordered by id: rows with id > after_id."""
+        with self.get_read_cursor() as cur:
+            cur.execute(DISHES_PAGE_SQL, (after_id or 0, limit))
+            return [dish_summary_from_row(r) for r in cur.fetchall()]
+
+    def iter_dishes(self, batch_size: int = 500):
+        """Yield the whole catalog as lists of at most batch_size rows, read through a server-side cursor."""
+        with self.get_named_cursor("dish_catalog") as cur:
+            cur.execute(DISHES_SQL)
+            while True:
+                rows = cur.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield [dish_summary_from_row(r) for r in rows]
 
     def insert_dish(self, dish: DishRequest) -> int:
         with self.get_cursor() as cur:
-            insert_sql = """
-                INSERT INTO Dish
-                (name, thumbnail, isConfirm, description, preparationSteps, cookingSteps)
-                VALUES (%s, %s, %s, %s, %s, %s)
-                RETURNING id;
-            """
-            values = (
-                dish.name,
-                dish.thumbnail,
-                dish.isConfirm,
-                dish.description,
-                dish.preparationSteps,
-                dish.cookingSteps,
-            )
-            cur.execute(insert_sql, values)
+            cur.execute(INSERT_DISH_SQL, dish_values(dish))
             new_dish_id = cur.fetchone()[0]
 
             if dish.ingredients:
-                dish_ingredient_data = [
-                    (ing.ingredientId, new_dish_id, ing.weight)
-                    for ing in dish.ingredients
-                ]
-                cur.executemany(
-                    """
-                    INSERT INTO IngredientInDish (Ingredientid, Dishid, weight)
-                    VALUES (%s, %s, %s)
-                    """,
-                    dish_ingredient_data
-                )
-
-            all_hashtags = []
+                cur.executemany(INSERT_DISH_INGREDIENT_SQL, dish_ingredient_rows(new_dish_id, dish))
+
+            cur.execute(REFRESH_DISH_NUTRITION_BY_DISH_SQL, ([new_dish_id],))
+
+            self.refresh_dish_hashtags([new_dish_id], cur)
+
             if dish.hashtagId:
-                all_hashtags.extend(dish.hashtagId)
-
-            auto_hashtags = calculate_dish_hashtags(new_dish_id)
-            if auto_hashtags:
-                all_hashtags.extend(auto_hashtags)
-
-            if all_hashtags:
-                hashtag_data = [
-                    (hashtag_id, new_dish_id) for hashtag_id in all_hashtags
-                ]
-                cur.executemany(
-                    """
-                    INSERT INTO HashtagOfDish (Hashtagid, Dishid)
-                    VALUES (%s, %s)
-                    """,
-                    hashtag_data
-                )
+                cur.executemany(INSERT_DISH_HASHTAG_SQL, dish_hashtag_rows(new_dish_id, dish))
             
             return new_dish_id
 
     def get_dish_by_id(self, id: int):
-        with self.get_cursor() as cur:
-            sql1 = """
-                SELECT id,name,thumbnail,isConfirm,description,preparationSteps,cookingSteps
-                FROM Dish
-                WHERE id = %s; 
-                """
-            cur.execute(sql1, (id,))
-            r1 = cur.fetchone()
-
-            if not r1:
-                return None
-
-            dish = {"id": r1[0], "name": r1[1], "thumbnail": r1[2], "isConfirm": r1[3], "description": r1[4], "preparationSteps": r1[5], "cookingSteps": r1[6]}
-
-            sql2 = """
-                SELECT iid.IngredientId,i.name,iid.weight,i.baseUnit,i.thumbnail
-                FROM IngredientInDish iid
-                JOIN Ingredient i ON iid.IngredientId = i.id
-                WHERE iid.DishId = %s;
-                """
-            cur.execute(sql2, (id,))
-            r2 = cur.fetchall()
-
-            ingredients = [
-                {
-                    "ingredientId": r[0],
-                    "name": r[1],
-                    "weight": r[2],
-                    "unit": r[3],
-                    "thumbnail": r[4]
-                }
-                for r in r2
-            ]
-            dish["ingredients"] = ingredients
-
-            sql3 = """
-                SELECT h.id,h.title
-                FROM HashtagOfDish hd
-                JOIN Hashtag h ON hd.HashtagId = h.id
-                WHERE hd.DishId = %s;
-                """
-            cur.execute(sql3, (id,))
-            r3 = cur.fetchall()
-            hashtags = [{"id": r[0], "title": r[1]} for r in r3]
-            dish["hashtags"] = hashtags
-            return dish
+        with self.get_read_cursor() as cur:
+            cur.execute(DISH_DETAIL_BY_ID_SQL, (id,))
+            r = cur.fetchone()
+            return dish_detail_from_row(r) if r else None
+
+    def get_dishes_by_ids(self, ids: list[int]):
+        with self.get_read_cursor() as cur:
+            cur.execute(DISH_DETAIL_BY_IDS_SQL, (list(ids),))
+            rows = cur.fetchall()
+            dishes = {r[0]: dish_detail_from_row(r) for r in rows}
+            return [dishes[i] for i in dict.fromkeys(ids) if i in dishes]
 
     def get_dish_by_name(self, name: str):
-         with self.get_cursor() as cur:
-            sql1 = """
-                SELECT id, name, thumbnail, isConfirm, description, preparationSteps, cookingSteps
-                FROM Dish
-                WHERE name ILIKE %s
-                ORDER BY similarity(name, %s) DESC, LENGTH(name)
-                LIMIT 1;
-            """
-            cur.execute(sql1, (f"%{name}%", name))
-            r1 = cur.fetchone()
-
-            if not r1:
-                return None
-
-            dish = {
-                "id": r1[0],
-                "name": r1[1],
-                "thumbnail": r1[2],
-                "isConfirm": r1[3],
-                "description": r1[4],
-                "preparationSteps": r1[5],
-                "cookingSteps": r1[6]
-            }
-            dish_id_value = (dish["id"],)
-
-            sql2 = """
-                SELECT iid.IngredientId, i.name, iid.weight, i.baseUnit, i.thumbnail
-                FROM IngredientInDish iid
-                JOIN Ingredient i ON iid.IngredientId = i.id
-                WHERE iid.DishId = %s;
-            """
-            cur.execute(sql2, dish_id_value)
-            r2 = cur.fetchall()
-
-            ingredients = [
-                {
-                    "ingredientId": r[0],
-                    "name": r[1],
-                    "weight": r[2],
-                    "unit": r[3],
-                    "thumbnail": r[4]
-                }
-                for r in r2
-            ]
-            dish["ingredients"] = ingredients
-
-            sql3 = """
-                SELECT h.id, h.title
-                FROM HashtagOfDish hd
-                JOIN Hashtag h ON hd.HashtagId = h.id
-                WHERE hd.DishId = %s;
-            """
-            cur.execute(sql3, dish_id_value)
-            r3 = cur.fetchall()
-            hashtags = [{"id": r[0], "title": r[1]} for r in r3]
-            dish["hashtags"] = hashtags
-            return dish
+        with self.get_read_cursor() as cur:
+            folded = fold(name)
+            cur.execute(DISH_DETAIL_BY_NAME_SQL, (f"%{folded}%", folded))
+            r = cur.fetchone()
+            return dish_detail_from_row(r) if r else None
+
+    def get_dish_names(self):
+        """(id, name) of every dish, for the in-memory name index."""
+        with self.get_read_cursor() as cur:
+            cur.execute(DISH_NAMES_SQL)
+            return cur.fetchall()
+
+    def get_dish_popularity(self):
+        """(id, name, times logged as a meal) of every dish, for autocomplete ordering."""
+        with self.get_read_cursor() as cur:
+            cur.execute(DISH_POPULARITY_SQL)
+            return cur.fetchall()
+
+    def autocomplete_dishes(self, prefix: str, limit: int = 10):
+        """(score, id, name) of the best dishes for a type-ahead prefix, for when the autocomplete index isn't loaded."""
+        if not fold(prefix):
+            return []
+        with self.get_read_cursor() as cur:
+            cur.execute(DISH_AUTOCOMPLETE_SQL, autocomplete_params(prefix, limit))
+            return cur.fetchall()
 
     def update_dish(self, id: int, dish: DishRequest) -> bool:
         with self.get_cursor() as cur:
-            sql1 = """
-                UPDATE Dish
-                SET name = %s,
-                    thumbnail = %s,
-                    isConfirm = %s,
-                    description = %s,
-                    preparationSteps = %s,
-                    cookingSteps = %s
-                WHERE id = %s;
-            """
-            value1 = (
-                dish.name,
-                dish.thumbnail,
-                dish.isConfirm,
-                dish.description,
-                dish.preparationSteps,
-                dish.cookingSteps,
-                id
-            )
-            cur.execute(sql1, value1)
+            cur.execute(UPDATE_DISH_SQL, (*dish_values(dish), id))
 
             if cur.rowcount == 0:
                 return False
 
-            sql2 = "DELETE FROM IngredientInDish WHERE DishId = %s;"
-            value2 = (id,)
-            cur.execute(sql2, value2)
+            cur.execute(DELETE_DISH_INGREDIENTS_SQL, (id,))
 
             if dish.ingredients:
-                sql2_insert = """
-                    INSERT INTO IngredientInDish (Dishid, Ingredientid, weight)
-                    VALUES (%s, %s, %s)
-                """
-                data_ing = [
-                    (id, ing.ingredientId, ing.weight)
-                    for ing in dish.ingredients
-                ]
-                cur.executemany(sql2_insert, data_ing)
-
-            sql3 = "DELETE FROM HashtagOfDish WHERE DishId = %s;"
-            value3 = (id,)
-            cur.execute(sql3, value3)
-
-            all_hashtags = []
+                cur.executemany(INSERT_DISH_INGREDIENT_SQL, dish_ingredient_rows(id, dish))
+
+            cur.execute(REFRESH_DISH_NUTRITION_BY_DISH_SQL, ([id],))
+            cur.execute(REFRESH_DAILY_MEAL_NUTRITION_BY_DISH_SQL, ([id],))
+
+            cur.execute(DELETE_DISH_HASHTAGS_SQL, (id,))
+
+            self.refresh_dish_hashtags([id], cur)
+
             if dish.hashtagId:
-                all_hashtags.extend(dish.hashtagId)
-
-            auto_hashtags = calculate_dish_hashtags(id)
-            if auto_hashtags:
-                all_hashtags.extend(auto_hashtags)
-
-            if all_hashtags:
-                sql3_insert = """
-                    INSERT INTO HashtagOfDish (Hashtagid, Dishid)
-                    VALUES (%s, %s)
-                """
-                data_hash = [(h_id, id) for h_id in all_hashtags]
-                cur.executemany(sql3_insert, data_hash)
+                cur.executemany(INSERT_DISH_HASHTAG_SQL, dish_hashtag_rows(id, dish))
             
             return True
 
     def get_ingredient_by_id(self, id: int):
-        with self.get_cursor() as cur:
-            sql = """
-                SELECT *
-                FROM public.ingredient
-                WHERE id = %s;
-            """
-            cur.execute(sql, (id,))
+        with self.get_read_cursor() as cur:
+            cur.execute(INGREDIENT_BY_ID_SQL, (id,))
             row = cur.fetchone()
-
-            if not row:
-                return None
-
-            return {
-                "id": row[0],
-                "name": row[1],
-                "thumbnail": row[2],
-                "baseUnit": row[3],
-                "gramPerUnit": row[4],
-                "isConfirm": row[5],
-                "kcal": row[6],
-                "carbs": row[7],
-                "sugar": row[8],
-                "fiber": row[9],
-                "protein": row[10],
-                "saturatedFat": row[11],
-                "monounSaturatedFat": row[12],
-                "polyunSaturatedFat": row[13],
-                "transFat": row[14],
-                "cholesterol": row[15],
-                "vitaminA": row[16],
-                "vitaminD": row[17],
-                "vitaminC": row[18],
-                "vitaminB6": row[19],
-                "vitaminB12": row[20],
-                "vitaminE": row[21],
-                "vitaminK": row[22],
-                "choline": row[23],
-                "canxi": row[24],
-                "fe": row[25],
-                "magie": row[26],
-                "photpho": row[27],
-                "kali": row[28],
-                "natri": row[29],
-                "zn": row[30],
-                "water": row[31],
-                "caffeine": row[32],
-                "alcohol": row[33],
-            }
+            return ingredient_from_row(row) if row else None
+
+    def get_ingredient_nutrients(self, ids: list[int] = None):
+        """Rows of (id, gramPerUnit, *NUTRIENT_COLUMNS) for the in-memory ingredient matrix; all ingredients when ids is None."""
+        with self.get_read_cursor() as cur:
+            cur.execute(*ingredient_nutrients_query(ids))
+            return cur.fetchall()
+
+    def get_ingredient_names(self):
+        """(id, name) of every ingredient, for the in-memory name index."""
+        with self.get_read_cursor() as cur:
+            cur.execute(INGREDIENT_NAMES_SQL)
+            return cur.fetchall()
+
+    def get_ingredient_popularity(self):
+        """(id, name, number of dishes using it) of every ingredient, for autocomplete ordering."""
+        with self.get_read_cursor() as cur:
+            cur.execute(INGREDIENT_POPULARITY_SQL)
+            return cur.fetchall()
+
+    def autocomplete_ingredients(self, prefix: str, limit: int = 10):
+        """(score, id, name) of the best ingredients for a type-ahead prefix, for when the autocomplete index isn't loaded."""
+        if not fold(prefix):
+            return []
+        with self.get_read_cursor() as cur:
+            cur.execute(INGREDIENT_AUTOCOMPLETE_SQL, autocomplete_params(prefix, limit))
+            return cur.fetchall()
 
     def insert_ingredient(self, ingredient: IngredientRequest) -> int:
         with self.get_cursor() as cur:
-            insert_sql = """
-                INSERT INTO Ingredient (
-                    name, thumbnail, baseUnit, gramPerUnit, isConfirm, kcal, carbs, sugar, fiber, protein,
-                    saturatedFat, monounSaturatedFat, polyunSaturatedFat, transFat, cholesterol,
-                    vitaminA, vitaminD, vitaminC, vitaminB6, vitaminB12, vitaminE, vitaminK,
-                    choline, canxi, fe, magie, photpho, kali, natri, zn, water, caffeine, alcohol
-                )
-                VALUES (
-                    %s, %s, %s, %s, %s, %s, %s, %s, %s, %s,
-                    %s, %s, %s, %s, %s,
-                    %s, %s, %s, %s, %s, %s, %s,
-                    %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s
-                )
-                RETURNING id;
-            """
-
-            values = (
-                ingredient.name,
-                ingredient.thumbnail,
-                ingredient.baseUnit,
-                ingredient.gramPerUnit,
-                ingredient.isConfirm,
-                ingredient.kcal,
-                ingredient.carbs,
-                ingredient.sugar,
-                ingredient.fiber,
-                ingredient.protein,
-                ingredient.saturatedFat,
-                ingredient.monounSaturatedFat,
-                ingredient.polyunSaturatedFat,
-                ingredient.transFat,
-                ingredient.cholesterol,
-                ingredient.vitaminA,
-                ingredient.vitaminD,
-                ingredient.vitaminC,
-                ingredient.vitaminB6,
-                ingredient.vitaminB12,
-                ingredient.vitaminE,
-                ingredient.vitaminK,
-                ingredient.choline,
-                ingredient.canxi,
-                ingredient.fe,
-                ingredient.magie,
-                ingredient.photpho,
-                ingredient.kali,
-                ingredient.natri,
-                ingredient.zn,
-                ingredient.water,
-                ingredient.caffeine,
-                ingredient.alcohol
-            )
-
-            cur.execute(insert_sql, values)
-            new_id = cur.fetchone()[0]
-            return new_id
+            cur.execute(INSERT_INGREDIENT_SQL, ingredient_values(ingredient))
+            return cur.fetchone()[0]
 
     def update_ingredient(self, ingredient: UpdateIngredientRequest):
         with self.get_cursor() as cur:
-            update_sql = """
-                UPDATE Ingredient
-                SET
-                    name = %s,
-                    thumbnail = %s,
-                    baseUnit = %s,
-                    gramPerUnit = %s,
-                    isConfirm = %s,
-                    kcal = %s,
-                    carbs = %s,
-                    sugar = %s,
-                    fiber = %s,
-                    protein = %s,
-                    saturatedFat = %s,
-                    monounSaturatedFat = %s,
-                    polyunSaturatedFat = %s,
-                    transFat = %s,
-                    cholesterol = %s,
-                    vitaminA = %s,
-                    vitaminD = %s,
-                    vitaminC = %s,
-                    vitaminB6 = %s,
-                    vitaminB12 = %s,
-                    vitaminE = %s,
-                    vitaminK = %s,
-                    choline = %s,
-                    canxi = %s,
-                    fe = %s,
-                    magie = %s,
-                    photpho = %s,
-                    kali = %s,
-                    natri = %s,
-                    zn = %s,
-                    water = %s,
-                    caffeine = %s,
-                    alcohol = %s
-                WHERE id = %s;
-            """
-
-            values = (
-                ingredient.name,
-                ingredient.thumbnail,
-                ingredient.baseUnit,
-                ingredient.gramPerUnit,
-                ingredient.isConfirm,
-                ingredient.kcal,
-                ingredient.carbs,
-                ingredient.sugar,
-                ingredient.fiber,
-                ingredient.protein,
-                ingredient.saturatedFat,
-                ingredient.monounSaturatedFat,
-                ingredient.polyunSaturatedFat,
-                ingredient.transFat,
-                ingredient.cholesterol,
-                ingredient.vitaminA,
-                ingredient.vitaminD,
-                ingredient.vitaminC,
-                ingredient.vitaminB6,
-                ingredient.vitaminB12,
-                ingredient.vitaminE,
-                ingredient.vitaminK,
-                ingredient.choline,
-                ingredient.canxi,
-                ingredient.fe,
-                ingredient.magie,
-                ingredient.photpho,
-                ingredient.kali,
-                ingredient.natri,
-                ingredient.zn,
-                ingredient.water,
-                ingredient.caffeine,
-                ingredient.alcohol,
-                ingredient.id
-            )
-
-            cur.execute(update_sql, values)
+            cur.execute(UPDATE_INGREDIENT_SQL, (*ingredient_values(ingredient), ingredient.id))
+            cur.execute(REFRESH_DISH_NUTRITION_BY_INGREDIENT_SQL, (ingredient.id,))
+            cur.execute(REFRESH_DAILY_MEAL_NUTRITION_BY_INGREDIENT_SQL, (ingredient.id,))
+            cur.execute(REFRESH_DISH_HASHTAGS_BY_INGREDIENT_SQL, (ingredient.id,))
@@ -1,58 +1,410 @@
 from app.repositories.base_repository import BaseRepository
-from app.schema.be_models import AddNotificationRequest
+from app.schema.be_models import AddNotificationRequest, BroadcastNotificationRequest
+import json
 import logging
 
 logger = logging.getLogger(__name__)
 
+USER_TOKEN_SQL = "SELECT token FROM public.userinfo WHERE id = %s;"
+
+CREATE_NOTIFICATION_SQL = """
+    INSERT INTO notification (senderId, receiverId, type, content, relatedId)
+    VALUES
+    (%s, %s, %s, %s, %s)
+    RETURNING id;
+"""
+
+MARK_READ_SQL = "UPDATE public.notification SET status = 'READ' WHERE id = %s"
+
+def notification_values(notification: AddNotificationRequest) -> tuple:
+    return (notification.senderId, notification.receiverId, notification.type, notification.content, notification.relatedId)
+
+# The notification and its push are written in one statement, so a push is never lost or sent for a rolled back row.
+CREATE_NOTIFICATION_WITH_PUSH_SQL = """
+    WITH n AS (
+        INSERT INTO notification (senderId, receiverId, type, content, relatedId)
+        VALUES (%s, %s, %s, %s, %s)
+        RETURNING id
+    )
+    INSERT INTO public.notification_outbox (notificationid, token, title, body)
+    SELECT n.id, %s, %s, %s FROM n
+    RETURNING notificationid;
+"""
+
+# Due rows (new, retry time reached, or SENDING past its lease) are leased to the caller; concurrent
+# dispatchers skip each other's rows.
+CLAIM_OUTBOX_SQL = """
+    UPDATE public.notification_outbox o
+    SET status = 'SENDING',
+        attempts = o.attempts + 1,
+        nextattemptat = now() + make_interval(secs => %s)
+    WHERE o.id IN (
+        SELECT id FROM public.notification_outbox
+        WHERE status IN ('PENDING', 'SENDING') AND nextattemptat <= now()
+        ORDER BY nextattemptat
+        LIMIT %s
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING o.id, o.token, o.title, o.body, o.attempts;
+"""
+
+MARK_OUTBOX_SENT_SQL = """
+    UPDATE public.notification_outbox
+    SET status = 'SENT', sentat = now(), lasterror = NULL
+    WHERE id = ANY(%s);
+"""
+
+MARK_OUTBOX_RETRY_SQL = """
+    UPDATE public.notification_outbox o
+    SET status = 'PENDING', nextattemptat = now() + make_interval(secs => v.delay), lasterror = v.error
+    FROM unnest(%s::bigint[], %s::float8[], %s::text[]) AS v(id, delay, error)
+    WHERE o.id = v.id;
+"""
+
+MARK_OUTBOX_FAILED_SQL = """
+    UPDATE public.notification_outbox o
+    SET status = 'FAILED', lasterror = v.error
+    FROM unnest(%s::bigint[], %s::text[]) AS v(id, error)
+    WHERE o.id = v.id;
+"""
+
+DELIVERY_STATUS_SQL = """
+    SELECT status, attempts, lasterror, createdat, sentat
+    FROM public.notification_outbox
+    WHERE notificationid = %s
+    ORDER BY id DESC
+    LIMIT 1;
+"""
+
+CREATE_BROADCAST_SQL = """
+    INSERT INTO public.notification_broadcast (senderid, type, content, relatedid, title, segment)
+    VALUES (%(sender)s, %(type)s, %(content)s, %(related)s, %(title)s, %(segment)s::jsonb)
+    RETURNING id;
+"""
+
+# One notification per user of the segment; a NULL filter matches everyone.
+INSERT_BROADCAST_NOTIFICATIONS_SQL = """
+    INSERT INTO public.notification (senderid, receiverid, type, content, relatedid, broadcastid)
+    SELECT %(sender)s, u.id, %(type)s, %(content)s, %(related)s, %(broadcast)s
+    FROM public.userinfo u
+    WHERE (%(health)s::int[] IS NULL OR EXISTS (
+              SELECT 1 FROM public.healthstatususer h
+              WHERE h.userinfoid = u.id AND h.healthstatusid = ANY(%(health)s::int[])
+          ))
+      AND (%(diets)s::int[] IS NULL OR u.dietid = ANY(%(diets)s::int[]))
+      AND (%(gender)s::text IS NULL OR u.gender = %(gender)s::text);
+"""
+
+SET_BROADCAST_RECIPIENTS_SQL = """
+    UPDATE public.notification_broadcast SET recipients = %s WHERE id = %s;
+"""
+
+# Broadcasts not being sent by a live dispatcher: new ones, and those whose lease ran out.
+CLAIM_BROADCASTS_SQL = """
+    UPDATE public.notification_broadcast b
+    SET leaseuntil = now() + make_interval(secs => %s)
+    WHERE b.id IN (
+        SELECT id FROM public.notification_broadcast
+        WHERE status = 'SENDING' AND leaseuntil <= now()
+        ORDER BY id
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING b.id, b.title, b.content, b.lastnotificationid;
+"""
+
+BROADCAST_TOKENS_SQL = """
+    SELECT n.id, u.token
+    FROM public.notification n
+    JOIN public.userinfo u ON u.id = n.receiverid
+    WHERE n.broadcastid = %s AND n.id > %s
+      AND u.token IS NOT NULL AND u.token <> ''
+    ORDER BY n.id;
+"""
+
+QUEUE_OUTBOX_SQL = """
+    INSERT INTO public.notification_outbox (notificationid, token, title, body, status, attempts, nextattemptat, lasterror)
+    SELECT v.notificationid, v.token, %s, %s, %s, 1, now() + make_interval(secs => v.delay), v.error
+    FROM unnest(%s::int[], %s::text[], %s::float8[], %s::text[]) AS v(notificationid, token, delay, error);
+"""
+
+BROADCAST_PROGRESS_SQL = """
+    UPDATE public.notification_broadcast
+    SET pushed = pushed + %s, retried = retried + %s, failed = failed + %s,
+        lastnotificationid = GREATEST(lastnotificationid, %s),
+        leaseuntil = now() + make_interval(secs => %s)
+    WHERE id = %s;
+"""
+
+FINISH_BROADCAST_SQL = """
+    UPDATE public.notification_broadcast SET status = 'DONE', finishedat = now() WHERE id = %s;
+"""
+
+BROADCAST_SQL = """
+    SELECT id, senderid, type, content, title, segment, status, recipients, pushed, retried, failed, createdat, finishedat
+    FROM public.notification_broadcast
+    WHERE id = %s;
+"""
+
+def broadcast_segment(request: BroadcastNotificationRequest) -> dict:
+    return {"healthStatusIds": request.healthStatusIds, "dietIds": request.dietIds, "gender": request.gender}
+
+def broadcast_params(request: BroadcastNotificationRequest, title: str) -> dict:
+    return {
+        "sender": request.senderId,
+        "type": request.type,
+        "content": request.content,
+        "related": request.relatedId,
+        "title": title,
+        "segment": json.dumps(broadcast_segment(request)),
+        "health": request.healthStatusIds,
+        "diets": request.dietIds,
+        "gender": request.gender,
+    }
+
+def broadcast_from_row(row) -> dict:
+    return {
+        "id": row[0],
+        "senderId": row[1],
+        "type": row[2],
+        "content": row[3],
+        "title": row[4],
+        "segment": row[5],
+        "status": row[6],
+        "recipients": row[7],
+        "pushed": row[8],
+        "retried": row[9],
+        "failed": row[10],
+        "createdAt": row[11],
+        "finishedAt": row[12],
+    }
+
+def outbox_rows(items: list[tuple]) -> tuple[list, list, list, list]:
+    """Columns of (notification id, token, delay, error) rows, for the unnest() of QUEUE_OUTBOX_SQL."""
+    if not items:
+        return [], [], [], []
+    return tuple(list(column) for column in zip(*items))
+
+# Inbox pages: newest first by (createdat, id), served by notification_receiverid_createdat_idx, or by the
+# partial notification_unread_idx for unread-only pages. The sender name is joined for the page rows only.
+INBOX_SELECT = """
+    SELECT n.id, u.fullname, n.type, n.content, n.createdat, n.status
+    FROM public.notification n
+    JOIN public.userinfo u ON n.senderid = u.id
+    WHERE n.receiverid = %s
+"""
+INBOX_UNREAD = " AND n.status = 'UNREAD'"
+INBOX_AFTER = " AND (n.createdat, n.id) < (%s, %s)"
+INBOX_ORDER = """
+    ORDER BY n.createdat DESC, n.id DESC
+    LIMIT %s;
+"""
+
+COUNT_UNREAD_SQL = """
+    SELECT COUNT(*) FROM public.notification WHERE receiverid = %s AND status = 'UNREAD';
+"""
+
+MARK_ALL_READ_SQL = """
+    UPDATE public.notification SET status = 'READ' WHERE receiverid = %s AND status = 'UNREAD';
+"""
+
+MARK_READ_BY_IDS_SQL = """
+    UPDATE public.notification SET status = 'READ'
+    WHERE receiverid = %s AND id = ANY(%s) AND status = 'UNREAD';
+"""
+
+def inbox_page_query(receiver_id: int, limit: int, after: tuple = None, unread_only: bool = False) -> tuple[str, tuple]:
+    # Only the filters in use are part of the statement, so each variant gets its own plan.
+    sql = INBOX_SELECT + (INBOX_UNREAD if unread_only else "")
+    params = (receiver_id,)
+    if after is not None:
+        sql += INBOX_AFTER
+        params += tuple(after)
+    return sql + INBOX_ORDER, params + (limit,)
+
+def inbox_item_from_row(row) -> dict:
+    return {
+        "id": row[0],
+        "fullname": row[1],
+        "type": row[2],
+        "content": row[3],
+        "createAt": row[4],
+        "status": row[5]
+    }
+
+# Inbox rows as GET /notification/{receiver_id} returns them, plus the receiver for routing stream events.
+# They are read on the primary: the NOTIFY that asks for them can arrive before a replica has the rows.
+NOTIFICATION_EVENT_SELECT = """
+    SELECT n.id, u.fullname, n.type, n.content, n.createdat, n.status, n.receiverid
+    FROM public.notification n
+    JOIN public.userinfo u ON n.senderid = u.id
+"""
+
+NOTIFICATIONS_BY_IDS_SQL = NOTIFICATION_EVENT_SELECT + """
+    WHERE n.id = ANY(%s)
+    ORDER BY n.id;
+"""
+
+BROADCAST_NOTIFICATIONS_FOR_SQL = NOTIFICATION_EVENT_SELECT + """
+    WHERE n.broadcastid = %s AND n.receiverid = ANY(%s)
+    ORDER BY n.id;
+"""
+
+# Catch-up after a stream reconnect (Last-Event-ID).
+NOTIFICATIONS_AFTER_SQL = NOTIFICATION_EVENT_SELECT + """
+    WHERE n.receiverid = %s AND n.id > %s
+    ORDER BY n.id
+    LIMIT %s;
+"""
+
+def notification_event_from_row(row) -> dict:
+    return {
+        "id": row[0],
+        "fullname": row[1],
+        "type": row[2],
+        "content": row[3],
+        "createAt": row[4],
+        "status": row[5],
+        "receiverId": row[6],
+    }
+
+def delivery_from_row(row) -> dict:
+    return {
+        "status": row[0],
+        "attempts": row[1],
+        "lastError": row[2],
+        "queuedAt": row[3],
+        "sentAt": row[4],
+    }
+
 class NotificationRepository(BaseRepository):
     def get_user_token(self, user_id: int):
         with self.get_cursor() as cur:
-            cur.execute("SELECT token FROM public.userinfo WHERE id = %s;", (user_id,))
+            cur.execute(USER_TOKEN_SQL, (user_id,))
             row = cur.fetchone()
             return row[0] if row else None
 
     def create_notification(self, notification: AddNotificationRequest) -> int:
         with self.get_cursor() as cur:
-            insert_sql = """
-                INSERT INTO notification (senderId, receiverId, type, content, relatedId)
-                VALUES
-                (%s, %s, %s, %s, %s)
-                RETURNING id;
-            """
-            values = (notification.senderId, notification.receiverId, notification.type, notification.content, notification.relatedId)
-            cur.execute(insert_sql, values)
+            cur.execute(CREATE_NOTIFICATION_SQL, notification_values(notification))
+            return cur.fetchone()[0]
+
+    def create_notification_with_push(self, notification: AddNotificationRequest, token: str, title: str) -> int:
+        """Insert the notification and queue its push in the outbox. Returns the notification id."""
+        with self.get_cursor() as cur:
+            cur.execute(CREATE_NOTIFICATION_WITH_PUSH_SQL, (*notification_values(notification), token, title, notification.content))
             return cur.fetchone()[0]
 
-    def get_notifications_by_receiver(self, receiver_id: int):
-        with self.get_cursor() as cur:
-            sql = """
-                SELECT
-                  n.id,
-                  u.fullname,
-                  n.type,
-                  n.content,
-                  n.createdat,
-                  n.status
-                FROM public.notification n
-                JOIN public.userinfo u ON n.senderid = u.id 
-                WHERE n.receiverid = %s
-                ORDER BY n.createdat DESC;
-            """
-            cur.execute(sql, (receiver_id,))
-            rows = cur.fetchall()
-            return [
-                {
-                    "id": row[0], 
-                    "fullname": row[1],
-                    "type": row[2],
-                    "content": row[3],
-                    "createAt": row[4],
-                    "status": row[5]
-                }
-                for row in rows
-            ]
+    def claim_outbox(self, limit: int, lease: float) -> list[tuple]:
+        """Lease up to limit due pushes: (id, token, title, body, attempts)."""
+        with self.get_cursor() as cur:
+            cur.execute(CLAIM_OUTBOX_SQL, (lease, limit))
+            return cur.fetchall()
+
+    def complete_outbox(self, sent: list[int], retries: list[tuple], failures: list[tuple]):
+        """Record a batch outcome: sent ids, (id, delay seconds, error) to retry and (id, error) that failed for good."""
+        with self.get_cursor() as cur:
+            if sent:
+                cur.execute(MARK_OUTBOX_SENT_SQL, (sent,))
+            if retries:
+                ids, delays, errors = zip(*retries)
+                cur.execute(MARK_OUTBOX_RETRY_SQL, (list(ids), list(delays), list(errors)))
+            if failures:
+                ids, errors = zip(*failures)
+                cur.execute(MARK_OUTBOX_FAILED_SQL, (list(ids), list(errors)))
+
+    def create_broadcast(self, request: BroadcastNotificationRequest, title: str) -> dict:
+        """Insert the broadcast and one notification per user of its segment, in one transaction."""
+        params = broadcast_params(request, title)
+        with self.get_cursor() as cur:
+            cur.execute(CREATE_BROADCAST_SQL, params)
+            params["broadcast"] = cur.fetchone()[0]
+            cur.execute(INSERT_BROADCAST_NOTIFICATIONS_SQL, params)
+            recipients = cur.rowcount
+            cur.execute(SET_BROADCAST_RECIPIENTS_SQL, (recipients, params["broadcast"]))
+            return {"id": params["broadcast"], "recipients": recipients}
+
+    def claim_broadcasts(self, lease: float) -> list[tuple]:
+        """Lease the broadcasts left to send: (id, title, body, last notification id already pushed)."""
+        with self.get_cursor() as cur:
+            cur.execute(CLAIM_BROADCASTS_SQL, (lease,))
+            return cur.fetchall()
+
+    def iter_broadcast_tokens(self, broadcast_id: int, after_id: int = 0, batch_size: int = 500):
+        """Yield lists of at most batch_size (notification id, token), read through a server-side cursor."""
+        with self.get_named_cursor("broadcast_tokens") as cur:
+            cur.execute(BROADCAST_TOKENS_SQL, (broadcast_id, after_id))
+            while True:
+                rows = cur.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield rows
+
+    def record_broadcast_progress(self, broadcast_id: int, title: str, body: str, pushed: int,
+                                  retries: list[tuple], failures: list[tuple], last_id: int, lease: float):
+        """
+        Count a sent window and extend the lease. Pushes are (notification id, token, delay, error) rows:
+        retryable ones move to the outbox, permanent failures are kept there as FAILED so their delivery
+        status is visible.
+        """
+        with self.get_cursor() as cur:
+            if retries:
+                cur.execute(QUEUE_OUTBOX_SQL, (title, body, "PENDING", *outbox_rows(retries)))
+            if failures:
+                cur.execute(QUEUE_OUTBOX_SQL, (title, body, "FAILED", *outbox_rows(failures)))
+            cur.execute(BROADCAST_PROGRESS_SQL, (pushed, len(retries), len(failures), last_id, lease, broadcast_id))
+
+    def finish_broadcast(self, broadcast_id: int):
+        with self.get_cursor() as cur:
+            cur.execute(FINISH_BROADCAST_SQL, (broadcast_id,))
+
+    def get_broadcast(self, broadcast_id: int):
+        with self.get_read_cursor() as cur:
+            cur.execute(BROADCAST_SQL, (broadcast_id,))
+            row = cur.fetchone()
+            return broadcast_from_row(row) if row else None
+
+    def get_notifications_by_ids(self, ids: list[int]) -> list[dict]:
+        with self.get_cursor() as cur:
+            cur.execute(NOTIFICATIONS_BY_IDS_SQL, (ids,))
+            return [notification_event_from_row(row) for row in cur.fetchall()]
+
+    def get_broadcast_notifications_for(self, broadcast_id: int, receiver_ids: list[int]) -> list[dict]:
+        """Notifications of a broadcast addressed to the given receivers."""
+        with self.get_cursor() as cur:
+            cur.execute(BROADCAST_NOTIFICATIONS_FOR_SQL, (broadcast_id, receiver_ids))
+            return [notification_event_from_row(row) for row in cur.fetchall()]
+
+    def get_notifications_after(self, receiver_id: int, after_id: int, limit: int = 100) -> list[dict]:
+        with self.get_cursor() as cur:
+            cur.execute(NOTIFICATIONS_AFTER_SQL, (receiver_id, after_id, limit))
+            return [notification_event_from_row(row) for row in cur.fetchall()]
+
+    def get_delivery_status(self, notification_id: int):
+        with self.get_read_cursor() as cur:
+            cur.execute(DELIVERY_STATUS_SQL, (notification_id,))
+            row = cur.fetchone()
+            return delivery_from_row(row) if row else None
+
+    def get_notifications_by_receiver(self, receiver_id: int, limit: int, after: tuple = None, unread_only: bool = False):
+        """Newest first, at most limit rows older than the (createdat, id) keyset position after."""
+        with self.get_read_cursor() as cur:
+            cur.execute(*inbox_page_query(receiver_id, limit, after, unread_only))
+            return [inbox_item_from_row(row) for row in cur.fetchall()]
+
+    def count_unread(self, receiver_id: int) -> int:
+        with self.get_read_cursor() as cur:
+            cur.execute(COUNT_UNREAD_SQL, (receiver_id,))
+            return cur.fetchone()[0]
 
     def mark_read(self, id: int):
         with self.get_cursor() as cur:
-            sql = "UPDATE public.notification SET status = 'READ' WHERE id = %s"
-            cur.execute(sql, (id,))
+            cur.execute(MARK_READ_SQL, (id,))
+
+    def mark_read_bulk(self, receiver_id: int, ids: list[int] = None) -> int:
+        """Mark the given notifications of a receiver, or all its unread ones, as read. Returns the number changed."""
+        with self.get_cursor() as cur:
+            if ids is None:
+                cur.execute(MARK_ALL_READ_SQL, (receiver_id,))
+            else:
+                cur.execute(MARK_READ_BY_IDS_SQL, (receiver_id, ids))
+            return cur.rowcount
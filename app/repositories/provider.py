@@ -0,0 +1,33 @@
+from app.core.config import settings
+from app.repositories.user_repository import UserRepository
+from app.repositories.food_repository import FoodRepository
+from app.repositories.tracking_repository import TrackingRepository
+from app.repositories.notification_repository import NotificationRepository
+
+def use_async_repository(service_name: str) -> bool:
+    services = settings.DB_ASYNC_SERVICES
+    return "all" in services or service_name in services
+
+def get_user_repository():
+    if use_async_repository("user"):
+        from app.repositories.async_user_repository import AsyncUserRepository
+        return AsyncUserRepository()
+    return UserRepository()
+
+def get_food_repository():
+    if use_async_repository("food"):
+        from app.repositories.async_food_repository import AsyncFoodRepository
+        return AsyncFoodRepository()
+    return FoodRepository()
+
+def get_tracking_repository():
+    if use_async_repository("tracking"):
+        from app.repositories.async_tracking_repository import AsyncTrackingRepository
+        return AsyncTrackingRepository()
+    return TrackingRepository()
+
+def get_notification_repository():
+    if use_async_repository("notification"):
+        from app.repositories.async_notification_repository import AsyncNotificationRepository
+        return AsyncNotificationRepository()
+    return NotificationRepository()
@@ -1,291 +1,505 @@
-from app.repositories.base_repository import BaseRepository
+from app.repositories.base_repository import BaseRepository, day_range, values_placeholders
 from app.schema.be_models import AddMealRequest, AddDrinkRequest, AddExerciseRequest
+from app.helpers.nutrition_calculations import NUTRIENTS, NUTRIENT_COLUMNS
 from datetime import date
 import logging
 
 logger = logging.getLogger(__name__)
 
+def nutri_meal_from_row(r) -> dict:
+    return {
+        "kcal": r[0],
+        "totalCarbs": r[1]+r[2]+r[3],
+        "carbs": r[1],
+        "sugar": r[2],
+        "fiber": r[3],
+        "protein": r[4],
+        "totalFats": r[1]+r[2]+r[3],
+        "saturatedFat": r[5],
+        "monounSaturatedFat": r[6],
+        "polyunSaturatedFat": r[7],
+        "transFat": r[8],
+        "cholesterol": r[9],
+        "vitaminA": r[10],
+        "vitaminC": r[11],
+        "vitaminD": r[12],
+        "vitaminB6": r[13],
+        "vitaminB12": r[14],
+        "vitaminE": r[15],
+        "vitaminK": r[16],
+        "choline": r[17],
+        "canxi": r[18],
+        "fe": r[19],
+        "magie": r[20],
+        "photpho": r[21],
+        "kali": r[22],
+        "natri": r[23],
+        "zn": r[24],
+        "water": r[25],
+        "caffeine": r[26],
+        "alcohol": r[27],
+    }
+
+def meal_from_row(r) -> dict:
+    return {"id": r[0], "name": r[1], "thumbnail": r[2], "weight": r[3], "isConfirm": r[4], "createdAt": r[5], "kcal": r[6]}
+
+def drink_from_row(r) -> dict:
+    return {"id": r[0], "amount": r[1], "baseUnit": r[2], "thumbnail": r[3], "createdAt": r[4]}
+
+def exercise_from_row(r) -> dict:
+    return {"id": r[0], "nameExercise": r[1], "thumbnail": r[2], "level": r[3], "minute": r[4], "kcalPerMin": r[5], "createdAt": r[6]}
+
+# Meals of dishes without ingredients (dish_nutrition.totalweight = 0) are left out of the day's lists and
+# sums, as they were when these queries joined IngredientInDish directly.
+
+# Everything the day view shows, in one round trip. Lists come back as JSON arrays of positional
+# rows so the same *_from_row mappers apply; %(userId)s, %(start)s and %(end)s are named parameters.
+DAY_SUMMARY_SQL = f"""
+    WITH meal_rows AS (
+        SELECT mu.id, d.name, d.thumbnail, mu.weight, d.isConfirm, mu.createdAt,
+               dn.kcal * mu.weight / NULLIF(dn.totalweight, 0) AS meal_kcal,
+               mu.mealType, dn.totalweight,
+               {", ".join(f"dn.{c}" for c in NUTRIENT_COLUMNS)}
+        FROM MealOfUser mu
+        JOIN Dish d ON mu.Dishid = d.id
+        JOIN dish_nutrition dn ON d.id = dn.dishid AND dn.totalweight > 0
+        WHERE mu.UserInfoid = %(userId)s
+        AND mu.time >= %(start)s AND mu.time < %(end)s
+    ),
+    drink_rows AS (
+        SELECT d.id, d.amount, u.baseUnit, u.thumbnail, d.createdAt, d.amount * u.mlPerUnit AS ml
+        FROM DrinkOfUser d
+        JOIN UnitDrink u ON d.UnitDrinkid = u.id
+        WHERE d.UserInfoid = %(userId)s
+        AND d.time >= %(start)s AND d.time < %(end)s
+    ),
+    exercise_rows AS (
+        SELECT eu.id, e.nameExercise, e.thumbnail, le.level, eu.minute, le.kcalPerMin, eu.createdAt
+        FROM ExerciseOfUser eu
+        JOIN LevelExercise le ON eu.LevelExerciseid = le.id
+        JOIN Exercise e ON le.Exerciseid = e.id
+        WHERE eu.UserInfoid = %(userId)s
+        AND eu.time >= %(start)s AND eu.time < %(end)s
+    )
+    SELECT
+        (SELECT json_build_array({", ".join(f"SUM({c} * weight / NULLIF(totalweight, 0))" for c in NUTRIENT_COLUMNS)})
+         FROM meal_rows HAVING COUNT(*) > 0) AS nutri,
+        (SELECT json_agg(json_build_array(id, name, thumbnail, weight, isConfirm, createdAt, meal_kcal, mealType) ORDER BY createdAt)
+         FROM meal_rows) AS meals,
+        (SELECT json_agg(json_build_array(id, amount, baseUnit, thumbnail, createdAt) ORDER BY createdAt)
+         FROM drink_rows) AS drinks,
+        (SELECT COALESCE(SUM(ml), 0) FROM drink_rows) AS total_water,
+        (SELECT json_agg(json_build_array(id, nameExercise, thumbnail, level, minute, kcalPerMin, createdAt) ORDER BY createdAt)
+         FROM exercise_rows) AS exercises,
+        (SELECT COALESCE(SUM(minute * kcalPerMin), 0) FROM exercise_rows) AS total_kcal;
+"""
+
+def day_summary_from_row(r) -> dict:
+    meals = {}
+    for m in r[1] or []:
+        meals.setdefault(m[7], []).append(meal_from_row(m))
+    return {
+        "nutriMeal": nutri_meal_from_row(r[0]) if r[0] else {},
+        "statMeals": meals,
+        "statDrinks": [drink_from_row(d) for d in r[2] or []],
+        "totalWater": r[3],
+        "statExercises": [exercise_from_row(e) for e in r[4] or []],
+        "totalKcal": r[5],
+    }
+
+# Incremental maintenance of daily_user_nutrition (database/migrations/003_daily_user_nutrition.sql):
+# each statement adds %(sign)s times the contribution of the rows in %(ids)s, so it runs with +1
+# after they are inserted and with -1 just before they are deleted.
+ROLLUP_MEAL_SQL = f"""
+    INSERT INTO daily_user_nutrition AS dun (userinfoid, day, mealcount, {", ".join(NUTRIENT_COLUMNS)})
+    SELECT mu.UserInfoid, mu.time::date, %(sign)s * COUNT(*),
+           {", ".join(f"%(sign)s * COALESCE(SUM(dn.{c} * mu.weight / NULLIF(dn.totalweight, 0)), 0)" for c in NUTRIENT_COLUMNS)}
+    FROM MealOfUser mu
+    LEFT JOIN dish_nutrition dn ON mu.Dishid = dn.dishid
+    WHERE mu.id = ANY(%(ids)s) AND mu.UserInfoid IS NOT NULL AND mu.time IS NOT NULL
+    GROUP BY mu.UserInfoid, mu.time::date
+    ON CONFLICT (userinfoid, day) DO UPDATE SET
+        mealcount = dun.mealcount + EXCLUDED.mealcount,
+        {", ".join(f"{c} = dun.{c} + EXCLUDED.{c}" for c in NUTRIENT_COLUMNS)},
+        updatedat = CURRENT_TIMESTAMP;
+"""
+
+ROLLUP_DRINK_SQL = """
+    INSERT INTO daily_user_nutrition AS dun (userinfoid, day, drinkwater)
+    SELECT d.UserInfoid, d.time::date, %(sign)s * COALESCE(SUM(d.amount * ud.mlPerUnit), 0)
+    FROM DrinkOfUser d
+    JOIN UnitDrink ud ON d.UnitDrinkid = ud.id
+    WHERE d.id = ANY(%(ids)s) AND d.UserInfoid IS NOT NULL AND d.time IS NOT NULL
+    GROUP BY d.UserInfoid, d.time::date
+    ON CONFLICT (userinfoid, day) DO UPDATE SET
+        drinkwater = dun.drinkwater + EXCLUDED.drinkwater,
+        updatedat = CURRENT_TIMESTAMP;
+"""
+
+ROLLUP_EXERCISE_SQL = """
+    INSERT INTO daily_user_nutrition AS dun (userinfoid, day, kcalburned)
+    SELECT eou.UserInfoid, eou.time::date, %(sign)s * COALESCE(SUM(eou.minute * le.kcalPerMin), 0)
+    FROM ExerciseOfUser eou
+    JOIN LevelExercise le ON eou.LevelExerciseid = le.id
+    WHERE eou.id = ANY(%(ids)s)
+    GROUP BY eou.UserInfoid, eou.time::date
+    ON CONFLICT (userinfoid, day) DO UPDATE SET
+        kcalburned = dun.kcalburned + EXCLUDED.kcalburned,
+        updatedat = CURRENT_TIMESTAMP;
+"""
+
+# Recomputes the meal part of every (user, day) that has a meal matched by {where}; used when dish
+# nutrition changes, since the deltas above were taken with the old values.
+REFRESH_DAILY_MEAL_NUTRITION_SQL = f"""
+    INSERT INTO daily_user_nutrition AS dun (userinfoid, day, mealcount, {", ".join(NUTRIENT_COLUMNS)})
+    SELECT mu.UserInfoid, mu.time::date, COUNT(*),
+           {", ".join(f"COALESCE(SUM(dn.{c} * mu.weight / NULLIF(dn.totalweight, 0)), 0)" for c in NUTRIENT_COLUMNS)}
+    FROM MealOfUser mu
+    LEFT JOIN dish_nutrition dn ON mu.Dishid = dn.dishid
+    WHERE (mu.UserInfoid, mu.time::date) IN (
+        SELECT UserInfoid, time::date
+        FROM MealOfUser
+        WHERE UserInfoid IS NOT NULL AND time IS NOT NULL AND {{where}}
+    )
+    GROUP BY mu.UserInfoid, mu.time::date
+    ON CONFLICT (userinfoid, day) DO UPDATE SET
+        mealcount = EXCLUDED.mealcount,
+        {", ".join(f"{c} = EXCLUDED.{c}" for c in NUTRIENT_COLUMNS)},
+        updatedat = CURRENT_TIMESTAMP;
+"""
+
+REFRESH_DAILY_MEAL_NUTRITION_BY_DISH_SQL = REFRESH_DAILY_MEAL_NUTRITION_SQL.format(where="Dishid = ANY(%s)")
+REFRESH_DAILY_MEAL_NUTRITION_BY_INGREDIENT_SQL = REFRESH_DAILY_MEAL_NUTRITION_SQL.format(
+    where="Dishid IN (SELECT Dishid FROM IngredientInDish WHERE Ingredientid = %s)"
+)
+
+DAILY_NUTRITION_RANGE_SQL = f"""
+    SELECT day, mealcount, {", ".join(NUTRIENT_COLUMNS)}, drinkwater, kcalburned
+    FROM daily_user_nutrition
+    WHERE userinfoid = %s
+    AND day >= %s AND day <= %s
+    ORDER BY day;
+"""
+
+def daily_nutrition_from_row(r) -> dict:
+    return {
+        "date": r[0],
+        "mealCount": r[1],
+        "nutrients": {key: v for (_, key), v in zip(NUTRIENTS, r[2:-2])},
+        "totalWater": r[-2],
+        "totalKcalBurned": r[-1],
+    }
+
+# Meals of dishes without ingredients are left out here too (see DAY_SUMMARY_SQL).
+TOTAL_NUTRI_MEAL_SQL = """
+    SELECT 
+    SUM(dn.kcal * mu.weight / NULLIF(dn.totalweight, 0)) AS total_kcal,
+    SUM(dn.carbs * mu.weight / NULLIF(dn.totalweight, 0)) AS total_carbs,
+    SUM(dn.sugar * mu.weight / NULLIF(dn.totalweight, 0)) AS total_sugar,
+    SUM(dn.fiber * mu.weight / NULLIF(dn.totalweight, 0)) AS total_fiber,
+    SUM(dn.protein * mu.weight / NULLIF(dn.totalweight, 0)) AS total_protein,
+    SUM(dn.saturatedfat * mu.weight / NULLIF(dn.totalweight, 0)) AS total_saturatedFat,
+    SUM(dn.monounsaturatedfat * mu.weight / NULLIF(dn.totalweight, 0)) AS total_monounSaturatedFat,
+    SUM(dn.polyunsaturatedfat * mu.weight / NULLIF(dn.totalweight, 0)) AS total_polyunSaturatedFat,
+    SUM(dn.transfat * mu.weight / NULLIF(dn.totalweight, 0)) AS total_transFat,
+    SUM(dn.cholesterol * mu.weight / NULLIF(dn.totalweight, 0)) AS total_cholesterol,
+    SUM(dn.vitamina * mu.weight / NULLIF(dn.totalweight, 0)) AS total_vitaminA,
+    SUM(dn.vitaminc * mu.weight / NULLIF(dn.totalweight, 0)) AS total_vitaminC,
+    SUM(dn.vitamind * mu.weight / NULLIF(dn.totalweight, 0)) AS total_vitaminD,
+    SUM(dn.vitaminb6 * mu.weight / NULLIF(dn.totalweight, 0)) AS total_vitaminB6,
+    SUM(dn.vitaminb12 * mu.weight / NULLIF(dn.totalweight, 0)) AS total_vitaminB12,
+    SUM(dn.vitamine * mu.weight / NULLIF(dn.totalweight, 0)) AS total_vitaminE,
+    SUM(dn.vitamink * mu.weight / NULLIF(dn.totalweight, 0)) AS total_vitaminK,
+    SUM(dn.choline * mu.weight / NULLIF(dn.totalweight, 0)) AS total_choline,
+    SUM(dn.canxi * mu.weight / NULLIF(dn.totalweight, 0)) AS total_canxi,
+    SUM(dn.fe * mu.weight / NULLIF(dn.totalweight, 0)) AS total_fe,
+    SUM(dn.magie * mu.weight / NULLIF(dn.totalweight, 0)) AS total_magie,
+    SUM(dn.photpho * mu.weight / NULLIF(dn.totalweight, 0)) AS total_photpho,
+    SUM(dn.kali * mu.weight / NULLIF(dn.totalweight, 0)) AS total_kali,
+    SUM(dn.natri * mu.weight / NULLIF(dn.totalweight, 0)) AS total_natri,
+    SUM(dn.zn * mu.weight / NULLIF(dn.totalweight, 0)) AS total_zn,
+    SUM(dn.water * mu.weight / NULLIF(dn.totalweight, 0)) AS total_water,
+    SUM(dn.caffeine * mu.weight / NULLIF(dn.totalweight, 0)) AS total_cafeine,
+    SUM(dn.alcohol * mu.weight / NULLIF(dn.totalweight, 0)) AS total_alcohol
+    FROM MealOfUser mu
+    JOIN dish_nutrition dn ON mu.Dishid = dn.dishid AND dn.totalweight > 0
+    WHERE mu.UserInfoid = %s
+    AND mu.time >= %s AND mu.time < %s
+    GROUP BY mu.UserInfoid;
+"""
+
+MEALS_IN_DAY_SQL = """
+    SELECT 
+    mu.id,
+    d.name,
+    d.thumbnail,
+    mu.weight,
+    d.isConfirm,
+    mu.createdAt,
+    dn.kcal * mu.weight / NULLIF(dn.totalweight, 0) AS kcal
+    FROM MealOfUser mu
+    JOIN Dish d ON mu.Dishid = d.id
+    JOIN dish_nutrition dn ON d.id = dn.dishid AND dn.totalweight > 0
+    WHERE mu.UserInfoid = %s
+    AND mu.mealType = %s
+    AND mu.time >= %s AND mu.time < %s
+    ORDER BY mu.createdAt;
+"""
+
+DRINKS_IN_DAY_SQL = """
+    SELECT 
+    d.id,
+    d.amount,
+    u.baseUnit,
+    u.thumbnail,
+    d.createdAt
+    FROM DrinkOfUser d
+    JOIN UnitDrink u ON d.UnitDrinkid = u.id
+    WHERE d.UserInfoid = %s
+    AND d.time >= %s AND d.time < %s
+    ORDER BY d.createdAt;
+"""
+
+TOTAL_WATER_SQL = """
+    SELECT 
+    SUM(d.amount * ud.mlPerUnit) AS total_ml
+    FROM DrinkOfUser d
+    JOIN UnitDrink ud ON d.UnitDrinkid = ud.id
+    JOIN UserInfo u ON d.UserInfoid = u.id
+    WHERE d.UserInfoid = %s
+    AND d.time >= %s AND d.time < %s
+    GROUP BY u.id;
+"""
+
+EXERCISES_SQL = """
+    SELECT id,nameExercise,detail,thumbnail FROM public.exercise
+    ORDER BY id ASC 
+"""
+
+def exercise_catalog_from_row(r) -> dict:
+    return {"id": r[0], "nameExercise": r[1], "detail": r[2], "thumbnail": r[3]}
+
+TOTAL_KCAL_BURNED_SQL = """
+    SELECT COALESCE(SUM(eou.minute * le.kcalPerMin), 0) AS total_kcal
+    FROM ExerciseOfUser eou
+    JOIN LevelExercise le ON eou.LevelExerciseid = le.id
+    WHERE eou.UserInfoid = %s
+    AND eou.time >= %s AND eou.time < %s;
+"""
+
+EXERCISES_IN_DAY_SQL = """
+    SELECT 
+    eu.id,
+    e.nameExercise,
+    e.thumbnail,
+    le.level,
+    eu.minute,
+    le.kcalPerMin,
+    eu.createdAt
+    FROM ExerciseOfUser eu
+    JOIN LevelExercise le ON eu.LevelExerciseid = le.id
+    JOIN Exercise e ON le.Exerciseid = e.id
+    WHERE eu.UserInfoid = %s
+    AND eu.time >= %s AND eu.time < %s
+    ORDER BY eu.createdAt;
+"""
+
+# Inserts return the new ids; the batch variants take one VALUES row per item.
+INSERT_MEALS_SQL = """
+    INSERT INTO MealOfUser (time, mealType, weight, UserInfoId, DishId)
+    VALUES {values}
+    RETURNING id;
+"""
+
+INSERT_DRINKS_SQL = """
+    INSERT INTO DrinkOfUser (time, amount, UnitDrinkId, UserInfoid)
+    VALUES {values}
+    RETURNING id;
+"""
+
+INSERT_MEAL_SQL = INSERT_MEALS_SQL.format(values="(%s, %s, %s, %s, %s)")
+INSERT_DRINK_SQL = INSERT_DRINKS_SQL.format(values="(%s, %s, %s, %s)")
+
+INSERT_EXERCISE_SQL = """
+    INSERT INTO ExerciseOfUser (time, minute, levelExerciseId, userInfoId)
+    VALUES (
+        %s,
+        %s,
+        (
+            SELECT le.id 
+            FROM LevelExercise le
+            JOIN Exercise e ON le.Exerciseid = e.id
+            WHERE e.id = %s  
+            AND le.level = %s 
+            LIMIT 1
+        ),
+        %s
+    )
+    RETURNING id;
+"""
+
+# LevelExercise is resolved with one join for the whole batch (first match per exercise and level,
+# like the single-row insert); an unknown pair leaves levelExerciseId NULL and fails the batch.
+INSERT_EXERCISES_SQL = """
+    INSERT INTO ExerciseOfUser (time, minute, levelExerciseId, userInfoId)
+    SELECT v.time, v.minute, le.id, v.userId
+    FROM (
+        VALUES {values}
+    ) AS v(ord, time, minute, exerciseId, level, userId)
+    LEFT JOIN (
+        SELECT DISTINCT ON (Exerciseid, level) id, Exerciseid, level
+        FROM LevelExercise
+        ORDER BY Exerciseid, level, id
+    ) le ON le.Exerciseid = v.exerciseId AND le.level = v.level
+    ORDER BY v.ord
+    RETURNING id;
+"""
+
+DELETE_MEAL_SQL = "DELETE FROM public.mealofuser WHERE id = %s RETURNING id;"
+DELETE_DRINK_SQL = "DELETE FROM public.drinkofuser WHERE id = %s RETURNING id;"
+DELETE_EXERCISE_SQL = "DELETE FROM public.exerciseofuser WHERE id = %s RETURNING id;"
+
+def meal_values(meal: AddMealRequest) -> tuple:
+    return (meal.date, meal.mealType, meal.weight, meal.userId, meal.dishId)
+
+def drink_values(drink: AddDrinkRequest) -> tuple:
+    return (drink.date, drink.amount, drink.unitDrinkId, drink.userId)
+
+def exercise_values(exercise: AddExerciseRequest) -> tuple:
+    return (exercise.date, exercise.time, exercise.exerciseId, exercise.levelExercise, exercise.userId)
+
+def insert_meals_query(meals: list[AddMealRequest]) -> tuple:
+    sql = INSERT_MEALS_SQL.format(values=values_placeholders(len(meals), "(%s, %s, %s, %s, %s)"))
+    return sql, [v for meal in meals for v in meal_values(meal)]
+
+def insert_drinks_query(drinks: list[AddDrinkRequest]) -> tuple:
+    sql = INSERT_DRINKS_SQL.format(values=values_placeholders(len(drinks), "(%s, %s, %s, %s)"))
+    return sql, [v for drink in drinks for v in drink_values(drink)]
+
+def insert_exercises_query(exercises: list[AddExerciseRequest]) -> tuple:
+    sql = INSERT_EXERCISES_SQL.format(
+        values=values_placeholders(len(exercises), "(%s::int, %s::timestamp, %s::int, %s::int, %s::varchar, %s::int)")
+    )
+    return sql, [v for i, exercise in enumerate(exercises) for v in (i, *exercise_values(exercise))]
+
 class TrackingRepository(BaseRepository):
+    # Day view
+    def get_day_summary(self, date: date, userId: int):
+        with self.get_read_cursor() as cur:
+            start, end = day_range(date)
+            cur.execute(DAY_SUMMARY_SQL, {"userId": userId, "start": start, "end": end})
+            return day_summary_from_row(cur.fetchone())
+
+    # Daily rollups
+    def get_daily_nutrition(self, userId: int, start: date, end: date):
+        """Per-day rows of daily_user_nutrition between start and end (inclusive); days without activity are absent."""
+        with self.get_read_cursor() as cur:
+            cur.execute(DAILY_NUTRITION_RANGE_SQL, (userId, start, end))
+            rows = cur.fetchall()
+            return [daily_nutrition_from_row(r) for r in rows]
+
     # Meal
     def insert_meal(self, meal: AddMealRequest) -> int:
         with self.get_cursor() as cur:
-            insert_sql = """
-                    INSERT INTO MealOfUser (time, mealType, weight, UserInfoId, DishId)
-                    VALUES (%s, %s, %s, %s, %s)
-                    RETURNING id;
-                """
-            values = (meal.date, meal.mealType, meal.weight, meal.userId, meal.dishId)
-            cur.execute(insert_sql, values)
-            return cur.fetchone()[0]
+            cur.execute(INSERT_MEAL_SQL, meal_values(meal))
+            new_id = cur.fetchone()[0]
+            cur.execute(ROLLUP_MEAL_SQL, {"ids": [new_id], "sign": 1})
+            return new_id
 
-    def get_total_nutri_meal(self, date: date, userId: int):
+    def insert_meals(self, meals: list[AddMealRequest]) -> list[int]:
         with self.get_cursor() as cur:
-            sql = """
-                SELECT 
-                SUM((ing.kcal        / 100.0) * iid.weight * (mu.weight / d_weight.total_weight)) AS total_kcal,
-                SUM((ing.carbs       / 100.0) * iid.weight * (mu.weight / d_weight.total_weight)) AS total_carbs,
-                SUM((ing.sugar       / 100.0) * iid.weight * (mu.weight / d_weight.total_weight)) AS total_sugar,
-                SUM((ing.fiber       / 100.0) * iid.weight * (mu.weight / d_weight.total_weight)) AS total_fiber,
-                SUM((ing.protein     / 100.0) * iid.weight * (mu.weight / d_weight.total_weight)) AS total_protein,
-                SUM((ing.saturatedFat / 100.0) * iid.weight * (mu.weight / d_weight.total_weight)) AS total_saturatedFat,
-                SUM((ing.monounSaturatedFat / 100.0) * iid.weight * (mu.weight / d_weight.total_weight)) AS total_monounSaturatedFat,
-                SUM((ing.polyunSaturatedFat / 100.0) * iid.weight * (mu.weight / d_weight.total_weight)) AS total_polyunSaturatedFat,
-                SUM((ing.transFat    / 100.0) * iid.weight * (mu.weight / d_weight.total_weight)) AS total_transFat,
-                SUM((ing.cholesterol / 100.0) * iid.weight * (mu.weight / d_weight.total_weight)) AS total_cholesterol,
-                SUM((ing.vitaminA    / 100.0) * iid.weight * (mu.weight / d_weight.total_weight)) AS total_vitaminA,
-                SUM((ing.vitaminC    / 100.0) * iid.weight * (mu.weight / d_weight.total_weight)) AS total_vitaminC,
-                SUM((ing.vitaminD    / 100.0) * iid.weight * (mu.weight / d_weight.total_weight)) AS total_vitaminD,
-                SUM((ing.vitaminB6   / 100.0) * iid.weight * (mu.weight / d_weight.total_weight)) AS total_vitaminB6,
-                SUM((ing.vitaminB12  / 100.0) * iid.weight * (mu.weight / d_weight.total_weight)) AS total_vitaminB12,
-                SUM((ing.vitaminE    / 100.0) * iid.weight * (mu.weight / d_weight.total_weight)) AS total_vitaminE,
-                SUM((ing.vitaminK    / 100.0) * iid.weight * (mu.weight / d_weight.total_weight)) AS total_vitaminK,
-                SUM((ing.choline     / 100.0) * iid.weight * (mu.weight / d_weight.total_weight)) AS total_choline,
-                SUM((ing.canxi       / 100.0) * iid.weight * (mu.weight / d_weight.total_weight)) AS total_canxi,
-                SUM((ing.fe          / 100.0) * iid.weight * (mu.weight / d_weight.total_weight)) AS total_fe,
-                SUM((ing.magie       / 100.0) * iid.weight * (mu.weight / d_weight.total_weight)) AS total_magie,
-                SUM((ing.photpho     / 100.0) * iid.weight * (mu.weight / d_weight.total_weight)) AS total_photpho,
-                SUM((ing.kali        / 100.0) * iid.weight * (mu.weight / d_weight.total_weight)) AS total_kali,
-                SUM((ing.natri       / 100.0) * iid.weight * (mu.weight / d_weight.total_weight)) AS total_natri,
-                SUM((ing.zn          / 100.0) * iid.weight * (mu.weight / d_weight.total_weight)) AS total_zn,
-                SUM((ing.water       / 100.0) * iid.weight * (mu.weight / d_weight.total_weight)) AS total_water,
-                SUM((ing.caffeine     / 100.0) * iid.weight * (mu.weight / d_weight.total_weight)) AS total_cafeine,
-                SUM((ing.alcohol     / 100.0) * iid.weight * (mu.weight / d_weight.total_weight)) AS total_alcohol
-                FROM MealOfUser mu
-                JOIN Dish d ON mu.Dishid = d.id
-                JOIN (
-                SELECT Dishid, SUM(weight) AS total_weight
-                FROM IngredientInDish
-                GROUP BY Dishid
-                ) d_weight ON d.id = d_weight.Dishid
-                JOIN IngredientInDish iid ON d.id = iid.Dishid
-                JOIN Ingredient ing ON iid.Ingredientid = ing.id
-                WHERE mu.UserInfoid = %s
-                AND DATE(mu.time) = %s
-                GROUP BY mu.UserInfoid, DATE(mu.time);
-                """
-            cur.execute(sql, (userId, date))
+            cur.execute(*insert_meals_query(meals))
+            # Ids come from a sequence, so ascending order is insertion (= request) order.
+            new_ids = sorted(r[0] for r in cur.fetchall())
+            cur.execute(ROLLUP_MEAL_SQL, {"ids": new_ids, "sign": 1})
+            return new_ids
+
+    def get_total_nutri_meal(self, date: date, userId: int):
+        with self.get_read_cursor() as cur:
+            cur.execute(TOTAL_NUTRI_MEAL_SQL, (userId, *day_range(date)))
             r = cur.fetchone()
-            
-            if not r:
-                return {}
-
-            return {
-                "kcal": r[0],
-                "totalCarbs": r[1]+r[2]+r[3],
-                "carbs": r[1],
-                "sugar": r[2],
-                "fiber": r[3],
-                "protein": r[4],
-                "totalFats": r[1]+r[2]+r[3],
-                "saturatedFat": r[5],
-                "monounSaturatedFat": r[6],
-                "polyunSaturatedFat": r[7],
-                "transFat": r[8],
-                "cholesterol": r[9],
-                "vitaminA": r[10],
-                "vitaminC": r[11],
-                "vitaminD": r[12],
-                "vitaminB6": r[13],
-                "vitaminB12": r[14],
-                "vitaminE": r[15],
-                "vitaminK": r[16],
-                "choline": r[17],
-                "canxi": r[18],
-                "fe": r[19],
-                "magie": r[20],
-                "photpho": r[21],
-                "kali": r[22],
-                "natri": r[23],
-                "zn": r[24],
-                "water": r[25],
-                "caffeine": r[26],
-                "alcohol": r[27],
-            }
+            return nutri_meal_from_row(r) if r else {}
 
     def get_meals_in_day(self, date: date, userId: int, mealType: str):
-         with self.get_cursor() as cur:
-            sql = """
-                    SELECT 
-                    mu.id,
-                    d.name,
-                    d.thumbnail,
-                    mu.weight,
-                    d.isConfirm,
-                    mu.createdAt,
-                    SUM((ing.kcal / 100.0) * iid.weight * (mu.weight / d_weight.total_weight)) AS kcal
-                    FROM MealOfUser mu
-                    JOIN Dish d ON mu.Dishid = d.id
-                    JOIN (
-                    SELECT Dishid, SUM(weight) AS total_weight
-                    FROM IngredientInDish
-                    GROUP BY Dishid
-                    ) d_weight ON d.id = d_weight.Dishid
-                    JOIN IngredientInDish iid ON d.id = iid.Dishid
-                    JOIN Ingredient ing ON iid.Ingredientid = ing.id
-                    WHERE mu.UserInfoid = %s
-                    AND mu.mealType = %s
-                    AND DATE(mu.time) = %s
-                    GROUP BY mu.id, d.name, d.thumbnail, mu.weight, d.isConfirm, mu.createdAt
-                    ORDER BY mu.createdAt;
-                """
-            cur.execute(sql, (userId, mealType, date))
+        with self.get_read_cursor() as cur:
+            cur.execute(MEALS_IN_DAY_SQL, (userId, mealType, *day_range(date)))
             rows = cur.fetchall()
-            return [
-                {"id": r[0], "name": r[1], "thumbnail": r[2], "weight": r[3], "isConfirm": r[4], "createdAt": r[5], "kcal": r[6]}
-                for r in rows
-            ]
+            return [meal_from_row(r) for r in rows]
 
     def delete_meal(self, id: int) -> bool:
         with self.get_cursor() as cur:
-            sql = """
-                DELETE FROM public.mealofuser
-                WHERE id = %s
-                RETURNING id;
-            """
-            cur.execute(sql, (id,))
+            cur.execute(ROLLUP_MEAL_SQL, {"ids": [id], "sign": -1})
+            cur.execute(DELETE_MEAL_SQL, (id,))
             return cur.fetchone() is not None
 
     # Drink
     def insert_drink(self, drink: AddDrinkRequest) -> int:
         with self.get_cursor() as cur:
-            insert_sql = """
-                    INSERT INTO DrinkOfUser (time, amount, UnitDrinkId, UserInfoid)
-                    VALUES (%s, %s, %s, %s)
-                    RETURNING id;
-                """
-            values = (drink.date, drink.amount, drink.unitDrinkId, drink.userId)
-            cur.execute(insert_sql, values)
-            return cur.fetchone()[0]
+            cur.execute(INSERT_DRINK_SQL, drink_values(drink))
+            new_id = cur.fetchone()[0]
+            cur.execute(ROLLUP_DRINK_SQL, {"ids": [new_id], "sign": 1})
+            return new_id
 
-    def get_drinks_in_day(self, date: date, userId: int):
+    def insert_drinks(self, drinks: list[AddDrinkRequest]) -> list[int]:
         with self.get_cursor() as cur:
-            sql = """
-                SELECT 
-                d.id,
-                d.amount,
-                u.baseUnit,
-                u.thumbnail,
-                d.createdAt
-                FROM DrinkOfUser d
-                JOIN UnitDrink u ON d.UnitDrinkid = u.id
-                WHERE d.UserInfoid = %s
-                AND DATE(d.time) = %s
-                ORDER BY d.createdAt;
-                """
-            cur.execute(sql, (userId, date))
+            cur.execute(*insert_drinks_query(drinks))
+            new_ids = sorted(r[0] for r in cur.fetchall())
+            cur.execute(ROLLUP_DRINK_SQL, {"ids": new_ids, "sign": 1})
+            return new_ids
+
+    def get_drinks_in_day(self, date: date, userId: int):
+        with self.get_read_cursor() as cur:
+            cur.execute(DRINKS_IN_DAY_SQL, (userId, *day_range(date)))
             rows = cur.fetchall()
-            return [
-                {"id": r[0], "amount": r[1], "baseUnit": r[2], "thumbnail": r[3], "createdAt": r[4]}
-                for r in rows
-            ]
+            return [drink_from_row(r) for r in rows]
 
     def delete_drink(self, id: int) -> bool:
         with self.get_cursor() as cur:
-            sql = """
-                DELETE FROM public.drinkofuser
-                WHERE id = %s
-                RETURNING id;
-            """
-            cur.execute(sql, (id,))
+            cur.execute(ROLLUP_DRINK_SQL, {"ids": [id], "sign": -1})
+            cur.execute(DELETE_DRINK_SQL, (id,))
             return cur.fetchone() is not None
 
     def get_total_water(self, date: date, userId: int) -> float:
-        with self.get_cursor() as cur:
-            sql = """
-                SELECT 
-                SUM(d.amount * ud.mlPerUnit) AS total_ml
-                FROM DrinkOfUser d
-                JOIN UnitDrink ud ON d.UnitDrinkid = ud.id
-                JOIN UserInfo u ON d.UserInfoid = u.id
-                WHERE u.id = %s
-                AND DATE(d.time) = %s
-                GROUP BY u.id;
-                """
-            cur.execute(sql, (userId, date))
+        with self.get_read_cursor() as cur:
+            cur.execute(TOTAL_WATER_SQL, (userId, *day_range(date)))
             row = cur.fetchone()
             return row[0] if row else 0
 
     # Exercise
     def get_all_exercises(self):
-        with self.get_cursor() as cur:
-            sql = """
-                SELECT id,nameExercise,detail,thumbnail FROM public.exercise
-                ORDER BY id ASC 
-                """
-            cur.execute(sql)
+        with self.get_read_cursor() as cur:
+            cur.execute(EXERCISES_SQL)
             rows = cur.fetchall()
-            return [
-                {"id": r[0], "nameExercise": r[1], "detail": r[2], "thumbnail": r[3]}
-                for r in rows
-            ]
+            return [exercise_catalog_from_row(r) for r in rows]
 
     def insert_exercise(self, exercise: AddExerciseRequest) -> int:
         with self.get_cursor() as cur:
-            insert_sql = """
-                    INSERT INTO ExerciseOfUser (time, minute, levelExerciseId, userInfoId)
-                    VALUES (
-                        %s,
-                        %s,
-                        (
-                            SELECT le.id 
-                            FROM LevelExercise le
-                            JOIN Exercise e ON le.Exerciseid = e.id
-                            WHERE e.id = %s  
-                            AND le.level = %s 
-                            LIMIT 1
-                        ),
-                        %s
-                    )
-                    RETURNING id;
-                """
-            values = (exercise.date, exercise.time, exercise.exerciseId, exercise.levelExercise, exercise.userId)
-            cur.execute(insert_sql, values)
-            return cur.fetchone()[0]
+            cur.execute(INSERT_EXERCISE_SQL, exercise_values(exercise))
+            new_id = cur.fetchone()[0]
+            cur.execute(ROLLUP_EXERCISE_SQL, {"ids": [new_id], "sign": 1})
+            return new_id
 
-    def get_total_kcal_burned(self, date: date, userId: int) -> float:
+    def insert_exercises(self, exercises: list[AddExerciseRequest]) -> list[int]:
         with self.get_cursor() as cur:
-             sql = """
-                SELECT COALESCE(SUM(eou.minute * le.kcalPerMin), 0) AS total_kcal
-                FROM ExerciseOfUser eou
-                JOIN LevelExercise le ON eou.LevelExerciseid = le.id
-                WHERE eou.UserInfoid = %s
-                AND DATE(eou.time) = %s;
-                """
-             cur.execute(sql, (userId, date))
-             row = cur.fetchone()
-             return row[0] if row else 0
+            cur.execute(*insert_exercises_query(exercises))
+            new_ids = sorted(r[0] for r in cur.fetchall())
+            cur.execute(ROLLUP_EXERCISE_SQL, {"ids": new_ids, "sign": 1})
+            return new_ids
+
+    def get_total_kcal_burned(self, date: date, userId: int) -> float:
+        with self.get_read_cursor() as cur:
+            cur.execute(TOTAL_KCAL_BURNED_SQL, (userId, *day_range(date)))
+            row = cur.fetchone()
+            return row[0] if row else 0
 
     def get_exercises_in_day(self, date: date, userId: int):
-        with self.get_cursor() as cur:
-            sql = """
-                    SELECT 
-                    eu.id,
-                    e.nameExercise,
-                    e.thumbnail,
-                    le.level,
-                    eu.minute,
-                    le.kcalPerMin,
-                    eu.createdAt
-                    FROM ExerciseOfUser eu
-                    JOIN LevelExercise le ON eu.LevelExerciseid = le.id
-                    JOIN Exercise e ON le.Exerciseid = e.id
-                    WHERE eu.UserInfoid = %s
-                    AND DATE(eu.time) = %s
-                    ORDER BY eu.createdAt;
-                """
-            cur.execute(sql, (userId, date))
+        with self.get_read_cursor() as cur:
+            cur.execute(EXERCISES_IN_DAY_SQL, (userId, *day_range(date)))
             rows = cur.fetchall()
-            return [
-                {"id": r[0], "nameExercise": r[1], "thumbnail": r[2], "level": r[3], "minute": r[4], "kcalPerMin": r[5], "createdAt": r[6]}
-                for r in rows
-            ]
+            return [exercise_from_row(r) for r in rows]
 
     def delete_exercise(self, id: int) -> bool:
-         with self.get_cursor() as cur:
-            sql = """
-                DELETE FROM public.exerciseofuser
-                WHERE id = %s
-                RETURNING id;
-            """
-            cur.execute(sql, (id,))
+        with self.get_cursor() as cur:
+            cur.execute(ROLLUP_EXERCISE_SQL, {"ids": [id], "sign": -1})
+            cur.execute(DELETE_EXERCISE_SQL, (id,))
             return cur.fetchone() is not None
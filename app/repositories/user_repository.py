@@ -5,262 +5,343 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# userInfo columns (as in get_user_info_details), userinfo.profileversion, then the latest requiredindex row (ri.*).
+USER_PROFILE_SQL = """
+    SELECT
+      u.id,
+      u.fullname,
+      u.age,
+      u.height,
+      u.weight,
+      al.title AS activityLevel,
+      (SELECT STRING_AGG(DISTINCT lf.title, ', ')
+       FROM public.limitfooduser lfu
+       JOIN public.limitfood lf ON lfu.limitfoodid = lf.id
+       WHERE lfu.userinfoid = u.id) AS limitFood,
+      (SELECT STRING_AGG(DISTINCT hs.title, ', ')
+       FROM public.healthstatususer hsu
+       JOIN public.healthstatus hs ON hsu.healthstatusid = hs.id
+       WHERE hsu.userinfoid = u.id) AS healthStatus,
+      d.title AS diet,
+      ri.bmr,
+      ri.tdee,
+      u.gender,
+      u.profileversion,
+      ri.*
+    FROM public.userinfo u
+    LEFT JOIN public.activitylevel al ON u.activitylevelid = al.id
+    LEFT JOIN public.diet d ON u.dietid = d.id
+    LEFT JOIN LATERAL (
+        SELECT * FROM public.requiredindex WHERE userinfoid = u.id ORDER BY id DESC LIMIT 1
+    ) ri ON TRUE
+    WHERE u.id = %s;
+"""
+PROFILE_VERSION_COLUMN = 12
+
+def user_info_from_row(row) -> dict:
+    return {
+        "id": row[0],
+        "fullname": row[1],
+        "age": row[2],
+        "height": row[3],
+        "weight": row[4],
+        "activityLevel": row[5],
+        "limitFood": row[6],
+        "healthStatus": row[7],
+        "diet": row[8],
+        "bmr": row[9],
+        "tdee": row[10],
+        "gender": row[11],
+    }
+
+def required_index_from_row(r) -> dict:
+    return {
+        "id": r[0],
+        "userinfoid": r[1],
+        "bmr": r[2],
+        "tdee": r[3],
+        "targetcalories": r[4],
+        "water": r[5],
+        "protein": r[6],
+        "totalfat": r[7],
+        "saturatedfat": r[8],
+        "monounsaturatedfat": r[9],
+        "polyunsaturatedfat": r[10],
+        "transfat": r[11],
+        "carbohydrate": r[12],
+        "carbs": r[13],
+        "sugar": r[14],
+        "fiber": r[15],
+        "cholesterol": r[16],
+        "vitamina": r[17],
+        "vitamind": r[18],
+        "vitaminc": r[19],
+        "vitaminb6": r[20],
+        "vitaminb12": r[21],
+        "vitamine": r[22],
+        "vitamink": r[23],
+        "choline": r[24],
+        "canxi": r[25],
+        "fe": r[26],
+        "magie": r[27],
+        "photpho": r[28],
+        "kali": r[29],
+        "natri": r[30],
+        "zn": r[31],
+        "caffeine": r[32],
+        "alcohol": r[33],
+    }
+
+INSERT_USER_INFO_SQL = """
+    INSERT INTO UserInfo 
+    (fullName, gender, age, height, weight, weightTarget, dateTarget, Accountid, ActivityLevelid, Dietid)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    RETURNING id;
+"""
+
+UPDATE_USER_INFO_SQL = """
+    UPDATE UserInfo
+    SET height = %s,
+        weight = %s,
+        weightTarget = %s,
+        dateTarget = %s,
+        ActivityLevelid = %s,
+        Dietid = %s
+    WHERE id = %s
+"""
+
+MARK_INFO_COLLECTED_SQL = """
+    UPDATE Account
+    SET isCollectionInfo = 1
+    WHERE id = %s
+"""
+
+INSERT_LIMIT_FOOD_USER_SQL = "INSERT INTO LimitFoodUser (UserInfoid, LimitFoodid) VALUES (%s, %s)"
+DELETE_LIMIT_FOOD_USER_SQL = "DELETE FROM LimitFoodUser WHERE UserInfoid = %s"
+INSERT_HEALTH_STATUS_USER_SQL = "INSERT INTO HealthStatusUser (UserInfoid, HealthStatusid) VALUES (%s, %s)"
+DELETE_HEALTH_STATUS_USER_SQL = "DELETE FROM HealthStatusUser WHERE UserInfoid = %s"
+
+def user_info_values(user: UserInfoRequest) -> tuple:
+    return (
+        user.fullName,
+        user.gender,
+        user.age,
+        user.height,
+        user.weight,
+        user.weightTarget,
+        user.dateTarget,
+        user.Accountid,
+        user.ActivityLevelid,
+        user.Dietid,
+    )
+
+def user_update_values(id: int, user: UserInfoRequest) -> tuple:
+    return (user.height, user.weight, user.weightTarget, user.dateTarget, user.ActivityLevelid, user.Dietid, id)
+
+def limit_food_rows(user_id: int, user: UserInfoRequest) -> list[tuple]:
+    return [(user_id, lf_id) for lf_id in user.LimitFoodid or []]
+
+def health_status_rows(user_id: int, user: UserInfoRequest) -> list[tuple]:
+    return [(user_id, hs_id) for hs_id in user.HealthStatusid or []]
+
+# RequiredIndex statements take the named values of build_required_index_data()["requiredIndex"].
+INSERT_REQUIRED_INDEX_SQL = """
+    INSERT INTO RequiredIndex 
+    (UserInfoid, bmr, tdee, targetCalories, water, protein, totalFat,
+    saturatedFat, monounSaturatedFat, polyunSaturatedFat, transFat,
+    carbohydrate, carbs, sugar, fiber, cholesterol, vitaminA, vitaminD,
+    vitaminC, vitaminB6, vitaminB12, vitaminE, vitaminK, choline, canxi,
+    fe, magie, photpho, kali, natri, zn, caffeine, alcohol)
+    VALUES (%(UserInfoid)s, %(bmr)s, %(tdee)s, %(targetCalories)s, %(water)s,
+            %(protein)s, %(totalFat)s, %(saturatedFat)s, %(monounSaturatedFat)s,
+            %(polyunSaturatedFat)s, %(transFat)s, %(carbohydrate)s, %(carbs)s,
+            %(sugar)s, %(fiber)s, %(cholesterol)s, %(vitaminA)s, %(vitaminD)s,
+            %(vitaminC)s, %(vitaminB6)s, %(vitaminB12)s, %(vitaminE)s,
+            %(vitaminK)s, %(choline)s, %(canxi)s, %(fe)s, %(magie)s,
+            %(photpho)s, %(kali)s, %(natri)s, %(zn)s, %(caffeine)s,
+            %(alcohol)s)
+    RETURNING id;
+"""
+
+UPDATE_REQUIRED_INDEX_SQL = """
+    UPDATE RequiredIndex
+    SET bmr = %(bmr)s, tdee = %(tdee)s, targetCalories = %(targetCalories)s,
+        water = %(water)s, protein = %(protein)s, totalFat = %(totalFat)s,
+        saturatedFat = %(saturatedFat)s, monounSaturatedFat = %(monounSaturatedFat)s,
+        polyunSaturatedFat = %(polyunSaturatedFat)s, transFat = %(transFat)s,
+        carbohydrate = %(carbohydrate)s, carbs = %(carbs)s, sugar = %(sugar)s,
+        fiber = %(fiber)s, cholesterol = %(cholesterol)s, vitaminA = %(vitaminA)s,
+        vitaminD = %(vitaminD)s, vitaminC = %(vitaminC)s, vitaminB6 = %(vitaminB6)s,
+        vitaminB12 = %(vitaminB12)s, vitaminE = %(vitaminE)s, vitaminK = %(vitaminK)s,
+        choline = %(choline)s, canxi = %(canxi)s, fe = %(fe)s, magie = %(magie)s,
+        photpho = %(photpho)s, kali = %(kali)s, natri = %(natri)s, zn = %(zn)s,
+        caffeine = %(caffeine)s, alcohol = %(alcohol)s
+    WHERE id = %(required_id)s
+"""
+
+REQUIRED_INDEX_ID_SQL = "SELECT id FROM RequiredIndex WHERE UserInfoid = %s"
+
+INSERT_IMPORTANT_HASHTAG_SQL = "INSERT INTO ImportantHashtag (RequiredIndexid, Hashtagid, typeRequest) VALUES (%s, %s, %s)"
+DELETE_IMPORTANT_HASHTAGS_SQL = "DELETE FROM ImportantHashtag WHERE RequiredIndexid = %s"
+
+def important_hashtag_rows(required_id: int, index_data: dict) -> list[tuple]:
+    hashtags = []
+    for tag in index_data["banHashtags"]:
+        hashtags.append((required_id, tag, "ban"))
+    for tag in index_data["encourageHashtags"]:
+        hashtags.append((required_id, tag, "encourage"))
+    for tag in index_data["limitHashtags"]:
+        hashtags.append((required_id, tag, "limit"))
+    return hashtags
+
+ACCOUNT_ID_BY_USERNAME_SQL = "SELECT id FROM Account WHERE userName = %s"
+INSERT_ACCOUNT_SQL = """
+    INSERT INTO Account (userName, passWord, isCollectionInfo)
+    VALUES (%s, %s, %s)
+    RETURNING id;
+"""
+ACCOUNT_BY_USERNAME_SQL = """
+    SELECT id, passWord, isCollectionInfo
+    FROM Account
+    WHERE userName = %s
+"""
+USER_INFO_ID_BY_ACCOUNT_SQL = "SELECT id FROM UserInfo WHERE Accountid = %s LIMIT 1"
+
+USER_INFO_DETAILS_SQL = """
+    SELECT
+      u.id,
+      u.fullname,
+      u.age,
+      u.height,
+      u.weight,
+      al.title AS activityLevel,
+      STRING_AGG(DISTINCT lf.title, ', ') FILTER (WHERE lf.title IS NOT NULL) AS limitFood,
+      STRING_AGG(DISTINCT hs.title, ', ') FILTER (WHERE hs.title IS NOT NULL) AS healthStatus,
+      d.title AS diet,
+      ri.bmr,
+      ri.tdee,
+      u.gender
+    FROM public.userinfo u
+    LEFT JOIN public.activitylevel al ON u.activitylevelid = al.id
+    LEFT JOIN public.diet d ON u.dietid = d.id
+    LEFT JOIN public.requiredindex ri ON ri.userinfoid = u.id
+    LEFT JOIN public.limitfooduser lfu ON lfu.userinfoid = u.id
+    LEFT JOIN public.limitfood lf ON lfu.limitfoodid = lf.id
+    LEFT JOIN public.healthstatususer hsu ON hsu.userinfoid = u.id
+    LEFT JOIN public.healthstatus hs ON hsu.healthstatusid = hs.id
+    WHERE u.id = %s
+    GROUP BY
+      u.id, u.fullname, u.age, u.height, u.weight,
+      al.title, d.title, ri.bmr, ri.tdee, u.gender;
+"""
+
+REQUIRED_INDEX_BY_ID_SQL = """
+    SELECT *
+    FROM requiredindex
+    WHERE id = %s;
+"""
+
+PROFILE_VERSION_SQL = "SELECT profileversion FROM userinfo WHERE id = %s;"
+
 class UserRepository(BaseRepository):
     def insert_user_info(self, user: UserInfoRequest):
         with self.get_cursor() as cur:
-            insert_sql = """
-                INSERT INTO UserInfo 
-                (fullName, gender, age, height, weight, weightTarget, dateTarget, Accountid, ActivityLevelid, Dietid)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                RETURNING id;
-            """
-            values = (
-                user.fullName,
-                user.gender,
-                user.age,
-                user.height,
-                user.weight,
-                user.weightTarget,
-                user.dateTarget,
-                user.Accountid,
-                user.ActivityLevelid,
-                user.Dietid,
-            )
-            cur.execute(insert_sql, values)
+            cur.execute(INSERT_USER_INFO_SQL, user_info_values(user))
             new_id = cur.fetchone()[0]
 
             if user.LimitFoodid:
-                limit_food_data = [(new_id, lf_id) for lf_id in user.LimitFoodid]
-                cur.executemany(
-                    "INSERT INTO LimitFoodUser (UserInfoid, LimitFoodid) VALUES (%s, %s)",
-                    limit_food_data
-                )
+                cur.executemany(INSERT_LIMIT_FOOD_USER_SQL, limit_food_rows(new_id, user))
             if user.HealthStatusid:
-                health_status_data = [(new_id, hs_id) for hs_id in user.HealthStatusid]
-                cur.executemany(
-                    "INSERT INTO HealthStatusUser (UserInfoid, HealthStatusid) VALUES (%s, %s)",
-                    health_status_data
-                )
-
-            update_sql = """
-                UPDATE Account
-                SET isCollectionInfo = 1
-                WHERE id = %s
-            """
-            cur.execute(update_sql, (user.Accountid,))
+                cur.executemany(INSERT_HEALTH_STATUS_USER_SQL, health_status_rows(new_id, user))
 
-            index_data = build_required_index_data(user)
+            cur.execute(MARK_INFO_COLLECTED_SQL, (user.Accountid,))
 
-            required_sql = """
-                INSERT INTO RequiredIndex 
-                (UserInfoid, bmr, tdee, targetCalories, water, protein, totalFat,
-                saturatedFat, monounSaturatedFat, polyunSaturatedFat, transFat,
-                carbohydrate, carbs, sugar, fiber, cholesterol, vitaminA, vitaminD,
-                vitaminC, vitaminB6, vitaminB12, vitaminE, vitaminK, choline, canxi,
-                fe, magie, photpho, kali, natri, zn, caffeine, alcohol)
-                VALUES (%(UserInfoid)s, %(bmr)s, %(tdee)s, %(targetCalories)s, %(water)s,
-                        %(protein)s, %(totalFat)s, %(saturatedFat)s, %(monounSaturatedFat)s,
-                        %(polyunSaturatedFat)s, %(transFat)s, %(carbohydrate)s, %(carbs)s,
-                        %(sugar)s, %(fiber)s, %(cholesterol)s, %(vitaminA)s, %(vitaminD)s,
-                        %(vitaminC)s, %(vitaminB6)s, %(vitaminB12)s, %(vitaminE)s,
-                        %(vitaminK)s, %(choline)s, %(canxi)s, %(fe)s, %(magie)s,
-                        %(photpho)s, %(kali)s, %(natri)s, %(zn)s, %(caffeine)s,
-                        %(alcohol)s)
-                RETURNING id;
-            """
+            index_data = build_required_index_data(user)
             required_values = index_data["requiredIndex"]
             required_values["UserInfoid"] = new_id
 
-            cur.execute(required_sql, required_values)
+            cur.execute(INSERT_REQUIRED_INDEX_SQL, required_values)
             required_id = cur.fetchone()[0]
 
-            hashtags = []
-            for tag in index_data["banHashtags"]:
-                hashtags.append((required_id, tag, "ban"))
-            for tag in index_data["encourageHashtags"]:
-                hashtags.append((required_id, tag, "encourage"))
-            for tag in index_data["limitHashtags"]:
-                hashtags.append((required_id, tag, "limit"))
-
+            hashtags = important_hashtag_rows(required_id, index_data)
             if hashtags:
-                cur.executemany(
-                    "INSERT INTO ImportantHashtag (RequiredIndexid, Hashtagid, typeRequest) VALUES (%s, %s, %s)",
-                    hashtags
-                )
+                cur.executemany(INSERT_IMPORTANT_HASHTAG_SQL, hashtags)
 
             return new_id
 
     def update_user_info(self, id: int, user: UserInfoRequest):
         with self.get_cursor() as cur:
-            update_sql = """
-                UPDATE UserInfo
-                SET height = %s,
-                    weight = %s,
-                    weightTarget = %s,
-                    dateTarget = %s,
-                    ActivityLevelid = %s,
-                    Dietid = %s
-                WHERE id = %s
-            """
-            cur.execute(update_sql, (
-                user.height,
-                user.weight,
-                user.weightTarget,
-                user.dateTarget,
-                user.ActivityLevelid,
-                user.Dietid,
-                id
-            ))
-
-            cur.execute("DELETE FROM LimitFoodUser WHERE UserInfoid = %s", (id,))
+            cur.execute(UPDATE_USER_INFO_SQL, user_update_values(id, user))
+
+            cur.execute(DELETE_LIMIT_FOOD_USER_SQL, (id,))
             if user.LimitFoodid:
-                limit_food_data = [(id, lf_id) for lf_id in user.LimitFoodid]
-                cur.executemany(
-                    "INSERT INTO LimitFoodUser (UserInfoid, LimitFoodid) VALUES (%s, %s)",
-                    limit_food_data
-                )
+                cur.executemany(INSERT_LIMIT_FOOD_USER_SQL, limit_food_rows(id, user))
 
-            cur.execute("DELETE FROM HealthStatusUser WHERE UserInfoid = %s", (id,))
+            cur.execute(DELETE_HEALTH_STATUS_USER_SQL, (id,))
             if user.HealthStatusid:
-                health_status_data = [(id, hs_id) for hs_id in user.HealthStatusid]
-                cur.executemany(
-                    "INSERT INTO HealthStatusUser (UserInfoid, HealthStatusid) VALUES (%s, %s)",
-                    health_status_data
-                )
+                cur.executemany(INSERT_HEALTH_STATUS_USER_SQL, health_status_rows(id, user))
 
             index_data = build_required_index_data(user)
+            required_values = index_data["requiredIndex"]
 
-            cur.execute("SELECT id FROM RequiredIndex WHERE UserInfoid = %s", (id,))
+            cur.execute(REQUIRED_INDEX_ID_SQL, (id,))
             row = cur.fetchone()
 
             if row:
                 required_id = row[0]
-                update_req_sql = """
-                    UPDATE RequiredIndex
-                    SET bmr = %(bmr)s, tdee = %(tdee)s, targetCalories = %(targetCalories)s,
-                        water = %(water)s, protein = %(protein)s, totalFat = %(totalFat)s,
-                        saturatedFat = %(saturatedFat)s, monounSaturatedFat = %(monounSaturatedFat)s,
-                        polyunSaturatedFat = %(polyunSaturatedFat)s, transFat = %(transFat)s,
-                        carbohydrate = %(carbohydrate)s, carbs = %(carbs)s, sugar = %(sugar)s,
-                        fiber = %(fiber)s, cholesterol = %(cholesterol)s, vitaminA = %(vitaminA)s,
-                        vitaminD = %(vitaminD)s, vitaminC = %(vitaminC)s, vitaminB6 = %(vitaminB6)s,
-                        vitaminB12 = %(vitaminB12)s, vitaminE = %(vitaminE)s, vitaminK = %(vitaminK)s,
-                        choline = %(choline)s, canxi = %(canxi)s, fe = %(fe)s, magie = %(magie)s,
-                        photpho = %(photpho)s, kali = %(kali)s, natri = %(natri)s, zn = %(zn)s,
-                        caffeine = %(caffeine)s, alcohol = %(alcohol)s
-                    WHERE id = %(required_id)s
-                """
-                required_values = index_data["requiredIndex"]
                 required_values["required_id"] = required_id
-                cur.execute(update_req_sql, required_values)
+                cur.execute(UPDATE_REQUIRED_INDEX_SQL, required_values)
             else:
-                required_sql = """
-                    INSERT INTO RequiredIndex (UserInfoid, bmr, tdee, targetCalories, water, protein, totalFat,
-                    saturatedFat, monounSaturatedFat, polyunSaturatedFat, transFat, carbohydrate, carbs, sugar,
-                    fiber, cholesterol, vitaminA, vitaminD, vitaminC, vitaminB6, vitaminB12, vitaminE,
-                    vitaminK, choline, canxi, fe, magie, photpho, kali, natri, zn, caffeine, alcohol)
-                    VALUES (%(UserInfoid)s, %(bmr)s, %(tdee)s, %(targetCalories)s, %(water)s, %(protein)s,
-                    %(totalFat)s, %(saturatedFat)s, %(monounSaturatedFat)s, %(polyunSaturatedFat)s,
-                    %(transFat)s, %(carbohydrate)s, %(carbs)s, %(sugar)s, %(fiber)s, %(cholesterol)s,
-                    %(vitaminA)s, %(vitaminD)s, %(vitaminC)s, %(vitaminB6)s, %(vitaminB12)s, %(vitaminE)s,
-                    %(vitaminK)s, %(choline)s, %(canxi)s, %(fe)s, %(magie)s, %(photpho)s, %(kali)s,
-                    %(natri)s, %(zn)s, %(caffeine)s, %(alcohol)s)
-                    RETURNING id;
-                """
-                required_values = index_data["requiredIndex"]
                 required_values["UserInfoid"] = id
-                cur.execute(required_sql, required_values)
+                cur.execute(INSERT_REQUIRED_INDEX_SQL, required_values)
                 required_id = cur.fetchone()[0]
 
-            cur.execute("DELETE FROM ImportantHashtag WHERE RequiredIndexid = %s", (required_id,))
-            hashtags = []
-            for tag in index_data["banHashtags"]:
-                hashtags.append((required_id, tag, "ban"))
-            for tag in index_data["encourageHashtags"]:
-                hashtags.append((required_id, tag, "encourage"))
-            for tag in index_data["limitHashtags"]:
-                hashtags.append((required_id, tag, "limit"))
-
+            cur.execute(DELETE_IMPORTANT_HASHTAGS_SQL, (required_id,))
+            hashtags = important_hashtag_rows(required_id, index_data)
             if hashtags:
-                cur.executemany(
-                    "INSERT INTO ImportantHashtag (RequiredIndexid, Hashtagid, typeRequest) VALUES (%s, %s, %s)",
-                    hashtags
-                )
+                cur.executemany(INSERT_IMPORTANT_HASHTAG_SQL, hashtags)
             
             return id
 
     def check_username_exists(self, username: str) -> bool:
         with self.get_cursor() as cur:
-            cur.execute("SELECT id FROM Account WHERE userName = %s", (username,))
+            cur.execute(ACCOUNT_ID_BY_USERNAME_SQL, (username,))
             return cur.fetchone() is not None
 
     def create_account(self, username: str, password: str) -> int:
         with self.get_cursor() as cur:
-            insert_sql = """
-                INSERT INTO Account (userName, passWord, isCollectionInfo)
-                VALUES (%s, %s, %s)
-                RETURNING id;
-            """
-            cur.execute(insert_sql, (username, password, 0))
+            cur.execute(INSERT_ACCOUNT_SQL, (username, password, 0))
             return cur.fetchone()[0]
 
     def get_account_by_username(self, username: str):
         with self.get_cursor() as cur:
-            sql = """
-                SELECT id, passWord, isCollectionInfo
-                FROM Account
-                WHERE userName = %s
-            """
-            cur.execute(sql, (username,))
+            cur.execute(ACCOUNT_BY_USERNAME_SQL, (username,))
             return cur.fetchone()
 
     def get_user_info_id_by_account_id(self, account_id: int):
         with self.get_cursor() as cur:
-            cur.execute(
-                "SELECT id FROM UserInfo WHERE Accountid = %s LIMIT 1",
-                (account_id,)
-            )
+            cur.execute(USER_INFO_ID_BY_ACCOUNT_SQL, (account_id,))
             row = cur.fetchone()
             return row[0] if row else None
 
     def get_user_info_details(self, id: int):
-        with self.get_cursor() as cur:
-            sql = """
-                SELECT
-                  u.id,
-                  u.fullname,
-                  u.age,
-                  u.height,
-                  u.weight,
-                  al.title AS activityLevel,
-                  STRING_AGG(DISTINCT lf.title, ', ') FILTER (WHERE lf.title IS NOT NULL) AS limitFood,
-                  STRING_AGG(DISTINCT hs.title, ', ') FILTER (WHERE hs.title IS NOT NULL) AS healthStatus,
-                  d.title AS diet,
-                  ri.bmr,
-                  ri.tdee,
-                  u.gender
-                FROM public.userinfo u
-                LEFT JOIN public.activitylevel al ON u.activitylevelid = al.id
-                LEFT JOIN public.diet d ON u.dietid = d.id
-                LEFT JOIN public.requiredindex ri ON ri.userinfoid = u.id
-                LEFT JOIN public.limitfooduser lfu ON lfu.userinfoid = u.id
-                LEFT JOIN public.limitfood lf ON lfu.limitfoodid = lf.id
-                LEFT JOIN public.healthstatususer hsu ON hsu.userinfoid = u.id
-                LEFT JOIN public.healthstatus hs ON hsu.healthstatusid = hs.id
-                WHERE u.id = %s
-                GROUP BY
-                  u.id, u.fullname, u.age, u.height, u.weight,
-                  al.title, d.title, ri.bmr, ri.tdee, u.gender;
-            """
-            cur.execute(sql, (id,))
+        with self.get_read_cursor() as cur:
+            cur.execute(USER_INFO_DETAILS_SQL, (id,))
             return cur.fetchone()
 
     def get_required_index(self, id: int):
-        with self.get_cursor() as cur:
-            sql = """
-                SELECT *
-                FROM requiredindex
-                WHERE id = %s;
-            """
-            cur.execute(sql, (id,))
+        with self.get_read_cursor() as cur:
+            cur.execute(REQUIRED_INDEX_BY_ID_SQL, (id,))
+            return cur.fetchone()
+
+    def get_profile(self, id: int):
+        """User details and latest required index in one row; see USER_PROFILE_SQL for the column layout."""
+        with self.get_read_cursor() as cur:
+            cur.execute(USER_PROFILE_SQL, (id,))
             return cur.fetchone()
+
+    def get_profile_version(self, id: int):
+        with self.get_read_cursor() as cur:
+            cur.execute(PROFILE_VERSION_SQL, (id,))
+            row = cur.fetchone()
+            return row[0] if row else None
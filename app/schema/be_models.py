@@ -31,6 +31,9 @@ class IngredientItem(BaseModel):
     ingredientId: int
     weight: float
 
+class RecipeNutritionRequest(BaseModel):
+    ingredients: list[IngredientItem]
+
 class DishRequest(BaseModel):
     name: str
     thumbnail: str
@@ -138,3 +141,18 @@ class AddNotificationRequest(BaseModel):
     type: str
     content: str
     relatedId: int
+
+class BroadcastNotificationRequest(BaseModel):
+    senderId: int
+    type: str = "ANNOUNCEMENT"
+    content: str
+    relatedId: int = 0
+    # Segment filters, combined with AND; no filter means every user.
+    healthStatusIds: Optional[List[int]] = None
+    dietIds: Optional[List[int]] = None
+    gender: Optional[str] = None
+
+class MarkNotificationsReadRequest(BaseModel):
+    receiverId: int
+    # Every unread notification of the receiver when omitted.
+    ids: Optional[List[int]] = None
@@ -0,0 +1,119 @@
+import bisect
+import heapq
+import logging
+import math
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from app.helpers.text_folding import fold
+
+logger = logging.getLogger(__name__)
+
+# Type-ahead prefixes repeat a lot; results are cached per (prefix, limit) until the next write.
+RESULT_CACHE_SIZE = 2048
+
+class PrefixIndex:
+    """
+    Sorted array of folded name keys for prefix type-ahead. Each word start of a name is a key, so
+    "cha" finds "Bún chả" as well as "Chả giò". A prefix selects a contiguous key range with two
+    bisections, and the top-k of that range is picked by score = log(1 + popularity), plus 1 when the
+    name itself (not a later word) starts with the prefix.
+    """
+
+    def __init__(self, label: str):
+        self.label = label
+        self._lock = threading.Lock()
+        self._keys = []          # sorted folded keys
+        self._refs = array("q")  # id of the name each key belongs to, parallel to _keys
+        self._names = {}         # id -> (name, folded, popularity)
+        self._results = OrderedDict()
+        self.loaded = False
+        self.loaded_at = 0.0
+
+    def load(self, rows):
+        """rows: (id, name, popularity)."""
+        names = {}
+        pairs = []
+        for id, name, popularity in rows:
+            folded = fold(name or "")
+            names[id] = (name or "", folded, popularity or 0)
+            pairs.extend((key, id) for key in self._word_keys(folded))
+        pairs.sort()
+
+        with self._lock:
+            self._keys = [key for key, _ in pairs]
+            self._refs = array("q", (id for _, id in pairs))
+            self._names = names
+            self._results = OrderedDict()
+            self.loaded = True
+            self.loaded_at = time.monotonic()
+        logger.info(f"{self.label} autocomplete index loaded: {len(names)} names, {len(pairs)} keys")
+
+    def upsert(self, id: int, name: str):
+        """Add or rename one entry in place; a renamed entry keeps its popularity."""
+        folded = fold(name or "")
+        with self._lock:
+            previous = self._names.get(id)
+            if previous is not None:
+                self._remove_keys(id, previous[1])
+            self._names[id] = (name or "", folded, previous[2] if previous else 0)
+            for key in self._word_keys(folded):
+                position = bisect.bisect_right(self._keys, key)
+                self._keys.insert(position, key)
+                self._refs.insert(position, id)
+            self._results.clear()
+
+    def search(self, prefix: str, limit: int = 10) -> list[tuple[float, int, str]]:
+        """Top (score, id, name) entries whose name or one of its words starts with prefix, best first."""
+        folded = fold(prefix)
+        if not folded:
+            return []
+        cache_key = (folded, limit)
+
+        with self._lock:
+            cached = self._results.get(cache_key)
+            if cached is not None:
+                self._results.move_to_end(cache_key)
+                return list(cached)
+
+            start = bisect.bisect_left(self._keys, folded)
+            end = bisect.bisect_left(self._keys, folded + "\uffff", start)
+            candidates = {}
+            for id in self._refs[start:end]:
+                if id not in candidates:
+                    name, folded_name, popularity = self._names[id]
+                    candidates[id] = (
+                        math.log1p(popularity) + (1.0 if folded_name.startswith(folded) else 0.0),
+                        -len(name),
+                        name,
+                    )
+            best = heapq.nlargest(limit, candidates.items(), key=lambda item: item[1])
+            result = [(score, id, name) for id, (score, _, name) in best]
+
+            self._results[cache_key] = result
+            if len(self._results) > RESULT_CACHE_SIZE:
+                self._results.popitem(last=False)
+        return list(result)
+
+    def __len__(self):
+        return len(self._names)
+
+    def _remove_keys(self, id: int, folded: str):
+        # Called with the lock held.
+        for key in self._word_keys(folded):
+            position = bisect.bisect_left(self._keys, key)
+            while position < len(self._keys) and self._keys[position] == key:
+                if self._refs[position] == id:
+                    del self._keys[position]
+                    del self._refs[position]
+                    break
+                position += 1
+
+    @staticmethod
+    def _word_keys(folded: str) -> list[str]:
+        words = folded.split(" ")
+        return [" ".join(words[i:]) for i in range(len(words)) if words[i]]
+
+dish_autocomplete = PrefixIndex("Dish")
+ingredient_autocomplete = PrefixIndex("Ingredient")
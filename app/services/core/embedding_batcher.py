@@ -0,0 +1,141 @@
+import asyncio
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+# Recent batches kept for the size / wait percentiles.
+STATS_WINDOW = 2048
+
+class EmbeddingBatchStats:
+    """Batch sizes, queue waits and forward-pass times of the query batcher, over the last STATS_WINDOW batches."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def record(self, size: int, unique: int, waits_ms: list[float], forward_ms: float, error: bool = False):
+        with self._lock:
+            self._batches += 1
+            self._requests += size
+            self._errors += 1 if error else 0
+            self._sizes.append(size)
+            self._unique.append(unique)
+            self._forward.append(forward_ms)
+            self._waits.extend(waits_ms)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            sizes, unique = list(self._sizes), list(self._unique)
+            waits, forward = sorted(self._waits), sorted(self._forward)
+            batches, requests, errors = self._batches, self._requests, self._errors
+        return {
+            "batches": batches,
+            "requests": requests,
+            "errors": errors,
+            "avgBatchSize": round(sum(sizes) / len(sizes), 2) if sizes else 0.0,
+            "maxBatchSize": max(sizes, default=0),
+            "avgUniqueTexts": round(sum(unique) / len(unique), 2) if unique else 0.0,
+            "queueWaitMs": {"p50": _percentile(waits, 0.50), "p95": _percentile(waits, 0.95), "max": _percentile(waits, 1.0)},
+            "forwardMs": {"p50": _percentile(forward, 0.50), "p95": _percentile(forward, 0.95), "max": _percentile(forward, 1.0)},
+        }
+
+    def reset(self):
+        with self._lock:
+            self._batches = 0
+            self._requests = 0
+            self._errors = 0
+            self._sizes = deque(maxlen=STATS_WINDOW)
+            self._unique = deque(maxlen=STATS_WINDOW)
+            self._forward = deque(maxlen=STATS_WINDOW)
+            self._waits = deque(maxlen=STATS_WINDOW * 4)
+
+def _percentile(values: list[float], q: float):
+    if not values:
+        return None
+    return round(values[min(len(values) - 1, int(q * len(values)))], 3)
+
+class BatchingEmbeddings(Embeddings):
+    """
+    Micro-batching wrapper for query embeddings. Concurrent embed_query / aembed_query calls are queued; one
+    worker thread takes the first waiting query, collects more for up to max_wait_ms or until max_batch,
+    and embeds them in a single forward pass, so concurrent retrievals share the transformer's batch
+    throughput instead of running as separate batches of one. Identical texts in a batch are embedded once.
+
+    embed_documents calls are already batched and go straight to the wrapped model.
+    """
+
+    def __init__(self, inner: Embeddings, max_batch: int = 32, max_wait_ms: float = 5, stats: EmbeddingBatchStats = None):
+        self.inner = inner
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.stats = stats or embedding_batch_stats
+        self._queue = queue.Queue()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self.inner.embed_documents(texts)
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        return await asyncio.to_thread(self.inner.embed_documents, texts)
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.submit(text).result()
+
+    async def aembed_query(self, text: str) -> list[float]:
+        # Awaits the batch without holding an executor thread.
+        return await asyncio.wrap_future(self.submit(text))
+
+    def submit(self, text: str) -> Future:
+        future = Future()
+        self._ensure_worker()
+        self._queue.put((text, future, time.perf_counter()))
+        return future
+
+    def _ensure_worker(self):
+        if self._worker is not None:
+            return
+        with self._worker_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = batch[0][2] + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                try:
+                    batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._embed(batch)
+
+    def _embed(self, batch: list[tuple]):
+        started = time.perf_counter()
+        # Callers that gave up (e.g. a cancelled request) are dropped before the forward pass.
+        batch = [item for item in batch if item[1].set_running_or_notify_cancel()]
+        if not batch:
+            return
+        waits_ms = [(started - queued_at) * 1000 for _, _, queued_at in batch]
+        texts = list(dict.fromkeys(text for text, _, _ in batch))
+        try:
+            vectors = dict(zip(texts, self.inner.embed_documents(texts)))
+        except Exception as e:
+            logger.error(f"Embedding batch of {len(batch)} failed: {e}")
+            for _, future, _ in batch:
+                future.set_exception(e)
+            self.stats.record(len(batch), len(texts), waits_ms, (time.perf_counter() - started) * 1000, error=True)
+            return
+        for text, future, _ in batch:
+            future.set_result(vectors[text])
+        self.stats.record(len(batch), len(texts), waits_ms, (time.perf_counter() - started) * 1000)
+
+embedding_batch_stats = EmbeddingBatchStats()
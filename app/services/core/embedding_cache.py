@@ -0,0 +1,205 @@
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+_SPACE = re.compile(r"\s+")
+# The on-disk tier is trimmed back to its limit every TRIM_EVERY inserts.
+TRIM_EVERY = 1000
+
+def normalize_text(text: str) -> str:
+    """Cache key text: NFC, trimmed, whitespace collapsed. Case is kept, since the model is case sensitive."""
+    return _SPACE.sub(" ", unicodedata.normalize("NFC", text or "")).strip()
+
+def cache_key(text: str, version: str) -> str:
+    return hashlib.sha256(f"{version}\0{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+class EmbeddingCacheStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.cache = None  # the CachedEmbeddings reporting here, for its sizes
+        self.reset()
+
+    def count(self, name: str):
+        with self._lock:
+            self._counts[name] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counts = dict(self._counts)
+        lookups = counts["memoryHits"] + counts["diskHits"] + counts["misses"]
+        hits = counts["memoryHits"] + counts["diskHits"]
+        snapshot = {**counts, "lookups": lookups, "hitRate": round(hits / lookups, 4) if lookups else None}
+        if self.cache is not None:
+            snapshot.update({
+                "version": self.cache.version,
+                "memoryEntries": len(self.cache),
+                "maxMemoryEntries": self.cache.max_entries,
+                "diskEntries": self.cache.disk_entries(),
+            })
+        return snapshot
+
+    def reset(self):
+        with self._lock:
+            self._counts = {"memoryHits": 0, "diskHits": 0, "misses": 0, "diskErrors": 0}
+
+class CachedEmbeddings(Embeddings):
+    """
+    Query-embedding cache in front of the embedding model. Retrieval strings repeat a lot (fixed prompt
+    templates, vibe lists, shared constraints), so vectors are kept under a hash of the normalized text
+    and the model version, in a bounded in-memory LRU and optionally in a SQLite file that survives
+    restarts. Changing the model or backend changes the version, so stale vectors are never served.
+
+    Only queries are cached; embed_documents (catalog indexing) goes straight to the wrapped model.
+    """
+
+    def __init__(self, inner: Embeddings, version: str, max_entries: int = 4096, path: str = None,
+                 max_disk_entries: int = 200000, stats: EmbeddingCacheStats = None):
+        self.inner = inner
+        self.version = version
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.stats = stats or embedding_cache_stats
+        self.stats.cache = self
+        self._memory = OrderedDict()  # key -> float32 vector
+        self._lock = threading.Lock()
+        self._db = None
+        self._db_lock = threading.Lock()
+        self._inserts = 0
+        if path:
+            self._open_disk(path)
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self.inner.embed_documents(texts)
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        return await self.inner.aembed_documents(texts)
+
+    def embed_query(self, text: str) -> list[float]:
+        key = cache_key(text, self.version)
+        vector = self._memory_get(key)
+        if vector is None:
+            vector = self._disk_get(key)
+        if vector is None:
+            vector = np.asarray(self.inner.embed_query(text), dtype=np.float32)
+            self._store(key, vector)
+        return vector.tolist()
+
+    async def aembed_query(self, text: str) -> list[float]:
+        key = cache_key(text, self.version)
+        vector = self._memory_get(key)
+        if vector is None and self._db is not None:
+            vector = await asyncio.to_thread(self._disk_get, key)
+        if vector is None:
+            vector = np.asarray(await self.inner.aembed_query(text), dtype=np.float32)
+            if self._db is not None:
+                await asyncio.to_thread(self._store, key, vector)
+            else:
+                self._store(key, vector)
+        return vector.tolist()
+
+    def __len__(self):
+        return len(self._memory)
+
+    def disk_entries(self):
+        if self._db is None:
+            return None
+        with self._db_lock:
+            return self._db.execute("SELECT COUNT(*) FROM embedding_cache").fetchone()[0]
+
+    def _memory_get(self, key: str):
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+        if vector is not None:
+            self.stats.count("memoryHits")
+        elif self._db is None:
+            self.stats.count("misses")
+        return vector
+
+    def _memory_put(self, key: str, vector: np.ndarray):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._memory[key] = vector
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _disk_get(self, key: str):
+        if self._db is None:
+            return None
+        try:
+            with self._db_lock:
+                row = self._db.execute("SELECT vector FROM embedding_cache WHERE key = ?", (key,)).fetchone()
+        except sqlite3.Error as e:
+            self.stats.count("diskErrors")
+            logger.warning(f"Embedding cache read failed: {e}")
+            row = None
+        if row is None:
+            self.stats.count("misses")
+            return None
+        self.stats.count("diskHits")
+        vector = np.frombuffer(row[0], dtype=np.float32)
+        self._memory_put(key, vector)
+        return vector
+
+    def _store(self, key: str, vector: np.ndarray):
+        self._memory_put(key, vector)
+        if self._db is None:
+            return
+        try:
+            with self._db_lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO embedding_cache (key, vector, createdat) VALUES (?, ?, ?)",
+                    (key, vector.tobytes(), time.time()),
+                )
+                self._inserts += 1
+                if self._inserts % TRIM_EVERY == 0:
+                    self._trim_disk()
+                self._db.commit()
+        except sqlite3.Error as e:
+            self.stats.count("diskErrors")
+            logger.warning(f"Embedding cache write failed: {e}")
+
+    def _trim_disk(self):
+        # Called with _db_lock held: drop the oldest rows beyond max_disk_entries.
+        self._db.execute("""
+            DELETE FROM embedding_cache WHERE key IN (
+                SELECT key FROM embedding_cache ORDER BY createdat DESC LIMIT -1 OFFSET ?
+            )
+        """, (self.max_disk_entries,))
+
+    def _open_disk(self, path: str):
+        try:
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+            db = sqlite3.connect(path, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute("""
+                CREATE TABLE IF NOT EXISTS embedding_cache (
+                    key TEXT PRIMARY KEY,
+                    vector BLOB NOT NULL,
+                    createdat REAL NOT NULL
+                )
+            """)
+            db.execute("CREATE INDEX IF NOT EXISTS embedding_cache_createdat_idx ON embedding_cache (createdat)")
+            db.commit()
+            self._db = db
+        except sqlite3.Error as e:
+            # The memory tier still works without the file.
+            logger.warning(f"Embedding disk cache disabled ({path}): {e}")
+
+embedding_cache_stats = EmbeddingCacheStats()
@@ -0,0 +1,89 @@
+import logging
+import threading
+import time
+import numpy as np
+from app.helpers.nutrition_calculations import NUTRIENTS, NUTRIENT_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+KCAL = NUTRIENT_COLUMNS.index("kcal")
+
+class IngredientMatrix:
+    """
+    Ingredient × nutrient matrix (values per 100 g) kept in memory, so recipe totals are a dot product
+    instead of a database round trip. Rows are (id, gramPerUnit, *NUTRIENT_COLUMNS).
+    Updates swap in a new (index, values, gramPerUnit) tuple in one assignment and readers take it in one
+    read, so they never pair the index of one matrix with the arrays of another, even while load() runs in
+    a worker thread. Edits made by other processes are picked up by a full reload once loaded_at is old.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data = ({}, np.zeros((0, len(NUTRIENT_COLUMNS))), np.zeros(0))
+        self.loaded = False
+        self.loaded_at = 0.0
+
+    def load(self, rows):
+        index, values, gram_per_unit = self._build(rows)
+        with self._lock:
+            self._data = (index, values, gram_per_unit)
+            self.loaded = True
+            self.loaded_at = time.monotonic()
+        logger.info(f"Ingredient matrix loaded: {len(index)} ingredients")
+
+    def upsert(self, rows):
+        if not rows:
+            return
+        _, new_values, new_gram_per_unit = self._build(rows)
+        with self._lock:
+            index, values, gram_per_unit = self._data
+            index, values, gram_per_unit = dict(index), values.copy(), gram_per_unit.copy()
+
+            appended = []
+            for i, row in enumerate(rows):
+                position = index.get(row[0])
+                if position is None:
+                    index[row[0]] = len(gram_per_unit) + len(appended)
+                    appended.append(i)
+                else:
+                    values[position] = new_values[i]
+                    gram_per_unit[position] = new_gram_per_unit[i]
+            if appended:
+                values = np.vstack([values, new_values[appended]])
+                gram_per_unit = np.concatenate([gram_per_unit, new_gram_per_unit[appended]])
+
+            self._data = (index, values, gram_per_unit)
+
+    def missing(self, ids) -> list[int]:
+        index = self._data[0]
+        return [i for i in dict.fromkeys(ids) if i not in index]
+
+    def compute(self, items: list[tuple[int, float]]) -> dict:
+        """Totals for (ingredientId, weight) pairs, computed like the dish_nutrition refresh."""
+        index, values, gram_per_unit = self._data
+        unknown = [i for i, _ in items if i not in index]
+        if unknown:
+            raise KeyError(f"Ingredient not found: {unknown}")
+
+        rows = np.fromiter((index[i] for i, _ in items), dtype=np.intp, count=len(items))
+        weights = np.fromiter((w for _, w in items), dtype=np.float64, count=len(items))
+        grams = weights * gram_per_unit[rows]
+
+        totals = weights @ values[rows] / 100.0
+        return {
+            "totalWeight": float(weights.sum()),
+            "totalGram": float(grams.sum()),
+            "totalGramKcal": float(grams @ values[rows, KCAL] / 100.0),
+            "nutrients": {key: float(v) for (_, key), v in zip(NUTRIENTS, totals)},
+        }
+
+    @staticmethod
+    def _build(rows):
+        index = {row[0]: i for i, row in enumerate(rows)}
+        data = np.array(
+            [[v if v is not None else 0 for v in row[1:]] for row in rows],
+            dtype=np.float64,
+        ).reshape(len(rows), len(NUTRIENT_COLUMNS) + 1)
+        return index, data[:, 1:], data[:, 0]
+
+ingredient_matrix = IngredientMatrix()
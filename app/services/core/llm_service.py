@@ -1,7 +1,9 @@
 from langchain_deepseek import ChatDeepSeek
 from langchain.callbacks.streaming_stdout import StreamingStdOutCallbackHandler
-from langchain_community.embeddings import HuggingFaceEmbeddings
 from app.core.config import settings
+from app.services.core.embedding_backends import create_embeddings, embedding_version
+from app.services.core.embedding_batcher import BatchingEmbeddings
+from app.services.core.embedding_cache import CachedEmbeddings
 
 class LLMService:
     def __init__(self):
@@ -18,11 +20,23 @@ class LLMService:
         self._embeddings = self._init_embeddings()
 
     def _init_embeddings(self):
-        model_name = "Alibaba-NLP/gte-multilingual-base"
-        return HuggingFaceEmbeddings(
-            model_name=model_name,
-            model_kwargs={"trust_remote_code": True}
-        )
+        # EMBEDDING_BACKEND picks fp32 PyTorch or the int8 ONNX export.
+        backend = create_embeddings()
+        embeddings = backend
+        if settings.EMBEDDING_BATCHING:
+            embeddings = BatchingEmbeddings(
+                embeddings, max_batch=settings.EMBEDDING_MAX_BATCH, max_wait_ms=settings.EMBEDDING_MAX_WAIT_MS
+            )
+        # Cache hits never reach the batch queue.
+        if settings.EMBEDDING_CACHE_SIZE > 0 or settings.EMBEDDING_CACHE_PATH:
+            embeddings = CachedEmbeddings(
+                embeddings,
+                version=embedding_version(backend),
+                max_entries=settings.EMBEDDING_CACHE_SIZE,
+                path=settings.EMBEDDING_CACHE_PATH or None,
+                max_disk_entries=settings.EMBEDDING_CACHE_DISK_MAX,
+            )
+        return embeddings
 
     def get_llm(self):
         return self._llm
@@ -0,0 +1,177 @@
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+from app.helpers.text_folding import fold, trigrams
+
+logger = logging.getLogger(__name__)
+
+# Same cut-off as pg_trgm's default similarity_threshold, used by the `name % keyword` queries it replaces.
+SIMILARITY_THRESHOLD = 0.3
+# Keystroke lookups repeat a lot; results are cached per folded keyword until the next write.
+RESULT_CACHE_SIZE = 1024
+
+_NO_SLOTS = np.zeros(0, dtype=np.int32)
+
+class NameIndex:
+    """
+    In-memory trigram inverted index over (id, name) pairs, answering the "similar names" lookups
+    that used to run `name ILIKE '%kw%' OR name % kw` in PostgreSQL. Names and keywords are folded
+    (lower case, no Vietnamese diacritics), so "pho bo" finds "Phở bò".
+
+    Each name owns a slot; posting lists map a trigram to slots and are counted with np.bincount,
+    so scoring every name that shares a trigram with the keyword stays in C.
+    """
+
+    def __init__(self, label: str):
+        self.label = label
+        self._lock = threading.Lock()
+        self._slot_of = {}   # id -> slot
+        self._entries = []   # slot -> (name, folded) or None once removed
+        self._sizes = np.zeros(0)  # slot -> number of trigrams of the name
+        self._postings = {}  # trigram -> set of slots
+        self._arrays = {}    # trigram -> posting as an int array, rebuilt lazily after writes
+        self._haystack = None  # (joined folded names, start offsets, slots), rebuilt lazily after writes
+        self._results = OrderedDict()
+        self.loaded = False
+        self.loaded_at = 0.0
+
+    def load(self, rows):
+        slot_of = {}
+        entries = []
+        sizes = []
+        postings = {}
+        for id, name in rows:
+            if id in slot_of:
+                continue
+            grams = trigrams(name or "")
+            slot = slot_of[id] = len(entries)
+            entries.append((name or "", fold(name or "")))
+            sizes.append(len(grams))
+            for gram in grams:
+                postings.setdefault(gram, set()).add(slot)
+
+        with self._lock:
+            self._slot_of, self._entries, self._postings = slot_of, entries, postings
+            self._sizes = np.array(sizes, dtype=np.float64)
+            self._arrays = {}
+            self._haystack = None
+            self._results = OrderedDict()
+            self.loaded = True
+            self.loaded_at = time.monotonic()
+        logger.info(f"{self.label} name index loaded: {len(entries)} names")
+
+    def upsert(self, id: int, name: str):
+        grams = trigrams(name or "")
+        with self._lock:
+            slot = self._slot_of.get(id)
+            if slot is None:
+                slot = self._slot_of[id] = len(self._entries)
+                self._entries.append(None)
+                self._sizes = np.append(self._sizes, 0.0)
+            else:
+                self._clear_slot(slot)
+            self._entries[slot] = (name or "", fold(name or ""))
+            self._sizes[slot] = len(grams)
+            for gram in grams:
+                self._postings.setdefault(gram, set()).add(slot)
+                self._arrays.pop(gram, None)
+            self._haystack = None
+            self._results.clear()
+
+    def remove(self, id: int):
+        with self._lock:
+            slot = self._slot_of.pop(id, None)
+            if slot is None:
+                return
+            self._clear_slot(slot)
+            self._entries[slot] = None
+            self._haystack = None
+            self._results.clear()
+
+    def search(self, keyword: str, limit: int = 10) -> list[str]:
+        """Names containing the keyword or trigram-similar to it, most similar first."""
+        folded = fold(keyword)
+        if not folded:
+            return []
+        key = (folded, limit)
+
+        with self._lock:
+            cached = self._results.get(key)
+            if cached is not None:
+                self._results.move_to_end(key)
+                return list(cached)
+
+            size = len(self._entries)
+            query = trigrams(folded)
+            shared = self._count(query, size)
+            scores = shared / np.maximum(len(query) + self._sizes - shared, 1.0)
+            matched = scores >= SIMILARITY_THRESHOLD
+
+            # A name containing the keyword has every space-free trigram of it; keywords with one or
+            # two letters per word have none, so the concatenated folded names are searched instead.
+            inner = [gram for gram in query if " " not in gram]
+            if inner:
+                for slot in np.flatnonzero(self._count(inner, size) >= len(inner)):
+                    if folded in self._entries[slot][1]:
+                        matched[slot] = True
+            else:
+                matched[self._find_in_haystack(folded)] = True
+
+            hits = np.flatnonzero(matched)
+            top = hits[np.argsort(-scores[hits], kind="stable")[:limit]]
+            result = [self._entries[slot][0] for slot in top]
+
+            self._results[key] = result
+            if len(self._results) > RESULT_CACHE_SIZE:
+                self._results.popitem(last=False)
+        return list(result)
+
+    def __len__(self):
+        return len(self._slot_of)
+
+    def _count(self, grams, size: int) -> np.ndarray:
+        # Called with the lock held: number of the given trigrams each slot has.
+        arrays = [self._posting_array(gram) for gram in grams]
+        if not arrays:
+            return np.zeros(size)
+        return np.bincount(np.concatenate(arrays), minlength=size).astype(np.float64)
+
+    def _posting_array(self, gram: str) -> np.ndarray:
+        array = self._arrays.get(gram)
+        if array is None:
+            slots = self._postings.get(gram)
+            array = np.fromiter(slots, dtype=np.int32, count=len(slots)) if slots else _NO_SLOTS
+            self._arrays[gram] = array
+        return array
+
+    def _find_in_haystack(self, folded: str) -> np.ndarray:
+        # Called with the lock held: slots whose folded name contains the keyword.
+        if self._haystack is None:
+            slots = [slot for slot, entry in enumerate(self._entries) if entry is not None]
+            lengths = np.fromiter((len(self._entries[slot][1]) + 1 for slot in slots), dtype=np.int64, count=len(slots))
+            offsets = np.concatenate([[0], np.cumsum(lengths)[:-1]]) if slots else lengths
+            text = "\n".join(self._entries[slot][1] for slot in slots)
+            self._haystack = (text, offsets, np.array(slots, dtype=np.int64))
+        text, offsets, slots = self._haystack
+        starts = np.fromiter((m.start() for m in re.finditer(re.escape(folded), text)), dtype=np.int64)
+        return slots[np.searchsorted(offsets, starts, side="right") - 1]
+
+    def _clear_slot(self, slot: int):
+        # Called with the lock held: drop the slot from the posting lists of its current name.
+        entry = self._entries[slot]
+        if entry is None:
+            return
+        for gram in trigrams(entry[1]):
+            slots = self._postings.get(gram)
+            if slots is not None:
+                slots.discard(slot)
+                if not slots:
+                    del self._postings[gram]
+            self._arrays.pop(gram, None)
+        self._sizes[slot] = 0.0
+
+ingredient_name_index = NameIndex("Ingredient")
+dish_name_index = NameIndex("Dish")
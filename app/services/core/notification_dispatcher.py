@@ -0,0 +1,262 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+from app.core.config import settings
+from app.core.database import read_your_writes
+from app.core.notification import get_transport, MULTICAST_LIMIT, PushResult
+from app.repositories.async_base_repository import run_repository, iterate_repository
+from app.repositories.provider import get_notification_repository
+
+logger = logging.getLogger(__name__)
+
+# Longest wait between two attempts of the same push, in seconds.
+MAX_RETRY_DELAY = 3600
+
+class NotificationDispatcher:
+    """
+    Background sender for the notification outbox. Each round leases up to batch_size due rows, sends
+    pushes that share a title and body as one multicast and the remaining ones as one send_each batch,
+    then records SENT, a retry with exponential backoff, or FAILED for every row.
+
+    Broadcasts are leased in the same rounds and sent by their own task: receiver tokens are streamed
+    from a server-side cursor and pushed as MULTICAST_LIMIT-token multicasts, broadcast_concurrency at
+    a time, with progress recorded after each window so an interrupted broadcast resumes where it stopped.
+
+    The transport is pluggable (FirebaseTransport, FakeTransport, or any object with send_multicast and
+    send_each) and runs in a worker thread, since the Firebase SDK is blocking.
+    """
+
+    def __init__(self, transport=None, batch_size: int = None, poll_interval: float = None,
+                 max_attempts: int = None, retry_base: float = None, lease: float = None,
+                 broadcast_concurrency: int = None):
+        self.transport = transport
+        self.batch_size = batch_size or settings.NOTIFICATION_BATCH_SIZE
+        self.poll_interval = poll_interval or settings.NOTIFICATION_POLL_INTERVAL
+        self.max_attempts = max_attempts or settings.NOTIFICATION_MAX_ATTEMPTS
+        self.retry_base = retry_base or settings.NOTIFICATION_RETRY_BASE
+        self.lease = lease or settings.NOTIFICATION_LEASE
+        self.broadcast_concurrency = broadcast_concurrency or settings.NOTIFICATION_BROADCAST_CONCURRENCY
+        self.repository = None
+        self._task = None
+        self._broadcasts = {}  # broadcast id -> sending task
+        self._wake = None
+        self._loop = None
+        self._stopping = False
+        self._lock = threading.Lock()
+        self._stats = {"rounds": 0, "claimed": 0, "sent": 0, "retried": 0, "failed": 0, "transportCalls": 0,
+                       "broadcasts": 0, "broadcastPushed": 0, "broadcastRetried": 0, "broadcastFailed": 0}
+        self._last_error = None
+        self._last_round_at = None
+
+    def start(self, repository=None):
+        """Start the dispatch loop on the running event loop (idempotent)."""
+        if self._task is not None and not self._task.done():
+            return
+        self.repository = repository or self.repository or get_notification_repository()
+        if self.transport is None:
+            self.transport = get_transport()
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Notification dispatcher started ({self.transport.name} transport)")
+
+    async def stop(self, timeout: float = 10):
+        """Finish the current round and stop."""
+        if self._task is None:
+            return
+        self._stopping = True
+        self._wake.set()
+        try:
+            await asyncio.wait_for(self._task, timeout)
+        except asyncio.TimeoutError:
+            self._task.cancel()
+        self._task = None
+        # Unfinished broadcasts keep their progress and are resumed by the next dispatcher once the lease ends.
+        for task in list(self._broadcasts.values()):
+            task.cancel()
+        await asyncio.gather(*self._broadcasts.values(), return_exceptions=True)
+        self._broadcasts.clear()
+
+    def wake(self):
+        """Ask for a round now instead of at the next poll; safe to call from any thread."""
+        if self._loop is None or self._wake is None:
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._wake.set)
+        except RuntimeError:
+            # The loop is closed: nothing to wake.
+            pass
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def _run(self):
+        while not self._stopping:
+            handled = 0
+            try:
+                handled = await self.run_once()
+                await self._claim_broadcasts()
+            except Exception as e:
+                self._last_error = str(e)
+                logger.error(f"Notification dispatch round failed: {e}")
+            if self._stopping:
+                break
+            # A full batch means more rows are probably due: go again without waiting.
+            if handled < self.batch_size:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wake.clear()
+
+    async def run_once(self) -> int:
+        """One round: lease, send and record a batch. Returns the number of rows handled."""
+        repository = self.repository or get_notification_repository()
+        transport = self.transport or get_transport()
+        rows = await run_repository(repository.claim_outbox, self.batch_size, self.lease)
+        self._last_round_at = time.time()
+        if not rows:
+            return 0
+
+        groups = {}
+        for id, token, title, body, attempts in rows:
+            groups.setdefault((title, body), []).append((id, token, attempts))
+
+        calls = []
+        singles = []
+        for (title, body), items in groups.items():
+            if len(items) == 1:
+                id, token, attempts = items[0]
+                singles.append((id, attempts, (token, title, body)))
+                continue
+            for start in range(0, len(items), MULTICAST_LIMIT):
+                chunk = items[start:start + MULTICAST_LIMIT]
+                calls.append((
+                    [(id, attempts) for id, _, attempts in chunk],
+                    transport.send_multicast, ([token for _, token, _ in chunk], title, body),
+                ))
+        for start in range(0, len(singles), MULTICAST_LIMIT):
+            chunk = singles[start:start + MULTICAST_LIMIT]
+            calls.append((
+                [(id, attempts) for id, attempts, _ in chunk],
+                transport.send_each, ([message for _, _, message in chunk],),
+            ))
+
+        outcomes = await asyncio.gather(*(self._send(method, args, len(targets)) for targets, method, args in calls))
+
+        sent, retries, failures = [], [], []
+        for (targets, _, _), results in zip(calls, outcomes):
+            for (id, attempts), result in zip(targets, results):
+                if result.ok:
+                    sent.append(id)
+                elif result.retryable and attempts < self.max_attempts:
+                    retries.append((id, self._retry_delay(attempts), result.error))
+                else:
+                    failures.append((id, result.error))
+
+        await run_repository(repository.complete_outbox, sent, retries, failures)
+
+        with self._lock:
+            self._stats["rounds"] += 1
+            self._stats["claimed"] += len(rows)
+            self._stats["sent"] += len(sent)
+            self._stats["retried"] += len(retries)
+            self._stats["failed"] += len(failures)
+            self._stats["transportCalls"] += len(calls)
+        return len(rows)
+
+    async def _claim_broadcasts(self):
+        repository = self.repository or get_notification_repository()
+        for id, title, body, after_id in await run_repository(repository.claim_broadcasts, self.lease):
+            if id in self._broadcasts:
+                continue
+            task = asyncio.create_task(self.send_broadcast(id, title, body, after_id))
+            self._broadcasts[id] = task
+            task.add_done_callback(lambda _, id=id: self._broadcasts.pop(id, None))
+
+    async def send_broadcast(self, broadcast_id: int, title: str, body: str, after_id: int = 0):
+        """Push a leased broadcast to every receiver with a token after after_id, then mark it DONE."""
+        repository = self.repository or get_notification_repository()
+        transport = self.transport or get_transport()
+        try:
+            # The notifications were just written on the primary: a replica may not have them yet.
+            with read_your_writes(pinned=True):
+                window = []
+                async for chunk in iterate_repository(repository.iter_broadcast_tokens, broadcast_id, after_id, MULTICAST_LIMIT):
+                    window.append(chunk)
+                    if len(window) >= self.broadcast_concurrency:
+                        await self._send_broadcast_window(repository, transport, broadcast_id, title, body, window)
+                        window = []
+                if window:
+                    await self._send_broadcast_window(repository, transport, broadcast_id, title, body, window)
+            await run_repository(repository.finish_broadcast, broadcast_id)
+            with self._lock:
+                self._stats["broadcasts"] += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Left SENDING: retried from the last recorded window once the lease expires.
+            self._last_error = str(e)
+            logger.error(f"Broadcast {broadcast_id} interrupted: {e}")
+
+    async def _send_broadcast_window(self, repository, transport, broadcast_id: int, title: str, body: str, window: list):
+        outcomes = await asyncio.gather(*(
+            self._send(transport.send_multicast, ([token for _, token in chunk], title, body), len(chunk))
+            for chunk in window
+        ))
+        pushed, retries, failures = 0, [], []
+        for chunk, results in zip(window, outcomes):
+            for (notification_id, token), result in zip(chunk, results):
+                if result.ok:
+                    pushed += 1
+                elif result.retryable:
+                    retries.append((notification_id, token, self._retry_delay(1), result.error))
+                else:
+                    failures.append((notification_id, token, 0.0, result.error))
+
+        last_id = window[-1][-1][0]
+        await run_repository(
+            repository.record_broadcast_progress,
+            broadcast_id, title, body, pushed, retries, failures, last_id, self.lease,
+        )
+        with self._lock:
+            self._stats["broadcastPushed"] += pushed
+            self._stats["broadcastRetried"] += len(retries)
+            self._stats["broadcastFailed"] += len(failures)
+            self._stats["transportCalls"] += len(window)
+
+    async def _send(self, method, args, count: int) -> list[PushResult]:
+        try:
+            results = await asyncio.to_thread(method, *args)
+        except Exception as e:
+            # The whole call failed (network, auth...): every push in it is retried.
+            self._last_error = str(e)
+            logger.error(f"Push transport error: {e}")
+            return [PushResult(False, str(e), True)] * count
+        if len(results) != count:
+            return [PushResult(False, "Transport returned a wrong number of results", True)] * count
+        return results
+
+    def _retry_delay(self, attempts: int) -> float:
+        delay = min(self.retry_base * 2 ** (attempts - 1), MAX_RETRY_DELAY)
+        # Jitter so pushes that failed together do not all come back at the same second.
+        return delay * random.uniform(0.8, 1.2)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+        stats.update({
+            "running": self.running,
+            "activeBroadcasts": len(self._broadcasts),
+            "transport": getattr(self.transport, "name", None),
+            "batchSize": self.batch_size,
+            "lastRoundAt": self._last_round_at,
+            "lastError": self._last_error,
+        })
+        return stats
+
+notification_dispatcher = NotificationDispatcher()
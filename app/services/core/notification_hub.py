@@ -0,0 +1,147 @@
+import asyncio
+import json
+import logging
+from app.core.config import settings
+from app.core.database import connect_async_listener
+from app.repositories.async_base_repository import run_repository
+from app.repositories.provider import get_notification_repository
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "notification_new"
+# Seconds before the listener reconnects after losing its connection (doubled up to RECONNECT_MAX).
+RECONNECT_DELAY = 1
+RECONNECT_MAX = 30
+
+class NotificationHub:
+    """
+    Fan-out of new notifications to server-sent-event subscribers. One LISTEN connection per process
+    receives the notification_new messages sent by the insert trigger (migration 009) and puts each row
+    on the queues of the subscribers of its receiver. The listener starts with the first subscriber.
+
+    A subscriber whose queue is full is dropped (its stream ends and the client reconnects with
+    Last-Event-ID), so one stalled client never holds up delivery to the others.
+    """
+
+    def __init__(self, queue_size: int = None):
+        self.queue_size = queue_size or settings.NOTIFICATION_STREAM_QUEUE
+        self.repository = None
+        self._subscribers = {}  # receiver id -> set of queues
+        self._task = None
+        self._connection = None
+        self._stopping = False
+        self._stats = {"received": 0, "delivered": 0, "dropped": 0, "reconnects": 0}
+
+    def subscribe(self, receiver_id: int) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.setdefault(receiver_id, set()).add(queue)
+        self._ensure_listening()
+        return queue
+
+    def unsubscribe(self, receiver_id: int, queue: asyncio.Queue):
+        queues = self._subscribers.get(receiver_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[receiver_id]
+
+    async def stop(self):
+        self._stopping = True
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        for queues in self._subscribers.values():
+            for queue in queues:
+                self._close(queue)
+        self._subscribers.clear()
+
+    def stats(self) -> dict:
+        return {
+            **self._stats,
+            "listening": self._connection is not None,
+            "receivers": len(self._subscribers),
+            "subscribers": sum(len(queues) for queues in self._subscribers.values()),
+        }
+
+    def _ensure_listening(self):
+        if self._task is None or self._task.done():
+            self._stopping = False
+            self._task = asyncio.create_task(self._listen())
+
+    async def _listen(self):
+        delay = RECONNECT_DELAY
+        while not self._stopping:
+            try:
+                self._connection = await connect_async_listener()
+                await self._connection.execute(f"LISTEN {CHANNEL}")
+                logger.info(f"Listening on {CHANNEL}")
+                delay = RECONNECT_DELAY
+                async for notify in self._connection.notifies():
+                    await self._dispatch(notify.payload)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Messages sent while disconnected are lost: clients catch up with Last-Event-ID on reconnect.
+                self._stats["reconnects"] += 1
+                logger.warning(f"Notification listener disconnected, retrying in {delay}s: {e}")
+            finally:
+                await self._disconnect()
+            if not self._stopping:
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, RECONNECT_MAX)
+
+    async def _disconnect(self):
+        connection, self._connection = self._connection, None
+        if connection is not None:
+            try:
+                await connection.close()
+            except Exception:
+                pass
+
+    async def _dispatch(self, payload: str):
+        self._stats["received"] += 1
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            logger.warning(f"Ignoring malformed {CHANNEL} payload")
+            return
+
+        repository = self.repository or get_notification_repository()
+        if "broadcastId" in message:
+            receivers = list(self._subscribers)
+            if not receivers:
+                return
+            events = await run_repository(repository.get_broadcast_notifications_for, message["broadcastId"], receivers)
+        elif message.get("receiverId") not in self._subscribers:
+            return
+        elif message.get("truncated"):
+            events = await run_repository(repository.get_notifications_by_ids, [message["id"]])
+        else:
+            events = [message]
+
+        for event in events:
+            self.publish(event)
+
+    def publish(self, event: dict):
+        """Queue an event for every subscriber of its receiver."""
+        for queue in list(self._subscribers.get(event.get("receiverId"), ())):
+            try:
+                queue.put_nowait(event)
+                self._stats["delivered"] += 1
+            except asyncio.QueueFull:
+                self._stats["dropped"] += 1
+                self.unsubscribe(event["receiverId"], queue)
+                self._close(queue)
+
+    @staticmethod
+    def _close(queue: asyncio.Queue):
+        # None tells the stream to end; make room for it if the queue is full.
+        while True:
+            try:
+                queue.put_nowait(None)
+                return
+            except asyncio.QueueFull:
+                queue.get_nowait()
+
+notification_hub = NotificationHub()
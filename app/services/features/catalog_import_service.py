@@ -0,0 +1,39 @@
+from app.repositories.catalog_import_repository import CatalogImportRepository
+from app.repositories.async_base_repository import run_repository
+from app.services.core.ingredient_matrix import ingredient_matrix
+from app.services.core.name_index import ingredient_name_index, dish_name_index
+from app.services.core.autocomplete_index import dish_autocomplete, ingredient_autocomplete
+from app.services.features.food_service import reload_index
+import logging
+
+logger = logging.getLogger(__name__)
+
+class CatalogImportService:
+    def __init__(self, catalog_import_repository: CatalogImportRepository, food_repository):
+        self.catalog_import_repository = catalog_import_repository
+        self.food_repository = food_repository
+
+    async def import_catalog(self, ingredients=None, dishes=None, links=None, fmt: str = "csv"):
+        try:
+            stats = await run_repository(self.catalog_import_repository.import_catalog, ingredients, dishes, links, fmt)
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+        # Rebuilds run in worker threads (reload_index): a large import must not stall the event loop.
+        if ingredients is not None and ingredient_matrix.loaded:
+            try:
+                await reload_index(ingredient_matrix, self.food_repository.get_ingredient_nutrients)
+            except Exception as e:
+                logger.warning(f"Ingredient matrix reload after import failed: {e}")
+        try:
+            if ingredients is not None and ingredient_name_index.loaded:
+                await reload_index(ingredient_name_index, self.food_repository.get_ingredient_names)
+            if dishes is not None and dish_name_index.loaded:
+                await reload_index(dish_name_index, self.food_repository.get_dish_names)
+            if ingredients is not None and ingredient_autocomplete.loaded:
+                await reload_index(ingredient_autocomplete, self.food_repository.get_ingredient_popularity)
+            if dishes is not None and dish_autocomplete.loaded:
+                await reload_index(dish_autocomplete, self.food_repository.get_dish_popularity)
+        except Exception as e:
+            logger.warning(f"Name index reload after import failed: {e}")
+        return {"success": True, "stats": stats}
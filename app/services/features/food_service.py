@@ -1,16 +1,48 @@
 from app.repositories.food_repository import FoodRepository
-from app.schema.be_models import DishRequest, IngredientRequest, UpdateIngredientRequest
+from app.repositories.async_base_repository import run_repository, iterate_repository
+from app.helpers.pagination import encode_cursor, decode_cursor
+from app.schema.be_models import DishRequest, IngredientRequest, UpdateIngredientRequest, RecipeNutritionRequest
+from app.services.core.ingredient_matrix import ingredient_matrix
+from app.services.core.name_index import ingredient_name_index, dish_name_index
+from app.services.core.autocomplete_index import dish_autocomplete, ingredient_autocomplete
+import asyncio
+import json
 import logging
+import time
+
+STREAM_BATCH_SIZE = 500
+# Seconds before the name indexes are reloaded in the background, to pick up names written by other
+# workers and fresh autocomplete popularity.
+NAME_INDEX_MAX_AGE = 300
+# Seconds before the ingredient matrix is reloaded in the background, to pick up nutrient edits made by
+# other workers (ingredients they add are fetched on demand).
+INGREDIENT_MATRIX_MAX_AGE = 300
+
+DISH_INDEXES = (dish_name_index, dish_autocomplete)
+INGREDIENT_INDEXES = (ingredient_name_index, ingredient_autocomplete)
+
+_name_index_reload = None
+_ingredient_matrix_reload = None
 
 logger = logging.getLogger(__name__)
 
+async def reload_index(index, fetch):
+    """
+    Rebuild an in-memory index from fetch() rows. Building is pure Python and takes seconds on a large
+    catalog, so it runs in a worker thread; the index swaps in the new structures under its own lock.
+    """
+    rows = await run_repository(fetch)
+    await asyncio.to_thread(index.load, rows)
+
 class FoodService:
     def __init__(self, food_repository: FoodRepository):
         self.food_repository = food_repository
 
-    def similar_food(self, keyword: str):
+    async def similar_food(self, keyword: str):
         try:
-            similar_list = self.food_repository.find_similar_ingredients_names(keyword)
+            similar_list = self._search_name_index(ingredient_name_index, keyword)
+            if similar_list is None:
+                similar_list = await run_repository(self.food_repository.find_similar_ingredients_names, keyword)
             if not similar_list:
                 return {"success": False, "error": "Similar food not found"}
 
@@ -18,9 +50,9 @@ class FoodService:
         except Exception as e:
             return {"success": False, "error": str(e)}
 
-    def find_food(self, keyword: str):
+    async def find_food(self, keyword: str):
         try:
-            similar_list = self.food_repository.search_ingredients(keyword)
+            similar_list = await run_repository(self.food_repository.search_ingredients, keyword)
             if not similar_list:
                 return {"success": False, "error": "Similar food not found"}
 
@@ -28,9 +60,11 @@ class FoodService:
         except Exception as e:
             return {"success": False, "error": str(e)}
 
-    def similar_dish(self, keyword: str):
+    async def similar_dish(self, keyword: str):
         try:
-            similar_list = self.food_repository.find_similar_dishes_names(keyword)
+            similar_list = self._search_name_index(dish_name_index, keyword)
+            if similar_list is None:
+                similar_list = await run_repository(self.food_repository.find_similar_dishes_names, keyword)
             if not similar_list:
                 return {"success": False, "error": "Similar food not found"}
 
@@ -38,9 +72,9 @@ class FoodService:
         except Exception as e:
             return {"success": False, "error": str(e)}
 
-    def find_dish(self, keyword: str):
+    async def find_dish(self, keyword: str):
         try:
-            similar_list = self.food_repository.search_dishes(keyword)
+            similar_list = await run_repository(self.food_repository.search_dishes, keyword)
             if not similar_list:
                 return {"success": False, "error": "Similar food not found"}
 
@@ -48,59 +82,210 @@ class FoodService:
         except Exception as e:
             return {"success": False, "error": str(e)}
 
-    def insert_dish_to_db(self, dish: DishRequest):
+    async def find_food_page(self, limit: int, cursor: str = None):
+        try:
+            after_id = int(decode_cursor(cursor)["id"]) if cursor else None
+            rows = await run_repository(self.food_repository.search_ingredients_page, limit + 1, after_id)
+            return {"success": True, **self._keyset_page(rows, limit)}
+        except (ValueError, KeyError, TypeError):
+            return {"success": False, "error": "Invalid cursor"}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+    async def find_dish_page(self, limit: int, cursor: str = None):
         try:
-            new_dish_id = self.food_repository.insert_dish(dish)
+            after_id = int(decode_cursor(cursor)["id"]) if cursor else None
+            rows = await run_repository(self.food_repository.search_dishes_page, limit + 1, after_id)
+            return {"success": True, **self._keyset_page(rows, limit)}
+        except (ValueError, KeyError, TypeError):
+            return {"success": False, "error": "Invalid cursor"}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+    @staticmethod
+    def _keyset_page(rows: list, limit: int) -> dict:
+        # One extra row is fetched to know whether another page exists.
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        next_cursor = encode_cursor({"id": rows[-1]["id"]}) if has_more else None
+        return {"similar": rows, "nextCursor": next_cursor}
+
+    async def stream_food(self):
+        """NDJSON lines for the whole ingredient catalog, one batch at a time."""
+        async for batch in iterate_repository(self.food_repository.iter_ingredients, STREAM_BATCH_SIZE):
+            yield "".join(json.dumps(item, ensure_ascii=False, default=str) + "\n" for item in batch)
+
+    async def stream_dishes(self):
+        """NDJSON lines for the whole dish catalog, one batch at a time."""
+        async for batch in iterate_repository(self.food_repository.iter_dishes, STREAM_BATCH_SIZE):
+            yield "".join(json.dumps(item, ensure_ascii=False, default=str) + "\n" for item in batch)
+
+    async def insert_dish_to_db(self, dish: DishRequest):
+        try:
+            new_dish_id = await run_repository(self.food_repository.insert_dish, dish)
+            self._index_name(DISH_INDEXES, new_dish_id, dish.name)
             return {"success": True, "id": new_dish_id}
         except Exception as e:
             return {"success": False, "error": str(e)}
 
-    def get_dish_by_id(self, id: int):
+    async def get_dish_by_id(self, id: int):
         try:
-            dish = self.food_repository.get_dish_by_id(id)
+            dish = await run_repository(self.food_repository.get_dish_by_id, id)
             if not dish:
                 return {"success": False, "error": "Dish not found"}
             return {"success": True, "dish": dish}
         except Exception as e:
             return {"success": False, "error": str(e)}
 
-    def get_dish_by_name(self, name: str):
+    async def get_dishes_by_ids(self, ids: list[int]):
         try:
-            dish = self.food_repository.get_dish_by_name(name)
+            dishes = await run_repository(self.food_repository.get_dishes_by_ids, ids)
+            if not dishes:
+                return {"success": False, "error": "Dish not found"}
+            return {"success": True, "dishes": dishes}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+    async def get_dish_by_name(self, name: str):
+        try:
+            dish = await run_repository(self.food_repository.get_dish_by_name, name)
             if not dish:
                 return {"success": False, "error": "Dish not found"}
             return {"success": True, "dish": dish}
         except Exception as e:
             return {"success": False, "error": str(e)}
 
-    def update_dish_in_db(self, id: int, dish: DishRequest):
+    async def update_dish_in_db(self, id: int, dish: DishRequest):
         try:
-            success = self.food_repository.update_dish(id, dish)
+            success = await run_repository(self.food_repository.update_dish, id, dish)
             if not success:
                 return {"success": False, "error": "Dish not found"}
+            self._index_name(DISH_INDEXES, id, dish.name)
             return {"success": True}
         except Exception as e:
             return {"success": False, "error": str(e)}
 
-    def get_ingredient_by_id(self, id: int):
+    async def get_ingredient_by_id(self, id: int):
         try:
-            ingredient = self.food_repository.get_ingredient_by_id(id)
+            ingredient = await run_repository(self.food_repository.get_ingredient_by_id, id)
             if not ingredient:
                 return {"success": False, "error": "Ingredient not found"}
             return {"success": True, "ingredient": ingredient}
         except Exception as e:
             return {"success": False, "error": str(e)}
 
-    def insert_ingredient_to_db(self, ingredient: IngredientRequest):
+    async def insert_ingredient_to_db(self, ingredient: IngredientRequest):
         try:
-            new_id = self.food_repository.insert_ingredient(ingredient)
+            new_id = await run_repository(self.food_repository.insert_ingredient, ingredient)
+            await self._refresh_ingredient_matrix([new_id])
+            self._index_name(INGREDIENT_INDEXES, new_id, ingredient.name)
             return {"success": True, "id": new_id}
         except Exception as e:
             return {"success": False, "error": str(e)}
 
-    def update_ingredient_in_db(self, ingredient: UpdateIngredientRequest):
+    async def update_ingredient_in_db(self, ingredient: UpdateIngredientRequest):
         try:
-            self.food_repository.update_ingredient(ingredient)
+            await run_repository(self.food_repository.update_ingredient, ingredient)
+            await self._refresh_ingredient_matrix([ingredient.id])
+            self._index_name(INGREDIENT_INDEXES, ingredient.id, ingredient.name)
             return {"success": True}
         except Exception as e:
             return {"success": False, "error": str(e)}
+
+    async def load_ingredient_matrix(self):
+        await reload_index(ingredient_matrix, self.food_repository.get_ingredient_nutrients)
+
+    def _schedule_ingredient_matrix_reload(self):
+        global _ingredient_matrix_reload
+        if _ingredient_matrix_reload is None or _ingredient_matrix_reload.done():
+            _ingredient_matrix_reload = asyncio.create_task(self._reload_ingredient_matrix())
+
+    async def _reload_ingredient_matrix(self):
+        try:
+            await self.load_ingredient_matrix()
+        except Exception as e:
+            logger.warning(f"Ingredient matrix reload failed: {e}")
+
+    async def _refresh_ingredient_matrix(self, ids: list[int]):
+        if not ingredient_matrix.loaded:
+            return
+        try:
+            rows = await run_repository(self.food_repository.get_ingredient_nutrients, ids)
+            ingredient_matrix.upsert(rows)
+        except Exception as e:
+            logger.warning(f"Ingredient matrix refresh failed for {ids}: {e}")
+
+    async def load_name_indexes(self):
+        await reload_index(ingredient_name_index, self.food_repository.get_ingredient_names)
+        await reload_index(dish_name_index, self.food_repository.get_dish_names)
+        await reload_index(ingredient_autocomplete, self.food_repository.get_ingredient_popularity)
+        await reload_index(dish_autocomplete, self.food_repository.get_dish_popularity)
+
+    def _search_name_index(self, index, keyword: str, *args):
+        """Results from an in-memory index, or None when it isn't loaded (callers query the database)."""
+        if not index.loaded:
+            return None
+        if time.monotonic() - index.loaded_at > NAME_INDEX_MAX_AGE:
+            self._schedule_name_index_reload()
+        return index.search(keyword, *args)
+
+    def _schedule_name_index_reload(self):
+        global _name_index_reload
+        if _name_index_reload is None or _name_index_reload.done():
+            _name_index_reload = asyncio.create_task(self._reload_name_indexes())
+
+    async def _reload_name_indexes(self):
+        try:
+            await self.load_name_indexes()
+        except Exception as e:
+            logger.warning(f"Name index reload failed: {e}")
+
+    @staticmethod
+    def _index_name(indexes, id: int, name: str):
+        for index in indexes:
+            if index.loaded:
+                index.upsert(id, name)
+
+    async def autocomplete(self, prefix: str, limit: int = 10, kind: str = "all"):
+        try:
+            indexes = []
+            if kind in ("all", "dish"):
+                indexes.append(("dish", dish_autocomplete, self.food_repository.autocomplete_dishes))
+            if kind in ("all", "ingredient"):
+                indexes.append(("ingredient", ingredient_autocomplete, self.food_repository.autocomplete_ingredients))
+
+            matches = []
+            for label, index, fallback in indexes:
+                found = self._search_name_index(index, prefix, limit)
+                if found is None:
+                    # Building the indexes takes seconds on a large catalog: do it in the background and
+                    # answer this request from the database.
+                    self._schedule_name_index_reload()
+                    found = await run_repository(fallback, prefix, limit)
+                matches.extend((score, label, id, name) for score, id, name in found)
+            matches.sort(key=lambda item: item[0], reverse=True)
+            return {
+                "success": True,
+                "suggestions": [{"id": id, "name": name, "type": label} for _, label, id, name in matches[:limit]],
+            }
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+    async def calculate_recipe_nutrition(self, recipe: RecipeNutritionRequest):
+        try:
+            if not ingredient_matrix.loaded:
+                await self.load_ingredient_matrix()
+            elif time.monotonic() - ingredient_matrix.loaded_at > INGREDIENT_MATRIX_MAX_AGE:
+                self._schedule_ingredient_matrix_reload()
+
+            items = [(item.ingredientId, item.weight) for item in recipe.ingredients]
+            # Ingredients added through another worker process are pulled in on demand.
+            missing = ingredient_matrix.missing([i for i, _ in items])
+            if missing:
+                ingredient_matrix.upsert(await run_repository(self.food_repository.get_ingredient_nutrients, missing))
+
+            return {"success": True, "nutrition": ingredient_matrix.compute(items)}
+        except KeyError as e:
+            return {"success": False, "error": e.args[0]}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
@@ -1,63 +1,170 @@
+import asyncio
+import json
+from collections import OrderedDict
+from datetime import datetime
+from app.core.config import settings
+from app.helpers.pagination import encode_cursor, decode_cursor
 from app.repositories.notification_repository import NotificationRepository
-from app.schema.be_models import AddNotificationRequest
-from app.core.notification import get_messaging, ADMIN_TOKEN
+from app.repositories.async_base_repository import run_repository
+from app.schema.be_models import AddNotificationRequest, BroadcastNotificationRequest, MarkNotificationsReadRequest
+from app.core.notification import ADMIN_TOKEN
+from app.services.core.notification_dispatcher import notification_dispatcher
+from app.services.core.notification_hub import notification_hub
 import logging
 
 logger = logging.getLogger(__name__)
 
+NOTIFICATION_TITLES = {
+    "ADD_DISH": "Người dùng thêm món ăn mới!",
+    "ADD_INGREDIENT": "Người dùng thêm nguyên liệu mới!",
+    "FEEDBACK": "Người dùng góp ý tới hệ thống!",
+    "RESPOND": "Quản trị viên phản hồi tới bạn!",
+    "ANNOUNCEMENT": "Thông báo từ hệ thống!"
+}
+
+# Most notifications replayed to a stream that reconnects with Last-Event-ID.
+STREAM_CATCH_UP_LIMIT = 100
+# Client reconnect delay sent at the start of a stream, in milliseconds.
+STREAM_RETRY_MS = 3000
+# Recently sent notification ids remembered per stream to skip duplicates of the catch-up.
+STREAM_SEEN_LIMIT = 1000
+
+def _sse(event: dict) -> str:
+    data = json.dumps(event, ensure_ascii=False, default=lambda v: v.isoformat() if hasattr(v, "isoformat") else str(v))
+    return f"id: {event['id']}\nevent: notification\ndata: {data}\n\n"
+
+def _remember(seen: OrderedDict, id: int):
+    seen[id] = None
+    if len(seen) > STREAM_SEEN_LIMIT:
+        seen.popitem(last=False)
+
 class NotificationService:
     def __init__(self, notification_repository: NotificationRepository):
         self.notification_repository = notification_repository
 
-    def insert_notification_to_db(self, notification: AddNotificationRequest):
+    async def insert_notification_to_db(self, notification: AddNotificationRequest):
         try:
             receiver_token = None
             if notification.receiverId == 0:
                 receiver_token = ADMIN_TOKEN
             else:
-                receiver_token = self.notification_repository.get_user_token(notification.receiverId)
+                receiver_token = await run_repository(self.notification_repository.get_user_token, notification.receiverId)
                 if not receiver_token:
                     return {"success": False, "error": "Receiver not found or has no token"}
 
-            new_id = self.notification_repository.create_notification(notification)
-
-            type_titles = {
-                "ADD_DISH": "Người dùng thêm món ăn mới!",
-                "ADD_INGREDIENT": "Người dùng thêm nguyên liệu mới!",
-                "FEEDBACK": "Người dùng góp ý tới hệ thống!",
-                "RESPOND": "Quản trị viên phản hồi tới bạn!"
-            }
-            title = type_titles.get(notification.type, type_titles["RESPOND"])
-
-            try:
-                messaging = get_messaging()
-                message = messaging.Message(
-                    notification=messaging.Notification(
-                        title=title,
-                        body=notification.content,
-                    ),
-                token=receiver_token,
-                )
-                messaging.send(message)
-            except Exception as e:
-                logger.error(f"Error sending firebase message: {e}")
-                # Continue execution even if firebase fails, as DB insert was successful
+            title = NOTIFICATION_TITLES.get(notification.type, NOTIFICATION_TITLES["RESPOND"])
+            # The push goes to the outbox with the row; the dispatcher sends it after the response.
+            new_id = await run_repository(
+                self.notification_repository.create_notification_with_push, notification, receiver_token, title
+            )
+            notification_dispatcher.wake()
 
             return {"success": True, "id": new_id}
 
         except Exception as e:
             return {"success": False, "error": str(e)}
 
-    def get_notifications_by_receiver_id(self, receiver_id: int):
+    async def get_notifications_by_receiver_id(self, receiver_id: int, limit: int, cursor: str = None, unread_only: bool = False):
         try:
-            notifications = self.notification_repository.get_notifications_by_receiver(receiver_id)
-            return {"success": True, "notifications": notifications}
+            after = None
+            if cursor:
+                position = decode_cursor(cursor)
+                after = (datetime.fromisoformat(position["createdAt"]), int(position["id"]))
+            # One extra row is fetched to know whether another page exists.
+            rows = await run_repository(
+                self.notification_repository.get_notifications_by_receiver, receiver_id, limit + 1, after, unread_only
+            )
+            has_more = len(rows) > limit
+            rows = rows[:limit]
+            next_cursor = encode_cursor({"createdAt": rows[-1]["createAt"].isoformat(), "id": rows[-1]["id"]}) if has_more else None
+            return {"success": True, "notifications": rows, "nextCursor": next_cursor}
+        except (ValueError, KeyError, TypeError):
+            return {"success": False, "error": "Invalid cursor"}
         except Exception as e:
             return {"success": False, "error": str(e)}
 
-    def mark_notification_read(self, id: int):
+    async def count_unread(self, receiver_id: int):
         try:
-            self.notification_repository.mark_read(id)
+            count = await run_repository(self.notification_repository.count_unread, receiver_id)
+            return {"success": True, "unread": count}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+    async def broadcast(self, request: BroadcastNotificationRequest):
+        try:
+            title = NOTIFICATION_TITLES.get(request.type, NOTIFICATION_TITLES["ANNOUNCEMENT"])
+            # Notifications are inserted here in one statement; pushes are streamed by the dispatcher.
+            broadcast = await run_repository(self.notification_repository.create_broadcast, request, title)
+            notification_dispatcher.wake()
+            return {"success": True, **broadcast}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+    async def get_broadcast(self, broadcast_id: int):
+        try:
+            broadcast = await run_repository(self.notification_repository.get_broadcast, broadcast_id)
+            if not broadcast:
+                return {"success": False, "error": "Broadcast not found"}
+            return {"success": True, "broadcast": broadcast}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+    async def get_delivery_status(self, notification_id: int):
+        try:
+            delivery = await run_repository(self.notification_repository.get_delivery_status, notification_id)
+            if not delivery:
+                return {"success": False, "error": "No push queued for this notification"}
+            return {"success": True, "delivery": delivery}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+    async def stream_notifications(self, receiver_id: int, last_event_id: int = None, is_disconnected=None):
+        """
+        Server-sent events for one receiver: notifications missed since last_event_id, then each new one
+        as soon as the LISTEN connection of this process hears about it.
+        """
+        # Subscribe before catching up so nothing inserted in between is missed; duplicates are skipped by id.
+        # Ids are not a watermark for the live events: they are taken at INSERT but rows arrive at COMMIT, so a
+        # long broadcast can arrive after notifications with higher ids.
+        queue = notification_hub.subscribe(receiver_id)
+        seen = OrderedDict()
+        try:
+            yield f"retry: {STREAM_RETRY_MS}\n\n"
+            if last_event_id is not None:
+                missed = await run_repository(
+                    self.notification_repository.get_notifications_after, receiver_id, last_event_id, STREAM_CATCH_UP_LIMIT
+                )
+                for event in missed:
+                    _remember(seen, event["id"])
+                    yield _sse(event)
+
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), settings.NOTIFICATION_STREAM_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    if is_disconnected is not None and await is_disconnected():
+                        break
+                    yield ": keep-alive\n\n"
+                    continue
+                if event is None:
+                    break
+                if event["id"] in seen:
+                    continue
+                _remember(seen, event["id"])
+                yield _sse(event)
+        finally:
+            notification_hub.unsubscribe(receiver_id, queue)
+
+    async def mark_notification_read(self, id: int):
+        try:
+            await run_repository(self.notification_repository.mark_read, id)
             return {"success": True, "message": "Updated successfully"}
         except Exception as e:
             return {"success": False, "error": str(e)}
+
+    async def mark_notifications_read(self, request: MarkNotificationsReadRequest):
+        try:
+            updated = await run_repository(self.notification_repository.mark_read_bulk, request.receiverId, request.ids)
+            return {"success": True, "updated": updated}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
@@ -1,32 +1,76 @@
-from datetime import date
+from datetime import date, timedelta
 from app.repositories.tracking_repository import TrackingRepository
+from app.repositories.async_base_repository import run_repository
 from app.schema.be_models import AddMealRequest, AddDrinkRequest, AddExerciseRequest
+from app.helpers.nutrition_calculations import NUTRIENTS
 import logging
 
 logger = logging.getLogger(__name__)
 
+MAX_RANGE_DAYS = 366
+
 class TrackingService:
     def __init__(self, tracking_repository: TrackingRepository):
         self.tracking_repository = tracking_repository
 
+    # Day view
+    async def day_summary(self, date: date, userId: int):
+        try:
+            summary = await run_repository(self.tracking_repository.get_day_summary, date, userId)
+            return {"success": True, "date": date, **summary}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+    async def range_summary(self, userId: int, start: date, end: date):
+        try:
+            if start > end:
+                return {"success": False, "error": "'from' must not be after 'to'"}
+            span = (end - start).days + 1
+            if span > MAX_RANGE_DAYS:
+                return {"success": False, "error": f"Range is limited to {MAX_RANGE_DAYS} days"}
+
+            rows = await run_repository(self.tracking_repository.get_daily_nutrition, userId, start, end)
+            by_day = {r["date"]: r for r in rows}
+            # Charts expect one point per day, so days without any record are filled with zeros.
+            days = []
+            for i in range(span):
+                day = start + timedelta(days=i)
+                days.append(by_day.get(day) or {
+                    "date": day,
+                    "mealCount": 0,
+                    "nutrients": {key: 0 for _, key in NUTRIENTS},
+                    "totalWater": 0,
+                    "totalKcalBurned": 0,
+                })
+            return {"success": True, "from": start, "to": end, "days": days}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
     # Meal Tracking
-    def insert_meal_to_db(self, meal: AddMealRequest):
+    async def insert_meal_to_db(self, meal: AddMealRequest):
         try:
-            new_id = self.tracking_repository.insert_meal(meal)
+            new_id = await run_repository(self.tracking_repository.insert_meal, meal)
             return {"success": True, "id": new_id}
         except Exception as e:
             return {"success": False, "error": str(e)}
 
-    def total_nutri_meal(self, date: date, userId: int):
+    async def insert_meals_to_db(self, meals: list[AddMealRequest]):
         try:
-            nutri_meal = self.tracking_repository.get_total_nutri_meal(date, userId)
+            new_ids = await run_repository(self.tracking_repository.insert_meals, meals)
+            return {"success": True, "ids": new_ids}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+    async def total_nutri_meal(self, date: date, userId: int):
+        try:
+            nutri_meal = await run_repository(self.tracking_repository.get_total_nutri_meal, date, userId)
             return {"success": True, "nutriMeal": nutri_meal}
         except Exception as e:
             return {"success": False, "error": str(e)}
 
-    def stat_meal_in_day(self, date: date, userId: int, mealType: str):
+    async def stat_meal_in_day(self, date: date, userId: int, mealType: str):
         try:
-            stat_meals = self.tracking_repository.get_meals_in_day(date, userId, mealType)
+            stat_meals = await run_repository(self.tracking_repository.get_meals_in_day, date, userId, mealType)
             if not stat_meals:
                 return {"success": False, "error": "Not found"}
             
@@ -37,9 +81,9 @@ class TrackingService:
         except Exception as e:
             return {"success": False, "error": str(e)}
 
-    def delete_meal_of_user(self, id: int):
+    async def delete_meal_of_user(self, id: int):
         try:
-            success = self.tracking_repository.delete_meal(id)
+            success = await run_repository(self.tracking_repository.delete_meal, id)
             if not success:
                 return {"success": False, "error": f"MealOfUser with id {id} not found"}
             
@@ -51,16 +95,23 @@ class TrackingService:
             return {"success": False, "error": str(e)}
 
     # Drink Tracking
-    def insert_drink_to_db(self, drink: AddDrinkRequest):
+    async def insert_drink_to_db(self, drink: AddDrinkRequest):
         try:
-            new_id = self.tracking_repository.insert_drink(drink)
+            new_id = await run_repository(self.tracking_repository.insert_drink, drink)
             return {"success": True, "id": new_id}
         except Exception as e:
             return {"success": False, "error": str(e)}
 
-    def stat_drink_in_day(self, date: date, userId: int):
+    async def insert_drinks_to_db(self, drinks: list[AddDrinkRequest]):
+        try:
+            new_ids = await run_repository(self.tracking_repository.insert_drinks, drinks)
+            return {"success": True, "ids": new_ids}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+    async def stat_drink_in_day(self, date: date, userId: int):
         try:
-            stat_drinks = self.tracking_repository.get_drinks_in_day(date, userId)
+            stat_drinks = await run_repository(self.tracking_repository.get_drinks_in_day, date, userId)
             if not stat_drinks:
                 return {"success": False, "error": "Not found"}
 
@@ -71,9 +122,9 @@ class TrackingService:
         except Exception as e:
             return {"success": False, "error": str(e)}
 
-    def delete_drink_of_user(self, id: int):
+    async def delete_drink_of_user(self, id: int):
         try:
-            success = self.tracking_repository.delete_drink(id)
+            success = await run_repository(self.tracking_repository.delete_drink, id)
             if not success:
                  return {"success": False, "error": f"DrinkOfUser with id {id} not found"}
 
@@ -84,9 +135,9 @@ class TrackingService:
         except Exception as e:
             return {"success": False, "error": str(e)}
 
-    def get_total_water(self, date: date, userId: int):
+    async def get_total_water(self, date: date, userId: int):
         try:
-            total_water = self.tracking_repository.get_total_water(date, userId)
+            total_water = await run_repository(self.tracking_repository.get_total_water, date, userId)
             return {
                 "success": True,
                 "totalWater": total_water
@@ -95,9 +146,9 @@ class TrackingService:
             return {"success": False, "error": str(e)}
 
     # Exercise Tracking
-    def find_exercise(self):
+    async def find_exercise(self):
         try:
-            exercises = self.tracking_repository.get_all_exercises()
+            exercises = await run_repository(self.tracking_repository.get_all_exercises)
             if not exercises:
                 return {"success": False, "error": "Not found"}
                 
@@ -108,16 +159,23 @@ class TrackingService:
         except Exception as e:
             return {"success": False, "error": str(e)}
 
-    def insert_exercise_to_db(self, exercise: AddExerciseRequest):
+    async def insert_exercise_to_db(self, exercise: AddExerciseRequest):
         try:
-            new_id = self.tracking_repository.insert_exercise(exercise)
+            new_id = await run_repository(self.tracking_repository.insert_exercise, exercise)
             return {"success": True, "id": new_id}
         except Exception as e:
             return {"success": False, "error": str(e)}
 
-    def total_kcal_exercise(self, date: date, userId: int):
+    async def insert_exercises_to_db(self, exercises: list[AddExerciseRequest]):
+        try:
+            new_ids = await run_repository(self.tracking_repository.insert_exercises, exercises)
+            return {"success": True, "ids": new_ids}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+    async def total_kcal_exercise(self, date: date, userId: int):
         try:
-            total_kcal = self.tracking_repository.get_total_kcal_burned(date, userId)
+            total_kcal = await run_repository(self.tracking_repository.get_total_kcal_burned, date, userId)
             return {
                 "success": True,
                 "totalKcal": total_kcal
@@ -125,9 +183,9 @@ class TrackingService:
         except Exception as e:
             return {"success": False, "error": str(e)}
 
-    def stat_exercise_in_day(self, date: date, userId: int):
+    async def stat_exercise_in_day(self, date: date, userId: int):
         try:
-            stat_exercises = self.tracking_repository.get_exercises_in_day(date, userId)
+            stat_exercises = await run_repository(self.tracking_repository.get_exercises_in_day, date, userId)
             if not stat_exercises:
                  return {"success": False, "error": "Not found"}
                  
@@ -138,9 +196,9 @@ class TrackingService:
         except Exception as e:
              return {"success": False, "error": str(e)}
 
-    def delete_exercise_of_user(self, id: int):
+    async def delete_exercise_of_user(self, id: int):
         try:
-            success = self.tracking_repository.delete_exercise(id)
+            success = await run_repository(self.tracking_repository.delete_exercise, id)
             if not success:
                 return {"success": False, "error": f"ExerciseOfUser with id {id} not found"}
                 
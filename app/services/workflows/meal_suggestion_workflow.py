@@ -2,7 +2,6 @@ import logging
 import asyncio
 import time
 import random
-import requests
 from typing import List, Dict, Any, Literal
 from collections import defaultdict
 
@@ -13,7 +12,7 @@ from app.schema.agent_state import AgentState
 from app.services.core.llm_service import LLMService
 from app.services.core.retrieval_service import RetrievalService
 from app.services.core.optimization_service import OptimizationService
-from app.core.config import settings
+from app.helpers.user_profile import fetch_user_profile
 
 try:
     from app.knowledge.vibe import vibes_cooking, vibes_flavor, vibes_healthy, vibes_soup_veg, vibes_style
@@ -238,14 +237,10 @@ class MealSuggestionWorkflowService:
     # ================= HELPERS based on existing logic =================
 
     def _fetch_user_profile(self, user_id: int):
-        url = f"{settings.API_BASE_URL}/get_all_info?id={user_id}"
         default_profile = {'id': 1, 'fullname': 'Default', 'age': 25, 'targetcalories': 2000, 'protein': 100, 'totalfat': 60, 'carbohydrate': 250}
         
         try:
-            response = requests.get(url, timeout=3)
-            response.raise_for_status()
-            result = response.json()
-            return {**result.get('userInfo', {}), **result.get('requiredIndex', {})}
+            return fetch_user_profile(user_id)
         except Exception:
             return default_profile
 
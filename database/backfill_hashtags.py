@@ -0,0 +1,23 @@
+"""
+Recompute the automatic hashtags of every dish from the rules in hashtag_rule.
+
+Runs the same set-based statement the repositories use after a dish or ingredient
+changes, over the whole catalog in one transaction. Run it after editing the rules.
+
+    python database/migrate.py && python database/backfill_hashtags.py
+"""
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.repositories.food_repository import FoodRepository
+
+def main():
+    started = time.perf_counter()
+    count = FoodRepository().refresh_dish_hashtags()
+    print(f"✅ Assigned {count} auto-hashtags in {time.perf_counter() - started:.2f}s")
+
+if __name__ == "__main__":
+    main()
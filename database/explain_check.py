@@ -0,0 +1,153 @@
+"""
+Check that the hot tracking and search queries are served by an index.
+
+Seeds synthetic users, dishes, ingredients and tracking rows inside a transaction,
+runs ANALYZE, then EXPLAINs the SQL actually issued by the repositories and asserts
+that the expected index appears in each plan. Everything is rolled back at the end.
+
+    python database/migrate.py && python database/explain_check.py
+"""
+import hashlib
+import os
+import sys
+from contextlib import nullcontext
+from datetime import date, timedelta
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.core.database import get_connection, release_connection
+from app.repositories.food_repository import FoodRepository
+from app.repositories.tracking_repository import TrackingRepository
+
+SEED_USERS = 500
+SEED_MEALS = 200000
+SEED_DRINKS = 100000
+SEED_EXERCISES = 50000
+SEED_NAMES = 20000
+
+INDEX_SCAN_NODES = {"Index Scan", "Index Only Scan", "Bitmap Index Scan"}
+
+class ExplainCursor:
+    """Stands in for a repository cursor: every statement is EXPLAINed instead of executed."""
+
+    def __init__(self, cur):
+        self._cur = cur
+        self.plans = []
+
+    def execute(self, sql, params=None):
+        self._cur.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+        self.plans.append(self._cur.fetchone()[0][0]["Plan"])
+
+    def fetchone(self):
+        return None
+
+    def fetchall(self):
+        return []
+
+def iter_nodes(plan):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from iter_nodes(child)
+
+def used_indexes(plan) -> set[str]:
+    return {node["Index Name"] for node in iter_nodes(plan) if node["Node Type"] in INDEX_SCAN_NODES}
+
+def seed(cur) -> dict:
+    cur.execute("SELECT MIN(id) FROM UnitDrink;")
+    unit_drink_id = cur.fetchone()[0]
+    cur.execute("SELECT MIN(id) FROM LevelExercise;")
+    level_exercise_id = cur.fetchone()[0]
+    if unit_drink_id is None or level_exercise_id is None:
+        raise RuntimeError("UnitDrink and LevelExercise need at least one row to seed tracking data")
+
+    cur.execute(
+        "INSERT INTO UserInfo (fullname) SELECT 'explain-check ' || g FROM generate_series(1, %s) g RETURNING id;",
+        (SEED_USERS,)
+    )
+    user_ids = [r[0] for r in cur.fetchall()]
+
+    cur.execute(
+        "INSERT INTO Dish (name) SELECT 'explain check dish ' || md5(g::text) FROM generate_series(1, %s) g RETURNING id;",
+        (SEED_NAMES,)
+    )
+    dish_ids = [r[0] for r in cur.fetchall()]
+    cur.execute("INSERT INTO dish_nutrition (dishid) SELECT unnest(%s::int[]) ON CONFLICT DO NOTHING;", (dish_ids,))
+    cur.execute(
+        "INSERT INTO Ingredient (name) SELECT 'explain check ingredient ' || md5(g::text) FROM generate_series(1, %s) g;",
+        (SEED_NAMES,)
+    )
+
+    cur.execute("""
+        INSERT INTO MealOfUser (time, mealType, weight, UserInfoid, Dishid)
+        SELECT now() - random() * interval '365 days', 'Bữa sáng', 100,
+               (%s::int[])[1 + g %% %s], (%s::int[])[1 + g %% %s]
+        FROM generate_series(1, %s) g;
+    """, (user_ids, len(user_ids), dish_ids, len(dish_ids), SEED_MEALS))
+    cur.execute("""
+        INSERT INTO DrinkOfUser (time, amount, UnitDrinkid, UserInfoid)
+        SELECT now() - random() * interval '365 days', 1, %s, (%s::int[])[1 + g %% %s]
+        FROM generate_series(1, %s) g;
+    """, (unit_drink_id, user_ids, len(user_ids), SEED_DRINKS))
+    cur.execute("""
+        INSERT INTO ExerciseOfUser (time, minute, LevelExerciseid, UserInfoid)
+        SELECT now() - random() * interval '365 days', 30, %s, (%s::int[])[1 + g %% %s]
+        FROM generate_series(1, %s) g;
+    """, (level_exercise_id, user_ids, len(user_ids), SEED_EXERCISES))
+
+    for table in ("userinfo", "dish", "dish_nutrition", "ingredient", "mealofuser", "drinkofuser", "exerciseofuser"):
+        cur.execute(f"ANALYZE public.{table};")
+
+    # A fragment of one seeded name: selective, like a real search term.
+    return {"userId": user_ids[0], "keyword": hashlib.md5(b"4242").hexdigest()[:8]}
+
+def run_checks(cur, params: dict) -> bool:
+    day = date.today() - timedelta(days=10)
+    user_id = params["userId"]
+    keyword = params["keyword"]
+
+    explain_cur = ExplainCursor(cur)
+    tracking = TrackingRepository()
+    food = FoodRepository()
+    for repo in (tracking, food):
+        repo.get_cursor = repo.get_read_cursor = lambda: nullcontext(explain_cur)
+
+    checks = [
+        ("tracking.get_total_nutri_meal", lambda: tracking.get_total_nutri_meal(day, user_id), "mealofuser_userinfoid_time_idx"),
+        ("tracking.get_meals_in_day", lambda: tracking.get_meals_in_day(day, user_id, "Bữa sáng"), "mealofuser_userinfoid_time_idx"),
+        ("tracking.get_drinks_in_day", lambda: tracking.get_drinks_in_day(day, user_id), "drinkofuser_userinfoid_time_idx"),
+        ("tracking.get_total_water", lambda: tracking.get_total_water(day, user_id), "drinkofuser_userinfoid_time_idx"),
+        ("tracking.get_total_kcal_burned", lambda: tracking.get_total_kcal_burned(day, user_id), "exerciseofuser_userinfoid_time_idx"),
+        ("tracking.get_exercises_in_day", lambda: tracking.get_exercises_in_day(day, user_id), "exerciseofuser_userinfoid_time_idx"),
+        ("food.find_similar_ingredients_names", lambda: food.find_similar_ingredients_names(keyword), "ingredient_name_search_trgm_idx"),
+        ("food.search_ingredients", lambda: food.search_ingredients(keyword), "ingredient_name_search_trgm_idx"),
+        ("food.find_similar_dishes_names", lambda: food.find_similar_dishes_names(keyword), "dish_name_search_trgm_idx"),
+        ("food.search_dishes", lambda: food.search_dishes(keyword), "dish_name_search_trgm_idx"),
+        ("food.autocomplete_ingredients", lambda: food.autocomplete_ingredients(keyword), "ingredient_name_search_trgm_idx"),
+        ("food.autocomplete_dishes", lambda: food.autocomplete_dishes(keyword), "dish_name_search_trgm_idx"),
+    ]
+
+    ok = True
+    for name, call, expected_index in checks:
+        explain_cur.plans = []
+        call()
+        indexes = set().union(*(used_indexes(plan) for plan in explain_cur.plans))
+        if expected_index in indexes:
+            print(f"✅ {name}: {expected_index}")
+        else:
+            ok = False
+            print(f"❌ {name}: expected {expected_index}, plan used {sorted(indexes) or 'no index'}")
+    return ok
+
+def main():
+    conn = get_connection()
+    try:
+        with conn.cursor() as cur:
+            params = seed(cur)
+            ok = run_checks(cur, params)
+    finally:
+        conn.rollback()
+        release_connection(conn)
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
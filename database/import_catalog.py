@@ -0,0 +1,41 @@
+"""
+Bulk import of the food catalog from CSV (with a header row) or JSONL files.
+
+    python database/import_catalog.py --ingredients ingredients.csv --dishes dishes.csv --links links.csv
+
+Ingredient and dish columns are those of the Ingredient / Dish tables (name is the match key);
+links have dishName, ingredientName and weight. The format follows the file extension unless --format is given.
+"""
+import argparse
+import json
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.repositories.catalog_import_repository import CatalogImportRepository
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import ingredients, dishes and dish links")
+    parser.add_argument("--ingredients", help="ingredients file")
+    parser.add_argument("--dishes", help="dishes file")
+    parser.add_argument("--links", help="ingredient-in-dish links file")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="file format (default: from extension)")
+    args = parser.parse_args()
+
+    paths = [args.ingredients, args.dishes, args.links]
+    if not any(paths):
+        parser.error("at least one of --ingredients, --dishes or --links is required")
+    fmt = args.format or ("jsonl" if any(p and p.endswith((".jsonl", ".ndjson")) for p in paths) else "csv")
+
+    files = [open(p, "r", encoding="utf-8-sig", newline="") if p else None for p in paths]
+    try:
+        stats = CatalogImportRepository().import_catalog(*files, fmt=fmt)
+    finally:
+        for f in files:
+            if f:
+                f.close()
+    print(json.dumps(stats, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Apply the versioned SQL migrations in database/migrations, in order.
+
+Each file is named <version>_<name>.sql and runs in its own transaction;
+applied versions are recorded in the schema_migrations table.
+
+    python database/migrate.py            # apply pending migrations
+    python database/migrate.py --status   # list applied and pending migrations
+"""
+import argparse
+import hashlib
+import os
+import re
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.core.database import get_connection, release_connection
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+FILENAME_PATTERN = re.compile(r"^(\d+)_([\w\-]+)\.sql$")
+
+def load_migrations():
+    migrations = []
+    for filename in sorted(os.listdir(MIGRATIONS_DIR)):
+        match = FILENAME_PATTERN.match(filename)
+        if not match:
+            continue
+        with open(os.path.join(MIGRATIONS_DIR, filename), "r", encoding="utf-8") as f:
+            sql = f.read()
+        migrations.append({
+            "version": match.group(1),
+            "name": match.group(2),
+            "sql": sql,
+            "checksum": hashlib.sha256(sql.encode("utf-8")).hexdigest(),
+        })
+    return sorted(migrations, key=lambda m: int(m["version"]))
+
+def ensure_migrations_table(conn):
+    with conn.cursor() as cur:
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS public.schema_migrations (
+                version character varying(32) PRIMARY KEY,
+                name character varying(255) NOT NULL,
+                checksum character varying(64) NOT NULL,
+                appliedat timestamp without time zone DEFAULT CURRENT_TIMESTAMP
+            );
+        """)
+    conn.commit()
+
+def get_applied(conn):
+    with conn.cursor() as cur:
+        cur.execute("SELECT version, checksum FROM public.schema_migrations;")
+        return {r[0]: r[1] for r in cur.fetchall()}
+
+def apply_migrations(conn) -> list[str]:
+    ensure_migrations_table(conn)
+    applied = get_applied(conn)
+    done = []
+
+    for migration in load_migrations():
+        version = migration["version"]
+        if version in applied:
+            if applied[version] != migration["checksum"]:
+                print(f"⚠️  Migration {version}_{migration['name']} changed after it was applied")
+            continue
+
+        print(f"→ Applying {version}_{migration['name']}")
+        try:
+            with conn.cursor() as cur:
+                cur.execute(migration["sql"])
+                cur.execute(
+                    "INSERT INTO public.schema_migrations (version, name, checksum) VALUES (%s, %s, %s);",
+                    (version, migration["name"], migration["checksum"])
+                )
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            print(f"❌ Migration {version}_{migration['name']} failed: {e}")
+            raise e
+        done.append(version)
+
+    return done
+
+def print_status(conn):
+    ensure_migrations_table(conn)
+    applied = get_applied(conn)
+    for migration in load_migrations():
+        state = "applied" if migration["version"] in applied else "pending"
+        print(f"{migration['version']}_{migration['name']}: {state}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply database migrations")
+    parser.add_argument("--status", action="store_true", help="list applied and pending migrations")
+    args = parser.parse_args()
+
+    conn = get_connection()
+    try:
+        if args.status:
+            print_status(conn)
+        else:
+            done = apply_migrations(conn)
+            print(f"✅ {len(done)} migration(s) applied" if done else "✅ Database is up to date")
+    finally:
+        release_connection(conn)
+
+if __name__ == "__main__":
+    main()
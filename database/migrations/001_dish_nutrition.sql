@@ -0,0 +1,85 @@
+-- Materialized per-dish nutrient totals.
+-- Totals are absolute amounts for the whole recipe (ingredient value per 100 g * weight),
+-- totalweight is SUM(IngredientInDish.weight). The dish listing weighs ingredients by
+-- gramPerUnit, so totalgram/totalgramkcal are kept alongside for it.
+-- Rows are refreshed by FoodRepository whenever a dish or one of its ingredients changes.
+
+CREATE TABLE IF NOT EXISTS public.dish_nutrition (
+    dishid integer NOT NULL PRIMARY KEY REFERENCES public.dish(id) ON DELETE CASCADE,
+    totalweight double precision NOT NULL DEFAULT 0,
+    totalgram double precision NOT NULL DEFAULT 0,
+    totalgramkcal double precision NOT NULL DEFAULT 0,
+    kcal double precision NOT NULL DEFAULT 0,
+    carbs double precision NOT NULL DEFAULT 0,
+    sugar double precision NOT NULL DEFAULT 0,
+    fiber double precision NOT NULL DEFAULT 0,
+    protein double precision NOT NULL DEFAULT 0,
+    saturatedfat double precision NOT NULL DEFAULT 0,
+    monounsaturatedfat double precision NOT NULL DEFAULT 0,
+    polyunsaturatedfat double precision NOT NULL DEFAULT 0,
+    transfat double precision NOT NULL DEFAULT 0,
+    cholesterol double precision NOT NULL DEFAULT 0,
+    vitamina double precision NOT NULL DEFAULT 0,
+    vitaminc double precision NOT NULL DEFAULT 0,
+    vitamind double precision NOT NULL DEFAULT 0,
+    vitaminb6 double precision NOT NULL DEFAULT 0,
+    vitaminb12 double precision NOT NULL DEFAULT 0,
+    vitamine double precision NOT NULL DEFAULT 0,
+    vitamink double precision NOT NULL DEFAULT 0,
+    choline double precision NOT NULL DEFAULT 0,
+    canxi double precision NOT NULL DEFAULT 0,
+    fe double precision NOT NULL DEFAULT 0,
+    magie double precision NOT NULL DEFAULT 0,
+    photpho double precision NOT NULL DEFAULT 0,
+    kali double precision NOT NULL DEFAULT 0,
+    natri double precision NOT NULL DEFAULT 0,
+    zn double precision NOT NULL DEFAULT 0,
+    water double precision NOT NULL DEFAULT 0,
+    caffeine double precision NOT NULL DEFAULT 0,
+    alcohol double precision NOT NULL DEFAULT 0,
+    updatedat timestamp without time zone DEFAULT CURRENT_TIMESTAMP
+);
+
+ALTER TABLE public.dish_nutrition OWNER TO postgres;
+
+CREATE INDEX IF NOT EXISTS ingredientindish_dishid_idx ON public.ingredientindish (dishid);
+CREATE INDEX IF NOT EXISTS ingredientindish_ingredientid_idx ON public.ingredientindish (ingredientid);
+
+INSERT INTO public.dish_nutrition (dishid, totalweight, totalgram, totalgramkcal, kcal, carbs, sugar, fiber, protein, saturatedfat, monounsaturatedfat, polyunsaturatedfat, transfat, cholesterol, vitamina, vitaminc, vitamind, vitaminb6, vitaminb12, vitamine, vitamink, choline, canxi, fe, magie, photpho, kali, natri, zn, water, caffeine, alcohol)
+SELECT d.id,
+       COALESCE(SUM(iid.weight), 0),
+       COALESCE(SUM(iid.weight * ing.gramperunit), 0),
+       COALESCE(SUM((iid.weight * ing.gramperunit / 100.0) * ing.kcal), 0),
+       COALESCE(SUM((ing.kcal / 100.0) * iid.weight), 0),
+       COALESCE(SUM((ing.carbs / 100.0) * iid.weight), 0),
+       COALESCE(SUM((ing.sugar / 100.0) * iid.weight), 0),
+       COALESCE(SUM((ing.fiber / 100.0) * iid.weight), 0),
+       COALESCE(SUM((ing.protein / 100.0) * iid.weight), 0),
+       COALESCE(SUM((ing.saturatedfat / 100.0) * iid.weight), 0),
+       COALESCE(SUM((ing.monounsaturatedfat / 100.0) * iid.weight), 0),
+       COALESCE(SUM((ing.polyunsaturatedfat / 100.0) * iid.weight), 0),
+       COALESCE(SUM((ing.transfat / 100.0) * iid.weight), 0),
+       COALESCE(SUM((ing.cholesterol / 100.0) * iid.weight), 0),
+       COALESCE(SUM((ing.vitamina / 100.0) * iid.weight), 0),
+       COALESCE(SUM((ing.vitaminc / 100.0) * iid.weight), 0),
+       COALESCE(SUM((ing.vitamind / 100.0) * iid.weight), 0),
+       COALESCE(SUM((ing.vitaminb6 / 100.0) * iid.weight), 0),
+       COALESCE(SUM((ing.vitaminb12 / 100.0) * iid.weight), 0),
+       COALESCE(SUM((ing.vitamine / 100.0) * iid.weight), 0),
+       COALESCE(SUM((ing.vitamink / 100.0) * iid.weight), 0),
+       COALESCE(SUM((ing.choline / 100.0) * iid.weight), 0),
+       COALESCE(SUM((ing.canxi / 100.0) * iid.weight), 0),
+       COALESCE(SUM((ing.fe / 100.0) * iid.weight), 0),
+       COALESCE(SUM((ing.magie / 100.0) * iid.weight), 0),
+       COALESCE(SUM((ing.photpho / 100.0) * iid.weight), 0),
+       COALESCE(SUM((ing.kali / 100.0) * iid.weight), 0),
+       COALESCE(SUM((ing.natri / 100.0) * iid.weight), 0),
+       COALESCE(SUM((ing.zn / 100.0) * iid.weight), 0),
+       COALESCE(SUM((ing.water / 100.0) * iid.weight), 0),
+       COALESCE(SUM((ing.caffeine / 100.0) * iid.weight), 0),
+       COALESCE(SUM((ing.alcohol / 100.0) * iid.weight), 0)
+FROM public.dish d
+LEFT JOIN public.ingredientindish iid ON d.id = iid.dishid
+LEFT JOIN public.ingredient ing ON iid.ingredientid = ing.id
+GROUP BY d.id
+ON CONFLICT (dishid) DO NOTHING;
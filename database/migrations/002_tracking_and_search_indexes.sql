@@ -0,0 +1,10 @@
+-- Per-user day lookups on the tracking tables. Queries filter on a half-open
+-- [day, day + 1) range of "time" so these composite indexes can be used.
+CREATE INDEX IF NOT EXISTS mealofuser_userinfoid_time_idx ON public.mealofuser (userinfoid, "time");
+CREATE INDEX IF NOT EXISTS drinkofuser_userinfoid_time_idx ON public.drinkofuser (userinfoid, "time");
+CREATE INDEX IF NOT EXISTS exerciseofuser_userinfoid_time_idx ON public.exerciseofuser (userinfoid, "time");
+
+-- Trigram indexes backing the ILIKE '%kw%' and % (similarity) filters of the food search.
+CREATE EXTENSION IF NOT EXISTS pg_trgm WITH SCHEMA public;
+CREATE INDEX IF NOT EXISTS dish_name_trgm_idx ON public.dish USING gin (name public.gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS ingredient_name_trgm_idx ON public.ingredient USING gin (name public.gin_trgm_ops);
@@ -0,0 +1,101 @@
+-- Per-user daily rollup of meal nutrients, drink volume (ml) and exercise kcal, so range
+-- queries (weekly/monthly charts) read one row per day instead of re-joining every meal.
+-- Nutrient columns follow dish_nutrition; drinkwater and kcalburned come from DrinkOfUser and ExerciseOfUser.
+-- TrackingRepository applies +/- deltas when a meal, drink or exercise is inserted or deleted;
+-- FoodRepository recomputes the meal part of the affected days when a dish's nutrition changes.
+
+CREATE TABLE IF NOT EXISTS public.daily_user_nutrition (
+    userinfoid integer NOT NULL REFERENCES public.userinfo(id) ON DELETE CASCADE,
+    day date NOT NULL,
+    mealcount integer NOT NULL DEFAULT 0,
+    kcal double precision NOT NULL DEFAULT 0,
+    carbs double precision NOT NULL DEFAULT 0,
+    sugar double precision NOT NULL DEFAULT 0,
+    fiber double precision NOT NULL DEFAULT 0,
+    protein double precision NOT NULL DEFAULT 0,
+    saturatedfat double precision NOT NULL DEFAULT 0,
+    monounsaturatedfat double precision NOT NULL DEFAULT 0,
+    polyunsaturatedfat double precision NOT NULL DEFAULT 0,
+    transfat double precision NOT NULL DEFAULT 0,
+    cholesterol double precision NOT NULL DEFAULT 0,
+    vitamina double precision NOT NULL DEFAULT 0,
+    vitaminc double precision NOT NULL DEFAULT 0,
+    vitamind double precision NOT NULL DEFAULT 0,
+    vitaminb6 double precision NOT NULL DEFAULT 0,
+    vitaminb12 double precision NOT NULL DEFAULT 0,
+    vitamine double precision NOT NULL DEFAULT 0,
+    vitamink double precision NOT NULL DEFAULT 0,
+    choline double precision NOT NULL DEFAULT 0,
+    canxi double precision NOT NULL DEFAULT 0,
+    fe double precision NOT NULL DEFAULT 0,
+    magie double precision NOT NULL DEFAULT 0,
+    photpho double precision NOT NULL DEFAULT 0,
+    kali double precision NOT NULL DEFAULT 0,
+    natri double precision NOT NULL DEFAULT 0,
+    zn double precision NOT NULL DEFAULT 0,
+    water double precision NOT NULL DEFAULT 0,
+    caffeine double precision NOT NULL DEFAULT 0,
+    alcohol double precision NOT NULL DEFAULT 0,
+    drinkwater double precision NOT NULL DEFAULT 0,
+    kcalburned double precision NOT NULL DEFAULT 0,
+    updatedat timestamp without time zone DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (userinfoid, day)
+);
+
+ALTER TABLE public.daily_user_nutrition OWNER TO postgres;
+
+INSERT INTO public.daily_user_nutrition (userinfoid, day, mealcount, kcal, carbs, sugar, fiber, protein, saturatedfat, monounsaturatedfat, polyunsaturatedfat, transfat, cholesterol, vitamina, vitaminc, vitamind, vitaminb6, vitaminb12, vitamine, vitamink, choline, canxi, fe, magie, photpho, kali, natri, zn, water, caffeine, alcohol)
+SELECT mu.userinfoid,
+       mu."time"::date,
+       COUNT(*),
+       COALESCE(SUM(dn.kcal * mu.weight / NULLIF(dn.totalweight, 0)), 0),
+       COALESCE(SUM(dn.carbs * mu.weight / NULLIF(dn.totalweight, 0)), 0),
+       COALESCE(SUM(dn.sugar * mu.weight / NULLIF(dn.totalweight, 0)), 0),
+       COALESCE(SUM(dn.fiber * mu.weight / NULLIF(dn.totalweight, 0)), 0),
+       COALESCE(SUM(dn.protein * mu.weight / NULLIF(dn.totalweight, 0)), 0),
+       COALESCE(SUM(dn.saturatedfat * mu.weight / NULLIF(dn.totalweight, 0)), 0),
+       COALESCE(SUM(dn.monounsaturatedfat * mu.weight / NULLIF(dn.totalweight, 0)), 0),
+       COALESCE(SUM(dn.polyunsaturatedfat * mu.weight / NULLIF(dn.totalweight, 0)), 0),
+       COALESCE(SUM(dn.transfat * mu.weight / NULLIF(dn.totalweight, 0)), 0),
+       COALESCE(SUM(dn.cholesterol * mu.weight / NULLIF(dn.totalweight, 0)), 0),
+       COALESCE(SUM(dn.vitamina * mu.weight / NULLIF(dn.totalweight, 0)), 0),
+       COALESCE(SUM(dn.vitaminc * mu.weight / NULLIF(dn.totalweight, 0)), 0),
+       COALESCE(SUM(dn.vitamind * mu.weight / NULLIF(dn.totalweight, 0)), 0),
+       COALESCE(SUM(dn.vitaminb6 * mu.weight / NULLIF(dn.totalweight, 0)), 0),
+       COALESCE(SUM(dn.vitaminb12 * mu.weight / NULLIF(dn.totalweight, 0)), 0),
+       COALESCE(SUM(dn.vitamine * mu.weight / NULLIF(dn.totalweight, 0)), 0),
+       COALESCE(SUM(dn.vitamink * mu.weight / NULLIF(dn.totalweight, 0)), 0),
+       COALESCE(SUM(dn.choline * mu.weight / NULLIF(dn.totalweight, 0)), 0),
+       COALESCE(SUM(dn.canxi * mu.weight / NULLIF(dn.totalweight, 0)), 0),
+       COALESCE(SUM(dn.fe * mu.weight / NULLIF(dn.totalweight, 0)), 0),
+       COALESCE(SUM(dn.magie * mu.weight / NULLIF(dn.totalweight, 0)), 0),
+       COALESCE(SUM(dn.photpho * mu.weight / NULLIF(dn.totalweight, 0)), 0),
+       COALESCE(SUM(dn.kali * mu.weight / NULLIF(dn.totalweight, 0)), 0),
+       COALESCE(SUM(dn.natri * mu.weight / NULLIF(dn.totalweight, 0)), 0),
+       COALESCE(SUM(dn.zn * mu.weight / NULLIF(dn.totalweight, 0)), 0),
+       COALESCE(SUM(dn.water * mu.weight / NULLIF(dn.totalweight, 0)), 0),
+       COALESCE(SUM(dn.caffeine * mu.weight / NULLIF(dn.totalweight, 0)), 0),
+       COALESCE(SUM(dn.alcohol * mu.weight / NULLIF(dn.totalweight, 0)), 0)
+FROM public.mealofuser mu
+LEFT JOIN public.dish_nutrition dn ON mu.dishid = dn.dishid
+WHERE mu.userinfoid IS NOT NULL AND mu."time" IS NOT NULL
+GROUP BY mu.userinfoid, mu."time"::date
+ON CONFLICT (userinfoid, day) DO NOTHING;
+
+INSERT INTO public.daily_user_nutrition (userinfoid, day, drinkwater)
+SELECT d.userinfoid, d."time"::date, COALESCE(SUM(d.amount * ud.mlperunit), 0)
+FROM public.drinkofuser d
+JOIN public.unitdrink ud ON d.unitdrinkid = ud.id
+WHERE d.userinfoid IS NOT NULL AND d."time" IS NOT NULL
+GROUP BY d.userinfoid, d."time"::date
+ON CONFLICT (userinfoid, day) DO UPDATE SET drinkwater = EXCLUDED.drinkwater;
+
+INSERT INTO public.daily_user_nutrition (userinfoid, day, kcalburned)
+SELECT eou.userinfoid, eou."time"::date, COALESCE(SUM(eou.minute * le.kcalpermin), 0)
+FROM public.exerciseofuser eou
+JOIN public.levelexercise le ON eou.levelexerciseid = le.id
+GROUP BY eou.userinfoid, eou."time"::date
+ON CONFLICT (userinfoid, day) DO UPDATE SET kcalburned = EXCLUDED.kcalburned;
+
+-- Finds the days to recompute when a dish changes.
+CREATE INDEX IF NOT EXISTS mealofuser_dishid_idx ON public.mealofuser (dishid);
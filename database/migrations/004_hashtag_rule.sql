@@ -0,0 +1,46 @@
+-- Auto-hashtag thresholds, one rule per nutrient: a dish whose density per 100 g is >= highthreshold
+-- gets highhashtagid, otherwise <= lowthreshold gets lowhashtagid. Values are those of the former
+-- if/elif ladder in nutrition_calculations (including its carbs rule). After changing a threshold, run
+-- python database/backfill_hashtags.py to recompute HashtagOfDish for the whole catalog.
+
+CREATE TABLE IF NOT EXISTS public.hashtag_rule (
+    nutrient character varying(64) NOT NULL PRIMARY KEY,
+    highthreshold double precision NOT NULL,
+    highhashtagid integer NOT NULL REFERENCES public.hashtag(id) ON DELETE CASCADE,
+    lowthreshold double precision NOT NULL,
+    lowhashtagid integer NOT NULL REFERENCES public.hashtag(id) ON DELETE CASCADE
+);
+
+ALTER TABLE public.hashtag_rule OWNER TO postgres;
+
+INSERT INTO public.hashtag_rule (nutrient, highthreshold, highhashtagid, lowthreshold, lowhashtagid) VALUES
+    ('kcal', 400, 15, 100, 16),
+    ('carbs', 14, 19, 55, 20),
+    ('sugar', 10, 21, 2.5, 22),
+    ('fiber', 5.5, 23, 1.5, 24),
+    ('protein', 10, 17, 2.5, 18),
+    ('saturatedfat', 5, 25, 1, 26),
+    ('monounsaturatedfat', 10, 27, 4, 28),
+    ('polyunsaturatedfat', 10, 29, 3, 30),
+    ('transfat', 1, 31, 0.5, 32),
+    ('cholesterol', 10, 33, 2.5, 34),
+    ('vitamina', 60, 35, 15, 36),
+    ('vitaminc', 18, 39, 4.5, 40),
+    ('vitamind', 4, 37, 1, 38),
+    ('vitaminb6', 0.34, 41, 0.085, 42),
+    ('vitaminb12', 0.5, 43, 0.12, 44),
+    ('vitamine', 3, 45, 0.75, 46),
+    ('vitamink', 24, 47, 6, 48),
+    ('choline', 110, 49, 27, 50),
+    ('canxi', 260, 51, 65, 52),
+    ('fe', 3.6, 53, 0.9, 54),
+    ('magie', 84, 55, 21, 56),
+    ('photpho', 250, 57, 62, 58),
+    ('kali', 940, 59, 235, 60),
+    ('natri', 460, 61, 115, 62),
+    ('zn', 2.2, 63, 0.55, 64),
+    ('caffeine', 100, 65, 20, 66),
+    ('alcohol', 2, 67, 0.1, 68)
+ON CONFLICT (nutrient) DO NOTHING;
+
+CREATE INDEX IF NOT EXISTS hashtagofdish_dishid_idx ON public.hashtagofdish (dishid);
@@ -0,0 +1,25 @@
+-- Accent-insensitive food search: "pho bo" matches "Phở bò".
+-- unaccent() is only STABLE (it depends on the dictionary search path), so generated columns go through an
+-- IMMUTABLE wrapper that names the dictionary explicitly. The application folds keywords the same way
+-- (app.helpers.text_folding.fold), so queries compare name_search with a constant and can use the indexes.
+CREATE EXTENSION IF NOT EXISTS unaccent WITH SCHEMA public;
+CREATE EXTENSION IF NOT EXISTS pg_trgm WITH SCHEMA public;
+
+CREATE OR REPLACE FUNCTION public.f_unaccent(text) RETURNS text
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+    AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$;
+
+ALTER TABLE public.dish
+    ADD COLUMN IF NOT EXISTS name_search text GENERATED ALWAYS AS (lower(public.f_unaccent(coalesce(name, '')))) STORED;
+ALTER TABLE public.ingredient
+    ADD COLUMN IF NOT EXISTS name_search text GENERATED ALWAYS AS (lower(public.f_unaccent(coalesce(name, '')))) STORED;
+
+CREATE INDEX IF NOT EXISTS dish_name_search_trgm_idx ON public.dish USING gin (name_search public.gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS ingredient_name_search_trgm_idx ON public.ingredient USING gin (name_search public.gin_trgm_ops);
+
+-- Superseded by the name_search indexes: search no longer filters on the raw name.
+DROP INDEX IF EXISTS public.dish_name_trgm_idx;
+DROP INDEX IF EXISTS public.ingredient_name_trgm_idx;
+
+ANALYZE public.dish;
+ANALYZE public.ingredient;
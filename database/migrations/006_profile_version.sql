@@ -0,0 +1,54 @@
+-- Version of the combined user profile served by GET /get_all_info: bumped whenever the user row or one of
+-- its required index, limit food or health status rows changes, so clients can revalidate with an ETag
+-- that only needs a primary key lookup.
+ALTER TABLE public.userinfo ADD COLUMN IF NOT EXISTS profileversion bigint NOT NULL DEFAULT 1;
+
+CREATE INDEX IF NOT EXISTS requiredindex_userinfoid_idx ON public.requiredindex (userinfoid);
+CREATE INDEX IF NOT EXISTS limitfooduser_userinfoid_idx ON public.limitfooduser (userinfoid);
+CREATE INDEX IF NOT EXISTS healthstatususer_userinfoid_idx ON public.healthstatususer (userinfoid);
+
+-- Direct updates of userinfo bump the version unless the statement already sets it.
+CREATE OR REPLACE FUNCTION public.userinfo_bump_profile_version() RETURNS trigger
+    LANGUAGE plpgsql
+    AS $$
+BEGIN
+    IF NEW.profileversion = OLD.profileversion THEN
+        NEW.profileversion := OLD.profileversion + 1;
+    END IF;
+    RETURN NEW;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION public.profile_child_bump_version() RETURNS trigger
+    LANGUAGE plpgsql
+    AS $$
+BEGIN
+    IF TG_OP <> 'DELETE' THEN
+        UPDATE public.userinfo SET profileversion = profileversion + 1 WHERE id = NEW.userinfoid;
+    END IF;
+    IF TG_OP = 'DELETE' OR (TG_OP = 'UPDATE' AND OLD.userinfoid IS DISTINCT FROM NEW.userinfoid) THEN
+        UPDATE public.userinfo SET profileversion = profileversion + 1 WHERE id = OLD.userinfoid;
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS userinfo_profile_version ON public.userinfo;
+CREATE TRIGGER userinfo_profile_version
+    BEFORE UPDATE ON public.userinfo
+    FOR EACH ROW EXECUTE FUNCTION public.userinfo_bump_profile_version();
+
+DROP TRIGGER IF EXISTS requiredindex_profile_version ON public.requiredindex;
+CREATE TRIGGER requiredindex_profile_version
+    AFTER INSERT OR UPDATE OR DELETE ON public.requiredindex
+    FOR EACH ROW EXECUTE FUNCTION public.profile_child_bump_version();
+
+DROP TRIGGER IF EXISTS limitfooduser_profile_version ON public.limitfooduser;
+CREATE TRIGGER limitfooduser_profile_version
+    AFTER INSERT OR UPDATE OR DELETE ON public.limitfooduser
+    FOR EACH ROW EXECUTE FUNCTION public.profile_child_bump_version();
+
+DROP TRIGGER IF EXISTS healthstatususer_profile_version ON public.healthstatususer;
+CREATE TRIGGER healthstatususer_profile_version
+    AFTER INSERT OR UPDATE OR DELETE ON public.healthstatususer
+    FOR EACH ROW EXECUTE FUNCTION public.profile_child_bump_version();
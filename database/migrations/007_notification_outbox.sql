@@ -0,0 +1,31 @@
+-- Push notification outbox: POST /notification/send stores the notification and its push in one transaction
+-- and returns; the background dispatcher (app/services/core/notification_dispatcher.py) claims due rows
+-- with FOR UPDATE SKIP LOCKED, sends them in multicast batches and records the delivery status.
+--   PENDING  waiting for its first send or for a retry at nextattemptat
+--   SENDING  claimed by a dispatcher until nextattemptat; reclaimed after that if the process died
+--   SENT     accepted by the push service
+--   FAILED   rejected permanently (unregistered token...) or out of attempts
+
+CREATE TABLE IF NOT EXISTS public.notification_outbox (
+    id bigserial PRIMARY KEY,
+    notificationid integer REFERENCES public.notification(id) ON DELETE CASCADE,
+    token text NOT NULL,
+    title text NOT NULL,
+    body text NOT NULL,
+    status character varying(10) NOT NULL DEFAULT 'PENDING',
+    attempts integer NOT NULL DEFAULT 0,
+    nextattemptat timestamp with time zone NOT NULL DEFAULT now(),
+    lasterror text,
+    createdat timestamp with time zone NOT NULL DEFAULT now(),
+    sentat timestamp with time zone
+);
+
+ALTER TABLE public.notification_outbox OWNER TO postgres;
+
+-- Only rows still to be sent are indexed, so the claim query stays cheap however many SENT rows pile up.
+CREATE INDEX IF NOT EXISTS notification_outbox_due_idx
+    ON public.notification_outbox (nextattemptat)
+    WHERE status IN ('PENDING', 'SENDING');
+
+CREATE INDEX IF NOT EXISTS notification_outbox_notificationid_idx
+    ON public.notification_outbox (notificationid);
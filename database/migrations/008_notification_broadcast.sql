@@ -0,0 +1,40 @@
+-- Broadcast notifications: POST /notification/broadcast inserts one notification per user of a segment with a
+-- single INSERT ... SELECT (tagged with broadcastid). The dispatcher then leases the broadcast, streams the
+-- receivers' tokens through a server-side cursor ordered by notification id and sends them as 500-token
+-- multicasts. lastnotificationid records progress, so a broadcast whose lease expired (the process died)
+-- is resumed after it by another dispatcher instead of starting over.
+--   SENDING  created, or being sent until leaseuntil
+--   DONE     every token has been pushed once; transient failures continue in notification_outbox
+
+CREATE TABLE IF NOT EXISTS public.notification_broadcast (
+    id serial PRIMARY KEY,
+    senderid integer NOT NULL,
+    type character varying(30) NOT NULL,
+    content text NOT NULL,
+    relatedid integer NOT NULL,
+    title text NOT NULL,
+    segment jsonb NOT NULL DEFAULT '{}'::jsonb,
+    status character varying(10) NOT NULL DEFAULT 'SENDING',
+    recipients integer NOT NULL DEFAULT 0,
+    pushed integer NOT NULL DEFAULT 0,
+    retried integer NOT NULL DEFAULT 0,
+    failed integer NOT NULL DEFAULT 0,
+    lastnotificationid integer NOT NULL DEFAULT 0,
+    leaseuntil timestamp with time zone NOT NULL DEFAULT now(),
+    createdat timestamp with time zone NOT NULL DEFAULT now(),
+    finishedat timestamp with time zone
+);
+
+ALTER TABLE public.notification_broadcast OWNER TO postgres;
+
+CREATE INDEX IF NOT EXISTS notification_broadcast_sending_idx
+    ON public.notification_broadcast (leaseuntil)
+    WHERE status = 'SENDING';
+
+ALTER TABLE public.notification ADD COLUMN IF NOT EXISTS broadcastid integer
+    REFERENCES public.notification_broadcast(id) ON DELETE SET NULL;
+
+-- Token stream of one broadcast, resumable by id; direct notifications (broadcastid NULL) are not indexed.
+CREATE INDEX IF NOT EXISTS notification_broadcastid_idx
+    ON public.notification (broadcastid, id)
+    WHERE broadcastid IS NOT NULL;
@@ -0,0 +1,44 @@
+-- Real-time delivery: every insert into notification is announced on the notification_new channel, and
+-- the API processes LISTENing on it forward the rows to their server-sent-event subscribers
+-- (GET /notification/stream/{receiver_id}). NOTIFY is sent at commit, so rolled back rows never show up.
+--
+-- The trigger is per statement: direct notifications get one message each, carrying the row as the inbox
+-- returns it (content is left out when the payload would pass the 8000 byte NOTIFY limit); a broadcast's
+-- INSERT ... SELECT gets a single {"broadcastId": ...} message, and listeners look up the rows of the
+-- receivers they actually serve.
+
+CREATE OR REPLACE FUNCTION public.notification_notify_new() RETURNS trigger
+    LANGUAGE plpgsql
+    AS $$
+DECLARE
+    r record;
+    payload text;
+BEGIN
+    FOR r IN
+        SELECT n.id, n.receiverid, n.type, n.content, n.createdat, n.status, u.fullname
+        FROM new_rows n
+        LEFT JOIN public.userinfo u ON u.id = n.senderid
+        WHERE n.broadcastid IS NULL
+    LOOP
+        payload := json_build_object(
+            'id', r.id, 'receiverId', r.receiverid, 'fullname', r.fullname, 'type', r.type,
+            'content', r.content, 'createAt', r.createdat, 'status', r.status
+        )::text;
+        IF octet_length(payload) > 7900 THEN
+            payload := json_build_object('id', r.id, 'receiverId', r.receiverid, 'truncated', true)::text;
+        END IF;
+        PERFORM pg_notify('notification_new', payload);
+    END LOOP;
+
+    FOR r IN SELECT DISTINCT broadcastid FROM new_rows WHERE broadcastid IS NOT NULL LOOP
+        PERFORM pg_notify('notification_new', json_build_object('broadcastId', r.broadcastid)::text);
+    END LOOP;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS notification_notify_new ON public.notification;
+CREATE TRIGGER notification_notify_new
+    AFTER INSERT ON public.notification
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION public.notification_notify_new();
@@ -0,0 +1,14 @@
+-- Notification inbox: pages are read newest first by keyset on (createdat, id), so createdat can no longer be
+-- NULL (a NULL would break the row comparison). Rows without a date sort as the oldest.
+UPDATE public.notification SET createdat = to_timestamp(0) WHERE createdat IS NULL;
+ALTER TABLE public.notification ALTER COLUMN createdat SET NOT NULL;
+
+-- GET /notification/{receiver_id}: one range scan per page, already in the requested order.
+CREATE INDEX IF NOT EXISTS notification_receiverid_createdat_idx
+    ON public.notification (receiverid, createdat DESC, id DESC);
+
+-- Unread rows only: GET /notification/{receiver_id}/unread-count is an index-only count of a small index,
+-- and unread-only pages and bulk mark-as-read use it too. Rows leave the index once READ.
+CREATE INDEX IF NOT EXISTS notification_unread_idx
+    ON public.notification (receiverid, createdat DESC, id DESC)
+    WHERE status = 'UNREAD';
@@ -0,0 +1,21 @@
+-- name_search folds whitespace like app.helpers.text_folding.fold: runs of spaces, tabs, newlines and
+-- non-breaking spaces become one space and the ends are trimmed. Before this, a stored name with a double
+-- or non-breaking space never matched its folded keyword through LIKE.
+-- A generated column's expression can't be altered before PostgreSQL 17, so the column is recreated; its
+-- trigram indexes are dropped with it and rebuilt below.
+ALTER TABLE public.dish DROP COLUMN IF EXISTS name_search;
+ALTER TABLE public.dish
+    ADD COLUMN name_search text GENERATED ALWAYS AS (
+        btrim(regexp_replace(lower(public.f_unaccent(coalesce(name, ''))), '[\t\n\v\f\r \u00a0]+', ' ', 'g'))
+    ) STORED;
+ALTER TABLE public.ingredient DROP COLUMN IF EXISTS name_search;
+ALTER TABLE public.ingredient
+    ADD COLUMN name_search text GENERATED ALWAYS AS (
+        btrim(regexp_replace(lower(public.f_unaccent(coalesce(name, ''))), '[\t\n\v\f\r \u00a0]+', ' ', 'g'))
+    ) STORED;
+
+CREATE INDEX IF NOT EXISTS dish_name_search_trgm_idx ON public.dish USING gin (name_search public.gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS ingredient_name_search_trgm_idx ON public.ingredient USING gin (name_search public.gin_trgm_ops);
+
+ANALYZE public.dish;
+ANALYZE public.ingredient;
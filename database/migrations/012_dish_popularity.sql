@@ -0,0 +1,44 @@
+-- Number of times each dish was logged as a meal, for autocomplete ordering. Maintained by a trigger on
+-- MealOfUser so loading the autocomplete index reads one row per dish instead of counting every meal ever
+-- logged. Kept out of the dish row so meal inserts don't rewrite (and lock) the catalog entry.
+
+CREATE TABLE IF NOT EXISTS public.dish_popularity (
+    dishid integer PRIMARY KEY REFERENCES public.dish(id) ON DELETE CASCADE,
+    logged bigint NOT NULL DEFAULT 0
+);
+
+ALTER TABLE public.dish_popularity OWNER TO postgres;
+
+CREATE OR REPLACE FUNCTION public.mealofuser_count_dish() RETURNS trigger
+    LANGUAGE plpgsql
+    AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' AND OLD.dishid IS NOT DISTINCT FROM NEW.dishid THEN
+        RETURN NULL;
+    END IF;
+    IF TG_OP <> 'DELETE' AND NEW.dishid IS NOT NULL THEN
+        INSERT INTO public.dish_popularity (dishid, logged) VALUES (NEW.dishid, 1)
+        ON CONFLICT (dishid) DO UPDATE SET logged = public.dish_popularity.logged + 1;
+    END IF;
+    IF TG_OP <> 'INSERT' AND OLD.dishid IS NOT NULL THEN
+        UPDATE public.dish_popularity SET logged = logged - 1 WHERE dishid = OLD.dishid;
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS mealofuser_dish_popularity ON public.mealofuser;
+CREATE TRIGGER mealofuser_dish_popularity
+    AFTER INSERT OR UPDATE OF dishid OR DELETE ON public.mealofuser
+    FOR EACH ROW EXECUTE FUNCTION public.mealofuser_count_dish();
+
+-- Meal writes wait for this migration's transaction, so every meal is counted once: by the backfill or by
+-- the trigger.
+LOCK TABLE public.mealofuser IN SHARE MODE;
+
+INSERT INTO public.dish_popularity (dishid, logged)
+SELECT dishid, COUNT(*)
+FROM public.mealofuser
+WHERE dishid IS NOT NULL
+GROUP BY dishid
+ON CONFLICT (dishid) DO UPDATE SET logged = EXCLUDED.logged;
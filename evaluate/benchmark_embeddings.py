@@ -0,0 +1,166 @@
+"""
+Compare the embedding backends on evaluate/queries.csv: load time, memory, query latency, batch
+throughput and retrieval quality.
+
+Quality reranks, for every query, the documents judged in evaluate/retrieval_results_manual.csv by cosine
+similarity and scores the ranking with the manual relevance labels (nDCG@k, Precision@k). Agreement is
+the mean cosine between each backend's query vectors and those of torch, which the Elasticsearch index
+was built with. Each backend runs in its own process so memory numbers don't add up.
+
+    python evaluate/export_onnx.py              # once, to create the ONNX graphs
+    python evaluate/benchmark_embeddings.py
+    python evaluate/benchmark_embeddings.py --backends torch onnx-int8 --threads 4 --repeat 20
+"""
+import argparse
+import csv
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+from evaluate import ndcg_at_k, precision_at_k
+
+QUERIES_CSV = "evaluate/queries.csv"
+JUDGED_CSV = "evaluate/retrieval_results_manual.csv"
+BACKENDS = ["torch", "onnx-fp32", "onnx-int8"]
+
+def rss_mib() -> float:
+    """Resident memory of this process (Linux /proc, else peak RSS from getrusage)."""
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 1024
+
+def load_queries() -> list[tuple[str, str]]:
+    with open(QUERIES_CSV, "r", encoding="utf-8") as f:
+        return [(row["query_id"], row["query_text"]) for row in csv.DictReader(f)]
+
+def load_judged() -> dict:
+    """query_id -> [(page_content, relevance)]"""
+    judged = defaultdict(list)
+    with open(JUDGED_CSV, "r", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            relevance = row["relevance_score"].strip()
+            judged[row["query_id"]].append((row["page_content"], int(relevance) if relevance else 0))
+    return judged
+
+def build_backend(name: str, threads: int):
+    from app.core.config import settings
+    from app.services.core.embedding_backends import OnnxEmbeddings, torch_embeddings, ONNX_FP32_FILE, ONNX_INT8_FILE
+
+    settings.EMBEDDING_THREADS = threads
+    if name == "torch":
+        return torch_embeddings()
+    model_file = ONNX_FP32_FILE if name == "onnx-fp32" else ONNX_INT8_FILE
+    return OnnxEmbeddings(settings.EMBEDDING_ONNX_DIR, model_file=model_file, threads=threads)
+
+def run_backend(name: str, threads: int, repeat: int, vectors_path: str) -> dict:
+    queries = load_queries()
+    judged = load_judged()
+
+    base_rss = rss_mib()
+    start = time.perf_counter()
+    embeddings = build_backend(name, threads)
+    load_s = time.perf_counter() - start
+    embeddings.embed_query("khởi động")  # warm-up
+    model_rss = rss_mib() - base_rss
+
+    latencies = []
+    for _ in range(repeat):
+        for _, text in queries:
+            start = time.perf_counter()
+            embeddings.embed_query(text)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    documents = sorted({content for items in judged.values() for content, _ in items})
+    start = time.perf_counter()
+    doc_vectors = dict(zip(documents, np.array(embeddings.embed_documents(documents), dtype=np.float32)))
+    batch_s = time.perf_counter() - start
+
+    query_vectors = np.array(embeddings.embed_documents([text for _, text in queries]), dtype=np.float32)
+    np.save(vectors_path, query_vectors)
+
+    quality = {5: [], 10: []}
+    precision = {5: [], 10: []}
+    for (query_id, _), vector in zip(queries, query_vectors):
+        items = judged.get(query_id)
+        if not items:
+            continue
+        scores = [_cosine(vector, doc_vectors[content]) for content, _ in items]
+        ranked = [relevance for _, (_, relevance) in sorted(zip(scores, items), key=lambda pair: -pair[0])]
+        for k in quality:
+            quality[k].append(ndcg_at_k(ranked, k))
+            precision[k].append(precision_at_k(ranked, k))
+
+    return {
+        "backend": name,
+        "loadS": load_s,
+        "modelRssMiB": model_rss,
+        "p50Ms": float(np.percentile(latencies, 50)),
+        "p95Ms": float(np.percentile(latencies, 95)),
+        "docsPerS": len(documents) / batch_s if batch_s else 0.0,
+        **{f"nDCG@{k}": float(np.mean(v)) if v else 0.0 for k, v in quality.items()},
+        **{f"P@{k}": float(np.mean(v)) if v else 0.0 for k, v in precision.items()},
+    }
+
+def _cosine(a: np.ndarray, b: np.ndarray) -> float:
+    return float(np.dot(a, b) / max(np.linalg.norm(a) * np.linalg.norm(b), 1e-12))
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the embedding backends")
+    parser.add_argument("--backends", nargs="+", default=BACKENDS, choices=BACKENDS)
+    parser.add_argument("--threads", type=int, default=0, help="CPU threads (0 = library default)")
+    parser.add_argument("--repeat", type=int, default=10, help="passes over the queries for latency")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--vectors", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_backend(args.worker, args.threads, args.repeat, args.vectors)))
+        return
+
+    results = []
+    vectors = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in args.backends:
+            path = os.path.join(tmp, f"{name}.npy")
+            completed = subprocess.run(
+                [sys.executable, __file__, "--worker", name, "--vectors", path,
+                 "--threads", str(args.threads), "--repeat", str(args.repeat)],
+                capture_output=True, text=True,
+            )
+            if completed.returncode != 0:
+                print(f"{name}: failed\n{completed.stderr.strip().splitlines()[-1] if completed.stderr else ''}")
+                continue
+            results.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+            vectors[name] = np.load(path)
+
+    reference = vectors.get("torch")
+    for result in results:
+        if reference is not None:
+            pairs = zip(vectors[result["backend"]], reference)
+            result["cosVsTorch"] = float(np.mean([_cosine(a, b) for a, b in pairs]))
+
+    columns = ["backend", "loadS", "modelRssMiB", "p50Ms", "p95Ms", "docsPerS", "nDCG@5", "nDCG@10", "P@5", "P@10", "cosVsTorch"]
+    print(" | ".join(f"{c:>11}" for c in columns))
+    for result in results:
+        cells = []
+        for column in columns:
+            value = result.get(column, "")
+            cells.append(f"{value:>11.3f}" if isinstance(value, float) else f"{value:>11}")
+        print(" | ".join(cells))
+
+if __name__ == "__main__":
+    main()
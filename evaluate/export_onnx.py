@@ -0,0 +1,28 @@
+"""
+Export the embedding model to ONNX and quantize it to int8 for EMBEDDING_BACKEND=onnx.
+
+    python evaluate/export_onnx.py                         # into EMBEDDING_ONNX_DIR
+    python evaluate/export_onnx.py --output models/gte-onnx --no-quantize
+"""
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.core.config import settings
+from app.services.core.embedding_backends import export_onnx, EMBEDDING_MODEL
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the embedding model to ONNX (fp32 and int8)")
+    parser.add_argument("--model", default=EMBEDDING_MODEL)
+    parser.add_argument("--output", default=settings.EMBEDDING_ONNX_DIR)
+    parser.add_argument("--no-quantize", action="store_true", help="only write the fp32 graph")
+    args = parser.parse_args()
+
+    paths = export_onnx(args.output, model_name=args.model, quantize=not args.no_quantize)
+    for name, path in paths.items():
+        print(f"{name}: {path} ({os.path.getsize(path) / 2**20:.1f} MiB)")
+
+if __name__ == "__main__":
+    main()